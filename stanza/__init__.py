@@ -1,11 +1,31 @@
-from stanza.pipeline.core import DownloadMethod, Pipeline
-from stanza.pipeline.multilingual import MultilingualPipeline
-from stanza.models.common.doc import Document
-from stanza.resources.common import download
-from stanza.resources.installation import install_corenlp, download_corenlp_models
+import importlib
+import logging
+
 from stanza._version import __version__, __resources_version__
 
-import logging
+# the rest of the public interface is only imported when it is first used,
+# so that "import stanza" doesn't have to load torch and every processor
+_LAZY_ATTRIBUTES = {
+    'DownloadMethod': 'stanza.pipeline.core',
+    'Pipeline': 'stanza.pipeline.core',
+    'MultilingualPipeline': 'stanza.pipeline.multilingual',
+    'PipelinePool': 'stanza.pipeline.pool',
+    'Document': 'stanza.models.common.doc',
+    'download': 'stanza.resources.common',
+    'install_corenlp': 'stanza.resources.installation',
+    'download_corenlp_models': 'stanza.resources.installation',
+}
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError("module 'stanza' has no attribute '{}'".format(name))
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
+
 logger = logging.getLogger('stanza')
 
 # if the client application hasn't set the log level, we set it
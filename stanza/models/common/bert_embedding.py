@@ -242,7 +242,18 @@ def extract_bert_embeddings(model_name, tokenizer, model, data, device, keep_end
     """
     Extract transformer embeddings using a generic roberta extraction
     data: list of list of string (the text tokens)
+
+    If the model was loaded by a FoundationCache with an activation
+    cache, sentences which another model already ran through this
+    transformer reuse those embeddings
     """
+    activation_cache = getattr(model, 'activation_cache', None)
+    if activation_cache is not None:
+        return activation_cache.compute(('bert', id(model), keep_endpoints), list(data),
+                                        lambda sentences: _extract_bert_embeddings(model_name, tokenizer, model, sentences, device, keep_endpoints))
+    return _extract_bert_embeddings(model_name, tokenizer, model, data, device, keep_endpoints)
+
+def _extract_bert_embeddings(model_name, tokenizer, model, data, device, keep_endpoints):
     if model_name.startswith("vinai/phobert"):
         return extract_phobert_embeddings(model_name, tokenizer, model, data, device, keep_endpoints)
 
@@ -32,6 +32,22 @@ class PairwiseBilinear(nn.Module):
 
         return output
 
+    def forward_pairs(self, input1, input2, index):
+        ''' Score each position of input1 only against the position of input2 given by index,
+        rather than against all of input2.  Gives the same scores as forward()
+        Input: tensors of sizes (N x L1 x D1), (N x L2 x D2) and (N x L1)
+        Output: tensor of size (N x L1 x O)'''
+        input1_size = list(input1.size())
+
+        # same weight layout as forward: ((N x L1) x D1) * (D1 x (O x D2)) -> (N x L1) x O x D2
+        intermediate = torch.mm(input1.view(-1, input1_size[-1]), self.weight.view(-1, self.input2_size * self.output_size))
+        intermediate = intermediate.view(-1, self.output_size, self.input2_size)
+        # (N x L1 x D2): the row of input2 paired with each row of input1
+        input2 = torch.gather(input2, 1, index.unsqueeze(2).expand(-1, -1, input2.size(2)))
+        # ((N x L1) x O x D2) * ((N x L1) x D2 x 1) -> N x L1 x O
+        output = intermediate.bmm(input2.reshape(-1, self.input2_size, 1))
+        return output.view(input1_size[0], input1_size[1], self.output_size)
+
 class BiaffineScorer(nn.Module):
     def __init__(self, input1_size, input2_size, output_size):
         super().__init__()
@@ -58,6 +74,11 @@ class PairwiseBiaffineScorer(nn.Module):
         input2 = torch.cat([input2, input2.new_ones(*input2.size()[:-1], 1)], len(input2.size())-1)
         return self.W_bilin(input1, input2)
 
+    def forward_pairs(self, input1, input2, index):
+        input1 = torch.cat([input1, input1.new_ones(*input1.size()[:-1], 1)], len(input1.size())-1)
+        input2 = torch.cat([input2, input2.new_ones(*input2.size()[:-1], 1)], len(input2.size())-1)
+        return self.W_bilin.forward_pairs(input1, input2, index)
+
 class DeepBiaffineScorer(nn.Module):
     def __init__(self, input1_size, input2_size, hidden_size, output_size, hidden_func=F.relu, dropout=0, pairwise=True):
         super().__init__()
@@ -73,6 +94,15 @@ class DeepBiaffineScorer(nn.Module):
     def forward(self, input1, input2):
         return self.scorer(self.dropout(self.hidden_func(self.W1(input1))), self.dropout(self.hidden_func(self.W2(input2))))
 
+    def forward_pairs(self, input1, input2, index):
+        """
+        Score each position i of input1 only against position index[:, i] of input2
+
+        Only available for the pairwise scorer.  Returns (N x L1 x O)
+        instead of the (N x L1 x L2 x O) of forward()
+        """
+        return self.scorer.forward_pairs(self.dropout(self.hidden_func(self.W1(input1))), self.dropout(self.hidden_func(self.W2(input2))), index)
+
 if __name__ == "__main__":
     x1 = torch.randn(3,4)
     x2 = torch.randn(3,5)
@@ -0,0 +1,345 @@
+"""
+A compact binary format for annotated documents
+
+Document.to_serialized pickles the nested dicts of to_dict, and
+Document.from_serialized builds the document from those dicts again,
+parsing the MISC field of every token along the way.  This format
+instead stores the columns of a ColumnarDocument: one array of
+integers per field, plus a table of the distinct strings the arrays
+refer to.  Loading a document copies the arrays back into
+DocumentColumns, so nothing is parsed.
+
+A serialized document is
+
+  MAGIC | version (uint16) | header length (uint32) | header | arrays
+
+where the header is JSON with the text, language, and sentence
+comments of the document, the string table, and the name, dtype, and
+length of each array.  The arrays follow one after the other as little
+endian bytes, each stored with the smallest integer type which fits
+its values.  Character offsets and the links between sentences,
+tokens, and words are stored as differences, which are small.
+
+As with to_serialized, only the annotations of the words and tokens,
+the text, and the comments are kept.  Other attributes of the
+sentences, such as the sentiment or the constituency tree, are not.
+
+DocumentWriter and DocumentReader keep many documents in one file,
+which can be appended to, streamed, or read by document index:
+
+  with DocumentWriter("docs.bin") as writer:
+      for doc in docs:
+          writer.write(doc)
+
+  with DocumentReader("docs.bin") as reader:
+      doc = reader[10]
+      for doc in reader:
+          ...
+"""
+
+import json
+import logging
+import os
+import struct
+
+import numpy as np
+
+from stanza.models.common.columnar_doc import ColumnarDocument, DocumentColumns
+from stanza.models.common.doc import NER, START_CHAR, END_CHAR
+
+logger = logging.getLogger('stanza')
+
+MAGIC = b'STZD'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<HI')
+
+CONTAINER_MAGIC = b'STZDOCS\n'
+CONTAINER_VERSION = 1
+CONTAINER_HEADER = struct.Struct('<H')
+RECORD_HEADER = struct.Struct('<Q')
+
+COMPACT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+def _compact(array):
+    """
+    Return array as the smallest little endian integer type which holds its values
+    """
+    if len(array) == 0:
+        return array.astype('<i1')
+    low, high = array.min(), array.max()
+    for dtype in COMPACT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return array.astype(np.dtype(dtype).newbyteorder('<'), copy=False)
+    raise ValueError("Cannot store values from %d to %d" % (low, high))
+
+def _encode_columns(columns):
+    """
+    Return the name and array of each column to write
+
+    The positions in the document are written as differences, which
+    are small numbers which compact well: the number of tokens and
+    words of each sentence, the number of words of each token, the
+    distance from one start_char to the next, and the length of each
+    unit.  The cumulative sums on loading give back the exact values.
+    """
+    words, tokens = columns.words.arrays, columns.tokens.arrays
+    if len(tokens['word_start']) > 0 and (tokens['word_start'][0] != 0 or
+                                          (tokens['word_start'][1:] != tokens['word_end'][:-1]).any()):
+        raise ValueError("The words of the tokens are not in order")
+    arrays = [('sentence_tokens', np.diff(columns.sentence_tokens)),
+              ('sentence_words', np.diff(columns.sentence_words)),
+              ('tokens.num_words', tokens['word_end'] - tokens['word_start'])]
+    for kind, units in (('words', columns.words), ('tokens', columns.tokens)):
+        for field in units.fields:
+            array = units.arrays[field]
+            if field in ('token', 'word_start', 'word_end'):
+                continue
+            if field == START_CHAR:
+                array = np.diff(array.astype(np.int64), prepend=0)
+            elif field == END_CHAR:
+                array = array.astype(np.int64) - units.arrays[START_CHAR]
+            arrays.append(("%s.%s" % (kind, field), array))
+    return arrays
+
+def _decode_columns(stored, columns):
+    """
+    Fill in the columns from the arrays written by _encode_columns
+    """
+    columns.sentence_tokens = np.concatenate([[0], np.cumsum(stored['sentence_tokens'], dtype=np.int64)])
+    columns.sentence_words = np.concatenate([[0], np.cumsum(stored['sentence_words'], dtype=np.int64)])
+    num_words = stored['tokens.num_words'].astype(np.int64)
+    derived = {
+        'tokens.word_end': np.cumsum(num_words),
+        'words.token': np.repeat(np.arange(len(num_words)), num_words),
+    }
+    derived['tokens.word_start'] = derived['tokens.word_end'] - num_words
+    for kind, units in (('words', columns.words), ('tokens', columns.tokens)):
+        for field in units.fields:
+            name = "%s.%s" % (kind, field)
+            if name in derived:
+                array = derived[name]
+            elif name not in stored:
+                raise ValueError("Serialized document is missing the column %s" % name)
+            elif field == START_CHAR:
+                array = np.cumsum(stored[name], dtype=np.int64)
+            elif field == END_CHAR:
+                array = units.arrays[START_CHAR] + stored[name]
+            else:
+                array = stored[name]
+            # astype makes a writable copy, so the columns can still be changed
+            units.arrays[field] = array.astype(units.arrays[field].dtype)
+
+def _encode_value(value):
+    # multi_ner is the only field with a tuple value
+    return list(value) if isinstance(value, tuple) else value
+
+def _decode_value(value):
+    return tuple(value) if isinstance(value, list) else value
+
+def document_to_bytes(doc):
+    """
+    Serialize a Document or ColumnarDocument to bytes
+
+    A ColumnarDocument is written straight from its columns, and any
+    other Document is converted to columns first
+    """
+    if isinstance(doc, ColumnarDocument) and doc._column_runs() == [[doc.columns, 0, doc.columns.num_sentences]]:
+        columns = doc.columns
+    else:
+        columns = DocumentColumns.from_sentences(doc.sentences)
+
+    arrays = [(name, _compact(array)) for name, array in _encode_columns(columns)]
+    header = {
+        'text': doc.text,
+        'lang': doc.lang,
+        'comments': [sentence.comments for sentence in doc.sentences],
+        'values': [_encode_value(value) for value in columns.values.values],
+        'arrays': [[name, array.dtype.str, len(array)] for name, array in arrays],
+    }
+    header = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    pieces = [MAGIC, HEADER.pack(FORMAT_VERSION, len(header)), header]
+    pieces.extend(array.tobytes() for _, array in arrays)
+    return b''.join(pieces)
+
+def document_from_bytes(data):
+    """
+    Load a ColumnarDocument from the bytes made by document_to_bytes
+    """
+    data = memoryview(data)
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a serialized document")
+    offset = len(MAGIC)
+    version, header_length = HEADER.unpack_from(data, offset)
+    if version > FORMAT_VERSION:
+        raise ValueError("Serialized document has version %d, but only versions up to %d are supported" % (version, FORMAT_VERSION))
+    offset += HEADER.size
+    header = json.loads(bytes(data[offset:offset+header_length]).decode('utf-8'))
+    offset += header_length
+
+    columns = DocumentColumns()
+    columns.values.values = [_decode_value(value) for value in header['values']]
+    columns.values.ids = {value: value_id for value_id, value in enumerate(columns.values.values)}
+    stored = {}
+    for name, dtype, length in header['arrays']:
+        dtype = np.dtype(dtype)
+        if offset + dtype.itemsize * length > len(data):
+            raise ValueError("Serialized document is truncated")
+        stored[name] = np.frombuffer(data, dtype=dtype, count=length, offset=offset)
+        offset += dtype.itemsize * length
+    _decode_columns(stored, columns)
+
+    doc = ColumnarDocument.from_columns(columns, text=header['text'], comments=header['comments'])
+    doc.lang = header['lang']
+    if columns.tokens.arrays[NER].any():
+        doc.build_ents()
+    return doc
+
+def _scan_records(fin, filename, position, file_size):
+    """
+    Yield the (start, length) of each complete document from position onwards
+
+    Stops with a warning at a document which was only partly written
+    """
+    while position < file_size:
+        fin.seek(position)
+        length_bytes = fin.read(RECORD_HEADER.size)
+        if len(length_bytes) == RECORD_HEADER.size:
+            length, = RECORD_HEADER.unpack(length_bytes)
+            start = position + RECORD_HEADER.size
+            if start + length <= file_size:
+                yield start, length
+                position = start + length
+                continue
+        logger.warning("%s ends with a partly written document, which is skipped", filename)
+        return
+
+def _find_end(fin, filename):
+    """
+    Return the position just after the last complete document of a document file
+    """
+    end = len(CONTAINER_MAGIC) + CONTAINER_HEADER.size
+    file_size = os.fstat(fin.fileno()).st_size
+    for start, length in _scan_records(fin, filename, end, file_size):
+        end = start + length
+    return end
+
+class DocumentWriter:
+    """
+    Appends serialized documents to a file
+
+    An existing file is added to rather than replaced.  Each document
+    is written as its length followed by the output of
+    document_to_bytes, so the file can be read back in order or by
+    document index with DocumentReader.
+
+    If the existing file ends with a partly written document, such as
+    from a job which died while writing, that document is cut off
+    with a warning before anything new is written.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.fout = open(filename, 'r+b' if os.path.exists(filename) else 'w+b')
+        magic = self.fout.read(len(CONTAINER_MAGIC))
+        if not magic:
+            self.fout.write(CONTAINER_MAGIC + CONTAINER_HEADER.pack(CONTAINER_VERSION))
+        elif magic != CONTAINER_MAGIC:
+            self.fout.close()
+            raise ValueError("%s is not a document file" % filename)
+        else:
+            self.fout.seek(_find_end(self.fout, filename))
+            self.fout.truncate()
+
+    def write(self, doc):
+        data = document_to_bytes(doc)
+        self.fout.write(RECORD_HEADER.pack(len(data)))
+        self.fout.write(data)
+
+    def flush(self):
+        self.fout.flush()
+
+    def close(self):
+        self.fout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+class DocumentReader:
+    """
+    Reads the documents of a file made by DocumentWriter
+
+    Iterating reads the documents one at a time.  Indexing reads just
+    the requested document; the positions of the documents are found
+    by skipping from one length to the next the first time they are
+    needed.
+
+    A document which was only partly written, such as by a job which
+    died while writing, is skipped with a warning.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.fin = open(filename, 'rb')
+        magic = self.fin.read(len(CONTAINER_MAGIC))
+        if magic != CONTAINER_MAGIC:
+            self.fin.close()
+            raise ValueError("%s is not a document file" % filename)
+        version, = CONTAINER_HEADER.unpack(self.fin.read(CONTAINER_HEADER.size))
+        if version > CONTAINER_VERSION:
+            self.fin.close()
+            raise ValueError("%s has version %d, but only versions up to %d are supported" % (filename, version, CONTAINER_VERSION))
+        # (position, length) of the documents found so far
+        self.records = []
+        self.next_record = len(CONTAINER_MAGIC) + CONTAINER_HEADER.size
+        self.scanned = False
+
+    def _scan(self, index=None):
+        """
+        Find the documents up to index, or all of them if index is None
+        """
+        if self.scanned or (index is not None and index < len(self.records)):
+            return
+        file_size = os.fstat(self.fin.fileno()).st_size
+        for start, length in _scan_records(self.fin, self.filename, self.next_record, file_size):
+            self.records.append((start, length))
+            self.next_record = start + length
+            if index is not None and index < len(self.records):
+                return
+        self.scanned = True
+
+    def _read(self, index):
+        start, length = self.records[index]
+        self.fin.seek(start)
+        return document_from_bytes(self.fin.read(length))
+
+    def __len__(self):
+        self._scan()
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        self._scan(index)
+        if index < 0 or index >= len(self.records):
+            raise IndexError("Document index %d out of range" % index)
+        return self._read(index)
+
+    def __iter__(self):
+        index = 0
+        while True:
+            self._scan(index)
+            if index >= len(self.records):
+                return
+            yield self._read(index)
+            index += 1
+
+    def close(self):
+        self.fin.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
@@ -147,7 +147,17 @@ class CharacterLanguageModel(nn.Module):
     def build_char_representation(self, sentences):
         """
         Return values from this charlm for a list of list of words
+
+        If the charlm was loaded by a FoundationCache with an
+        activation cache, sentences which another model already ran
+        through this charlm reuse those values
         """
+        activation_cache = getattr(self, 'activation_cache', None)
+        if activation_cache is not None:
+            return activation_cache.compute(('charlm', id(self)), sentences, self._build_char_representation)
+        return self._build_char_representation(sentences)
+
+    def _build_char_representation(self, sentences):
         CHARLM_START = "\n"
         CHARLM_END = " "
 
@@ -2,47 +2,38 @@
 
 import numpy as np
 
-def tarjan(tree):
-    """"""
+def find_cycles(tree):
+    """
+    Find the cycles in a tree of head indices
+
+    Each node has exactly one head, so following the heads from any
+    node either reaches a node seen on an earlier walk or loops back
+    on the current walk.  This replaces a recursive Tarjan SCC search,
+    which could exceed the python stack limit on long sentences.
 
-    indices = -np.ones_like(tree)
-    lowlinks = -np.ones_like(tree)
-    onstack = np.zeros_like(tree, dtype=bool)
-    stack = list()
-    _index = [0]
+    Returns a list of boolean masks, one per cycle of more than one
+    node, ordered by the smallest node in each cycle
+    """
+    heads = tree.tolist()
+    walk = [0] * len(heads)
     cycles = []
-    #-------------------------------------------------------------
-    def strong_connect(i):
-        _index[0] += 1
-        index = _index[-1]
-        indices[i] = lowlinks[i] = index - 1
-        stack.append(i)
-        onstack[i] = True
-        dependents = np.where(np.equal(tree, i))[0]
-        for j in dependents:
-            if indices[j] == -1:
-                strong_connect(j)
-                lowlinks[i] = min(lowlinks[i], lowlinks[j])
-            elif onstack[j]:
-                lowlinks[i] = min(lowlinks[i], indices[j])
-
-        # There's a cycle!
-        if lowlinks[i] == indices[i]:
-            cycle = np.zeros_like(indices, dtype=bool)
-            while stack[-1] != i:
-                j = stack.pop()
-                onstack[j] = False
-                cycle[j] = True
-            stack.pop()
-            onstack[i] = False
-            cycle[i] = True
-            if cycle.sum() > 1:
-                cycles.append(cycle)
-        return
-    #-------------------------------------------------------------
-    for i in range(len(tree)):
-        if indices[i] == -1:
-            strong_connect(i)
+    for i in range(len(heads)):
+        if walk[i]:
+            continue
+        j = i
+        while not walk[j]:
+            walk[j] = i + 1
+            j = heads[j]
+        if walk[j] != i + 1 or heads[j] == j:
+            # reached an earlier walk or a self loop
+            continue
+        cycle = np.zeros(len(heads), dtype=bool)
+        while not cycle[j]:
+            cycle[j] = True
+            j = heads[j]
+        cycles.append(cycle)
+    # the contraction loop breaks the last cycle first
+    cycles.sort(key=lambda cycle: np.argmax(cycle))
     return cycles
 
 def process_cycle(tree, cycle, scores):
@@ -65,18 +56,17 @@ def process_cycle(tree, cycle, scores):
     #print(cycle_locs, noncycle_locs)
 
     # scores of cycle's potential heads; (c x n) - (c) + () -> (n x c) in R
-    metanode_head_scores = scores[cycle][:,noncycle] - cycle_scores[:,None] + cycle_score
+    metanode_head_scores = scores[np.ix_(cycle_locs, noncycle_locs)] - cycle_scores[:,None] + cycle_score
     # scores of cycle's potential dependents; (n x c) in R
-    metanode_dep_scores = scores[noncycle][:,cycle]
+    metanode_dep_scores = scores[np.ix_(noncycle_locs, cycle_locs)]
     # best noncycle head for each cycle dependent; (n) in c
     metanode_heads = np.argmax(metanode_head_scores, axis=0)
     # best cycle head for each noncycle dependent; (n) in c
     metanode_deps = np.argmax(metanode_dep_scores, axis=1)
 
-    # scores of noncycle graph; (n x n) in R
-    subscores = scores[noncycle][:,noncycle]
-    # pad to contracted graph; (n+1 x n+1) in R
-    subscores = np.pad(subscores, ( (0,1) , (0,1) ), 'constant')
+    # contracted graph, starting from the scores of noncycle graph; (n+1 x n+1) in R
+    subscores = np.zeros((len(noncycle_locs)+1, len(noncycle_locs)+1))
+    subscores[:-1,:-1] = scores[np.ix_(noncycle_locs, noncycle_locs)]
     # set the contracted graph scores of cycle's potential heads; (c x n)[:, (n) in n] in R -> (n) in R
     subscores[-1, :-1] = metanode_head_scores[metanode_heads, np.arange(len(noncycle_locs))]
     # set the contracted graph scores of cycle's potential dependents; (n x c)[(n) in n] in R-> (n) in R
@@ -131,7 +121,7 @@ def chuliu_edmonds(scores):
 
     prepare_scores(scores)
     tree = np.argmax(scores, axis=1)
-    cycles = tarjan(tree)
+    cycles = find_cycles(tree)
 
     #print(scores)
     #print(cycles)
@@ -156,7 +146,7 @@ def chuliu_edmonds(scores):
         scores = subscores
         prepare_scores(scores)
         tree = np.argmax(scores, axis=1)
-        cycles = tarjan(tree)
+        cycles = find_cycles(tree)
 
     while len(subtree_stack) > 0:
         contracted_tree = tree
@@ -202,3 +192,50 @@ def chuliu_edmonds_one_root(scores):
             f.write('{}: {}, {}, {}\n'.format(_tree, _scores, tree_probs, tree_score))
         raise
     return best_tree
+
+def chuliu_edmonds_one_root_batch(scores, lengths):
+    """
+    Find the best single-root tree for each of a padded batch of score matrices
+
+    scores: batch x N x N, where scores[b, i, j] is the score of word i having head j
+    lengths: the number of nodes in each sentence, counting the root
+
+    Most sentences from a trained parser are already a tree with one
+    root when each word takes its best head, so that check is done for
+    the whole batch at once.  Only the remaining sentences are decoded
+    one at a time with chuliu_edmonds_one_root.
+
+    Returns a list of trees, one array of length lengths[b] per sentence
+    """
+    scores = np.asarray(scores)
+    batch_size, max_len = scores.shape[0], scores.shape[1]
+    lengths = np.asarray(lengths)
+
+    positions = np.arange(max_len)
+    padding = positions[None, :] >= lengths[:, None]
+    masked = scores.astype(np.float64)
+    masked[:, positions, positions] = -np.inf
+    masked[np.broadcast_to(padding[:, None, :], masked.shape)] = -np.inf
+    masked[:, 0, :] = -np.inf
+    masked[:, 0, 0] = 0
+    tree = np.argmax(masked, axis=2)
+    tree[padding] = 0
+
+    # following the heads max_len times reaches the root unless there is a cycle
+    ancestors = tree
+    steps = 1
+    while steps < max_len:
+        ancestors = np.take_along_axis(ancestors, ancestors, axis=1)
+        steps *= 2
+    num_roots = np.sum((tree == 0) & ~padding, axis=1) - 1
+    is_tree = (num_roots == 1) & np.all(ancestors == 0, axis=1)
+
+    trees = []
+    for idx, length in enumerate(lengths):
+        if is_tree[idx]:
+            trees.append(tree[idx, :length])
+        elif length == 1:
+            trees.append(np.zeros(1, dtype=tree.dtype))
+        else:
+            trees.append(chuliu_edmonds_one_root(scores[idx, :length, :length]))
+    return trees
@@ -0,0 +1,786 @@
+"""
+A Document which keeps the annotations of its words and tokens in columns
+
+A regular Document has a python object with a dozen attributes for
+every word and token.  A ColumnarDocument instead keeps one numpy
+array per field for the whole document.  Text, lemma, tags, and the
+other string fields are stored as ids into a table of the distinct
+values, so each tag is only stored once.
+
+Sentences hand out Token and Word views of the columns the first time
+they are used.  The views are subclasses of Token and Word with the
+same properties, so code which walks the sentences keeps working.
+Document.get and Document.set, which the processors use to annotate a
+document, read and write whole columns at once instead of going
+through the views.
+
+Build one from the same sentence dicts as a Document, or convert an
+existing Document with ColumnarDocument.from_document, or in place
+with ColumnarDocument.convert.  The pipeline produces them if the
+tokenizer is run with tokenize_columnar=True.
+"""
+
+from operator import attrgetter
+
+import numpy as np
+
+from stanza.models.common.doc import Document, Sentence, Token, Word, _readonly_setter, multi_word_token_misc
+from stanza.models.common.doc import ID, TEXT, LEMMA, UPOS, XPOS, FEATS, HEAD, DEPREL, DEPS, MISC, NER, MULTI_NER, START_CHAR, END_CHAR
+
+WORDS = 'words'
+TOKENS = 'tokens'
+
+# fields which are stored as ids into the ValueTable
+WORD_VALUE_FIELDS = (TEXT, LEMMA, UPOS, XPOS, FEATS, DEPREL, DEPS, MISC)
+TOKEN_VALUE_FIELDS = (TEXT, MISC, NER, MULTI_NER)
+
+# fields which are stored as integers, with -1 for None
+# 'token' is the index of the token a word belongs to,
+# 'word_start' and 'word_end' are the range of words of a token,
+# and 'id_start' and 'id_end' make up the id tuple of a token
+WORD_INT_FIELDS = {ID: np.int32, HEAD: np.int32, START_CHAR: np.int64, END_CHAR: np.int64, 'token': np.int32}
+TOKEN_INT_FIELDS = {'id_start': np.int32, 'id_end': np.int32, START_CHAR: np.int64, END_CHAR: np.int64,
+                    'word_start': np.int64, 'word_end': np.int64}
+
+# the fields which Document.get and Document.set can read and write as columns
+GET_FIELDS = {WORDS: {ID, TEXT, LEMMA, UPOS, XPOS, FEATS, HEAD, DEPREL, DEPS, MISC, START_CHAR, END_CHAR, 'pos'},
+              TOKENS: {ID, TEXT, MISC, NER, MULTI_NER, START_CHAR, END_CHAR}}
+SET_FIELDS = {WORDS: {ID, TEXT, LEMMA, UPOS, XPOS, FEATS, HEAD, DEPREL, DEPS, MISC, 'pos'},
+              TOKENS: {ID, TEXT, MISC, NER, MULTI_NER}}
+
+# fields where '_' is turned into None when set, as in the setters of Word and Token
+NULLABLE_FIELDS = {WORDS: {UPOS, XPOS, FEATS, HEAD, DEPREL, DEPS, MISC},
+                   TOKENS: {MISC, NER, MULTI_NER}}
+
+# attributes of Word and Token which are kept in the columns
+# anything else found on an object, such as a property added with
+# add_property, is kept and put back on its view
+WORD_ATTRIBUTES = {'_id', '_text', '_lemma', '_upos', '_xpos', '_feats', '_head', '_deprel', '_deps', '_misc',
+                   '_start_char', '_end_char', '_parent', '_sent'}
+TOKEN_ATTRIBUTES = {'_id', '_text', '_misc', '_ner', '_multi_ner', '_words', '_start_char', '_end_char', '_sent'}
+
+# the order the fields are read from the objects when building the columns
+WORD_ROW_FIELDS = (ID, TEXT, LEMMA, UPOS, XPOS, FEATS, HEAD, DEPREL, DEPS, MISC, START_CHAR, END_CHAR)
+TOKEN_ROW_FIELDS = (ID, TEXT, MISC, NER, MULTI_NER, START_CHAR, END_CHAR)
+WORD_GETTER = attrgetter(*WORD_ROW_FIELDS)
+TOKEN_GETTER = attrgetter(*TOKEN_ROW_FIELDS)
+# reading the attributes directly skips the properties, which is a lot faster
+WORD_PRIVATE_GETTER = attrgetter(*['_' + field for field in WORD_ROW_FIELDS])
+TOKEN_PRIVATE_GETTER = attrgetter(*['_' + field for field in TOKEN_ROW_FIELDS])
+
+def _is_null(value):
+    return (value is None) or (value == '_')
+
+def _extra_attributes(unit, known):
+    """
+    Return any attributes of unit which are not in known, or None
+
+    A Word or Token has all of the known attributes, so only one with
+    more attributes than that needs to be checked
+    """
+    attributes = vars(unit)
+    if len(attributes) <= len(known):
+        return None
+    return {key: value for key, value in attributes.items() if key not in known}
+
+class ValueTable:
+    """
+    The distinct values of the string columns of a document
+
+    Id 0 is always None.  Values need to be hashable, which includes
+    the tuples used for multi_ner.
+    """
+    def __init__(self, values=None):
+        self.values = [None]
+        self.ids = {None: 0}
+        self._lookup = None
+        if values is not None:
+            for value in values[1:]:
+                self.add(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.ids[value] = value_id
+            self.values.append(value)
+        return value_id
+
+    def add_all(self, values):
+        """
+        Return an int32 array of the ids of values, adding any which are new
+        """
+        ids = self.ids
+        return np.array([ids[value] if value in ids else self.add(value) for value in values], dtype=np.int32)
+
+    def get_all(self, ids):
+        """
+        Return a list of the values for an array of ids
+        """
+        if self._lookup is None or len(self._lookup) != len(self.values):
+            # assigned one at a time so numpy does not unpack the tuples
+            self._lookup = np.empty(len(self.values), dtype=object)
+            for value_id, value in enumerate(self.values):
+                self._lookup[value_id] = value
+        return self._lookup[ids].tolist()
+
+class UnitColumns:
+    """
+    The columns for one kind of unit of a document, either words or tokens
+    """
+    def __init__(self, values, value_fields, int_fields):
+        self.values = values
+        self.value_fields = value_fields
+        self.int_fields = int_fields
+        self.arrays = {}
+        # extra attributes of the original objects, by unit index
+        self.extras = {}
+        # the views handed out so far, so a unit is always the same object
+        self.views = None
+        self.build({field: [] for field in self.fields})
+
+    @property
+    def fields(self):
+        return list(self.value_fields) + list(self.int_fields)
+
+    def build(self, lists):
+        """
+        Replace the columns with the values in a dict of lists
+        """
+        for field in self.value_fields:
+            self.arrays[field] = self.values.add_all(lists[field])
+        for field, dtype in self.int_fields.items():
+            self.arrays[field] = np.array([-1 if value is None else value for value in lists[field]], dtype=dtype)
+        self.views = None
+
+    def __len__(self):
+        return len(self.arrays[TEXT])
+
+    def get(self, field, index):
+        value = self.arrays[field][index]
+        if field in self.value_fields:
+            return self.values.values[value]
+        return None if value < 0 else int(value)
+
+    def get_range(self, field, start, end):
+        if field in self.value_fields:
+            return self.values.get_all(self.arrays[field][start:end])
+        return [None if value < 0 else value for value in self.arrays[field][start:end].tolist()]
+
+    def set_range(self, field, start, end, values):
+        if field in self.value_fields:
+            self.arrays[field][start:end] = self.values.add_all(values)
+        else:
+            self.arrays[field][start:end] = [-1 if value is None else value for value in values]
+
+class DocumentColumns:
+    """
+    The words, tokens, and sentence boundaries of a ColumnarDocument
+
+    The words of a token and the tokens and words of a sentence are
+    contiguous ranges of the columns.
+    """
+    def __init__(self):
+        self.values = ValueTable()
+        self.words = UnitColumns(self.values, WORD_VALUE_FIELDS, WORD_INT_FIELDS)
+        self.tokens = UnitColumns(self.values, TOKEN_VALUE_FIELDS, TOKEN_INT_FIELDS)
+        # where the tokens and words of each sentence start, plus the total at the end
+        self.sentence_tokens = np.zeros(1, dtype=np.int64)
+        self.sentence_words = np.zeros(1, dtype=np.int64)
+        # changes whenever words are added or removed, so the sentences know to remake their word lists
+        self.version = 0
+
+    @classmethod
+    def from_sentences(cls, sentences):
+        """
+        Build the columns from an iterable of Sentence objects
+
+        The sentences are read one at a time, so they can be built as
+        they are iterated and thrown away afterwards
+        """
+        columns = cls()
+        word_rows = []
+        word_tokens = []
+        token_rows = []
+        token_words = []
+        sentence_tokens = [0]
+        sentence_words = [0]
+        for sentence in sentences:
+            # the views of a ColumnarSentence only have the public names,
+            # and anything in their __dict__ is an extra attribute
+            if isinstance(sentence, ColumnarSentence):
+                get_token, get_word = TOKEN_GETTER, WORD_GETTER
+                token_known, word_known = frozenset(), frozenset()
+            else:
+                get_token, get_word = TOKEN_PRIVATE_GETTER, WORD_PRIVATE_GETTER
+                token_known, word_known = TOKEN_ATTRIBUTES, WORD_ATTRIBUTES
+            for token in sentence.tokens:
+                token_idx = len(token_rows)
+                token_rows.append(get_token(token))
+                extras = _extra_attributes(token, token_known)
+                if extras:
+                    columns.tokens.extras[token_idx] = extras
+                words = token.words
+                word_start = len(word_rows)
+                for word in words:
+                    extras = _extra_attributes(word, word_known)
+                    if extras:
+                        columns.words.extras[len(word_rows)] = extras
+                    word_rows.append(get_word(word))
+                word_tokens.extend([token_idx] * len(words))
+                token_words.append((word_start, len(word_rows)))
+            sentence_tokens.append(len(token_rows))
+            sentence_words.append(len(word_rows))
+
+        # zip(*rows) turns the rows into columns, unless there are no rows
+        word_lists = dict(zip(WORD_ROW_FIELDS, zip(*word_rows) if word_rows else [()] * len(WORD_ROW_FIELDS)))
+        word_lists['token'] = word_tokens
+        token_lists = dict(zip(TOKEN_ROW_FIELDS, zip(*token_rows) if token_rows else [()] * len(TOKEN_ROW_FIELDS)))
+        token_lists['id_start'] = [token_id[0] for token_id in token_lists[ID]]
+        token_lists['id_end'] = [token_id[1] if len(token_id) > 1 else None for token_id in token_lists[ID]]
+        token_lists['word_start'] = [start for start, _ in token_words]
+        token_lists['word_end'] = [end for _, end in token_words]
+        columns.words.build(word_lists)
+        columns.tokens.build(token_lists)
+        columns.sentence_tokens = np.array(sentence_tokens, dtype=np.int64)
+        columns.sentence_words = np.array(sentence_words, dtype=np.int64)
+        return columns
+
+    @property
+    def num_sentences(self):
+        return len(self.sentence_tokens) - 1
+
+    def units(self, kind):
+        return self.words if kind == WORDS else self.tokens
+
+    def offsets(self, kind):
+        return self.sentence_words if kind == WORDS else self.sentence_tokens
+
+    def token_range(self, sent_idx):
+        return int(self.sentence_tokens[sent_idx]), int(self.sentence_tokens[sent_idx + 1])
+
+    def word_range(self, sent_idx):
+        return int(self.sentence_words[sent_idx]), int(self.sentence_words[sent_idx + 1])
+
+    def sentence_char_range(self, sent_idx):
+        start, end = self.token_range(sent_idx)
+        if start == end:
+            return None, None
+        return self.tokens.get(START_CHAR, start), self.tokens.get(END_CHAR, end - 1)
+
+    def _view(self, units, view_class, index, sent):
+        if units.views is None:
+            units.views = [None] * len(units)
+        view = units.views[index]
+        if view is None:
+            view = view_class(self, index, sent)
+            if index in units.extras:
+                vars(view).update(units.extras[index])
+            units.views[index] = view
+        return view
+
+    def word_view(self, index, sent):
+        return self._view(self.words, ColumnarWord, index, sent)
+
+    def token_view(self, index, sent):
+        return self._view(self.tokens, ColumnarToken, index, sent)
+
+    def get_range(self, kind, field, start, end):
+        """
+        Return the values of field for the words or tokens from start to end
+        """
+        if kind == TOKENS and field == ID:
+            return [(id_start,) if id_end < 0 else (id_start, id_end)
+                    for id_start, id_end in zip(self.tokens.arrays['id_start'][start:end].tolist(),
+                                                self.tokens.arrays['id_end'][start:end].tolist())]
+        if field == 'pos':
+            field = UPOS
+        return self.units(kind).get_range(field, start, end)
+
+    def set_range(self, kind, field, start, end, values):
+        """
+        Set the values of field for the words or tokens from start to end
+
+        The values are cleaned up the same way as the setters of Word and Token
+        """
+        if field == 'pos':
+            field = UPOS
+        if kind == WORDS and field == LEMMA:
+            texts = self.words.get_range(TEXT, start, end)
+            values = [value if not _is_null(value) or text == '_' else None for value, text in zip(values, texts)]
+        elif field in NULLABLE_FIELDS[kind]:
+            values = [None if _is_null(value) else value for value in values]
+        if kind == WORDS and field in (ID, HEAD):
+            values = [None if value is None else int(value) for value in values]
+        if kind == TOKENS and field == ID:
+            values = [value if isinstance(value, tuple) else (value,) for value in values]
+            self.tokens.set_range('id_start', start, end, [value[0] for value in values])
+            self.tokens.set_range('id_end', start, end, [value[1] if len(value) > 1 else None for value in values])
+            return
+        self.units(kind).set_range(field, start, end, values)
+
+    def get_value(self, kind, field, index):
+        if kind == TOKENS and field == ID:
+            return self.get_range(kind, field, index, index + 1)[0]
+        return self.units(kind).get(field, index)
+
+    def set_value(self, kind, field, index, value):
+        self.set_range(kind, field, index, index + 1, [value])
+
+    def mwt_expansions(self, first, last):
+        """
+        Return (token text, expanded words) for the multi-word tokens of sentences first to last
+        """
+        expansions = []
+        start, end = int(self.sentence_tokens[first]), int(self.sentence_tokens[last])
+        id_end = self.tokens.arrays['id_end']
+        word_start = self.tokens.arrays['word_start']
+        word_end = self.tokens.arrays['word_end']
+        texts = self.tokens.get_range(TEXT, start, end)
+        miscs = self.tokens.get_range(MISC, start, end)
+        for token_idx, text, misc in zip(range(start, end), texts, miscs):
+            if id_end[token_idx] >= 0 or (misc is not None and multi_word_token_misc.match(misc)):
+                words = self.words.get_range(TEXT, word_start[token_idx], word_end[token_idx])
+                expansions.append([text, ' '.join(words)])
+        return expansions
+
+    def expand_mwt(self, expansions, first, last):
+        """
+        Replace the words of the multi-word tokens of sentences first to last with their expansions
+
+        Does the same as Document.set_mwt_expansions: the words of the
+        other tokens are renumbered and lose their head and deprel.
+        The columns of the words are rebuilt in one pass, and the
+        views of the words which are kept are reused.
+
+        Returns the number of expansions used
+        """
+        tokens = self.tokens.arrays
+        word_start, word_end = int(self.sentence_words[first]), int(self.sentence_words[last])
+        # for each new word, the index of the old word it keeps, or -1
+        sources = []
+        new_ids = []
+        new_texts = []
+        new_tokens = []
+        sentence_lengths = []
+        idx_e = 0
+        for sent_idx in range(first, last):
+            idx_w = 0
+            start, end = self.token_range(sent_idx)
+            for token_idx, misc in zip(range(start, end), self.tokens.get_range(MISC, start, end)):
+                idx_w += 1
+                first_word = len(sources)
+                m = tokens['id_end'][token_idx] >= 0
+                n = multi_word_token_misc.match(misc) if misc is not None else None
+                if not m and not n:
+                    for old_word in range(tokens['word_start'][token_idx], tokens['word_end'][token_idx]):
+                        tokens['id_start'][token_idx] = idx_w
+                        sources.append(old_word)
+                        new_ids.append(idx_w)
+                        new_texts.append(None)
+                        new_tokens.append(token_idx)
+                else:
+                    expanded = [x for x in expansions[idx_e].split(' ') if len(x) > 0]
+                    idx_e += 1
+                    idx_w_end = idx_w + len(expanded) - 1
+                    if misc:
+                        misc = None if misc == 'MWT=Yes' else '|'.join([x for x in misc.split('|') if x != 'MWT=Yes'])
+                        tokens[MISC][token_idx] = self.values.add(misc)
+                    tokens['id_start'][token_idx] = idx_w
+                    tokens['id_end'][token_idx] = idx_w_end
+                    for i, e_word in enumerate(expanded):
+                        sources.append(-1)
+                        new_ids.append(idx_w + i)
+                        new_texts.append(e_word)
+                        new_tokens.append(token_idx)
+                    idx_w = idx_w_end
+                tokens['word_start'][token_idx] = word_start + first_word
+                tokens['word_end'][token_idx] = word_start + len(sources)
+            sentence_lengths.append(len(sources))
+
+        sources = np.array(sources, dtype=np.int64)
+        kept = sources >= 0
+        shift = len(sources) - (word_end - word_start)
+        for field, column in self.words.arrays.items():
+            null = 0 if field in self.words.value_fields else -1
+            middle = np.full(len(sources), null, dtype=column.dtype)
+            if field == ID:
+                middle[:] = new_ids
+            elif field == 'token':
+                middle[:] = new_tokens
+            elif field == TEXT:
+                middle[kept] = column[sources[kept]]
+                middle[~kept] = self.values.add_all([text for text in new_texts if text is not None])
+            elif field not in (HEAD, DEPREL):
+                middle[kept] = column[sources[kept]]
+            self.words.arrays[field] = np.concatenate([column[:word_start], middle, column[word_end:]])
+
+        # tokens and sentences after the expanded sentences move over by the change in the number of words
+        token_end = int(self.sentence_tokens[last])
+        tokens['word_start'][token_end:] += shift
+        tokens['word_end'][token_end:] += shift
+        self.sentence_words[first+1:last+1] = word_start + np.array(sentence_lengths, dtype=np.int64)
+        self.sentence_words[last+1:] += shift
+
+        # keep the extra attributes and the views of the words which are still there
+        new_index = {int(old): new for new, old in enumerate(sources.tolist()) if old >= 0}
+        def move(old):
+            if old < word_start:
+                return old
+            if old >= word_end:
+                return old + shift
+            return word_start + new_index[old] if old in new_index else None
+        extras = {}
+        for old, value in self.words.extras.items():
+            new = move(old)
+            if new is not None:
+                extras[new] = value
+        self.words.extras = extras
+        if self.words.views is not None:
+            views = [None] * len(self.words)
+            for old, view in enumerate(self.words.views):
+                new = move(old) if view is not None else None
+                if new is not None:
+                    view._column_index = new
+                    views[new] = view
+            self.words.views = views
+        self.version += 1
+        return idx_e
+
+def _column_property(kind, field, doc, settable=True):
+    """
+    A property which reads and writes one field of a view's unit in the columns
+    """
+    def getter(self):
+        return self._columns.get_value(kind, field, self._column_index)
+    if not settable:
+        return property(getter, doc=doc)
+    def setter(self, value):
+        self._columns.set_value(kind, field, self._column_index, value)
+    return property(getter, setter, doc=doc)
+
+class ColumnarToken(Token):
+    """ A view of one token of a ColumnarDocument """
+    __slots__ = ('_columns', '_column_index', '_sent')
+
+    def __init__(self, columns, index, sent):
+        self._columns = columns
+        self._column_index = index
+        self._sent = sent
+
+    id = _column_property(TOKENS, ID, Token.id.__doc__)
+    text = _column_property(TOKENS, TEXT, Token.text.__doc__)
+    misc = _column_property(TOKENS, MISC, Token.misc.__doc__)
+    ner = _column_property(TOKENS, NER, Token.ner.__doc__)
+    multi_ner = _column_property(TOKENS, MULTI_NER, Token.multi_ner.__doc__)
+    start_char = _column_property(TOKENS, START_CHAR, Token.start_char.__doc__, settable=False)
+    end_char = _column_property(TOKENS, END_CHAR, Token.end_char.__doc__, settable=False)
+
+    @property
+    def words(self):
+        """ Access the list of syntactic words underlying this token. """
+        tokens = self._columns.tokens.arrays
+        start, end = tokens['word_start'][self._column_index], tokens['word_end'][self._column_index]
+        return [self._columns.word_view(i, self._sent) for i in range(start, end)]
+
+    @words.setter
+    def words(self, value):
+        _readonly_setter(self, 'words')
+
+    def pretty_print(self):
+        """ Print this token with its extended words in one line, the same as a Token """
+        return f"<Token id={'-'.join([str(x) for x in self.id])};words=[{', '.join([word.pretty_print() for word in self.words])}]>"
+
+class ColumnarWord(Word):
+    """ A view of one word of a ColumnarDocument """
+    __slots__ = ('_columns', '_column_index', '_sent')
+
+    def __init__(self, columns, index, sent):
+        self._columns = columns
+        self._column_index = index
+        self._sent = sent
+
+    id = _column_property(WORDS, ID, Word.id.__doc__)
+    text = _column_property(WORDS, TEXT, Word.text.__doc__)
+    lemma = _column_property(WORDS, LEMMA, Word.lemma.__doc__)
+    upos = _column_property(WORDS, UPOS, Word.upos.__doc__)
+    xpos = _column_property(WORDS, XPOS, Word.xpos.__doc__)
+    feats = _column_property(WORDS, FEATS, Word.feats.__doc__)
+    head = _column_property(WORDS, HEAD, Word.head.__doc__)
+    deprel = _column_property(WORDS, DEPREL, Word.deprel.__doc__)
+    deps = _column_property(WORDS, DEPS, Word.deps.__doc__)
+    misc = _column_property(WORDS, MISC, Word.misc.__doc__)
+    start_char = _column_property(WORDS, START_CHAR, Word.start_char.__doc__, settable=False)
+    end_char = _column_property(WORDS, END_CHAR, Word.end_char.__doc__, settable=False)
+    pos = _column_property(WORDS, UPOS, Word.pos.__doc__)
+
+    @property
+    def parent(self):
+        """ Access the parent token of this word. """
+        token_idx = self._columns.words.arrays['token'][self._column_index]
+        return self._columns.token_view(int(token_idx), self._sent)
+
+    @parent.setter
+    def parent(self, value):
+        _readonly_setter(self, 'parent')
+
+    def pretty_print(self):
+        """ Print the word in one line, the same as a Word """
+        return "<Word" + super().pretty_print()[len("<ColumnarWord"):]
+
+class ColumnarSentence(Sentence):
+    """ A sentence of a ColumnarDocument
+
+    The tokens and words are made the first time they are used.
+    The dependencies are built from the heads when they are used.
+    """
+
+    def __init__(self, columns, index, doc=None):
+        self._columns = columns
+        self._column_index = index
+        self._tokens = None
+        self._words = None
+        self._words_version = None
+        self._dependencies = None
+        self._text = None
+        self._ents = []
+        self._doc = doc
+        self._comments = []
+
+    @property
+    def tokens(self):
+        """ Access the list of tokens for this sentence. """
+        if self._tokens is None:
+            start, end = self._columns.token_range(self._column_index)
+            self._tokens = [self._columns.token_view(i, self) for i in range(start, end)]
+        return self._tokens
+
+    @tokens.setter
+    def tokens(self, value):
+        _readonly_setter(self, 'tokens')
+
+    @property
+    def words(self):
+        """ Access the list of words for this sentence. """
+        if self._words is None or self._words_version != self._columns.version:
+            start, end = self._columns.word_range(self._column_index)
+            self._words = [self._columns.word_view(i, self) for i in range(start, end)]
+            self._words_version = self._columns.version
+        return self._words
+
+    @words.setter
+    def words(self, value):
+        _readonly_setter(self, 'words')
+
+    @property
+    def dependencies(self):
+        """ Access list of dependencies for this sentence. """
+        if self._dependencies is None:
+            self._dependencies = []
+            super().rebuild_dependencies()
+        return self._dependencies
+
+    @dependencies.setter
+    def dependencies(self, value):
+        """ Set the list of dependencies for this sentence. """
+        self._dependencies = value
+
+    def rebuild_dependencies(self):
+        # the dependencies are rebuilt from the heads the next time they are used
+        self._dependencies = None
+
+class ColumnarDocument(Document):
+    """ A Document which stores the words and tokens in columns
+
+    Has the same interface as Document.  get and set read and write
+    the columns directly for the fields in GET_FIELDS and SET_FIELDS.
+    """
+
+    def _process_sentences(self, sentences, comments=None):
+        self._set_columns(DocumentColumns.from_sentences(self._build_sentence(sent_idx, tokens)
+                                                         for sent_idx, tokens in enumerate(sentences)))
+        self._count_words()
+        self._process_comments(comments)
+
+    def _set_columns(self, columns):
+        """ Make one ColumnarSentence for each sentence of columns """
+        self._columns = columns
+        self.sentences = [ColumnarSentence(columns, sent_idx, doc=self) for sent_idx in range(columns.num_sentences)]
+        for sent_idx, sentence in enumerate(self.sentences):
+            begin_idx, end_idx = columns.sentence_char_range(sent_idx)
+            if all((self.text is not None, begin_idx is not None, end_idx is not None)): sentence.text = self.text[begin_idx: end_idx]
+            sentence.index = sent_idx
+
+    @classmethod
+    def from_columns(cls, columns, text=None, comments=None):
+        """
+        Make a ColumnarDocument from DocumentColumns which are already built
+
+        Nothing is parsed, so this is much faster than building the
+        document from sentence dicts
+        """
+        new_doc = cls([], text=text)
+        new_doc._set_columns(columns)
+        new_doc._count_words()
+        new_doc._process_comments(comments)
+        return new_doc
+
+    @classmethod
+    def from_document(cls, document):
+        """
+        Make a ColumnarDocument with the same annotations as a Document
+
+        Attributes of the document and its sentences other than the
+        tokens and words, such as the comments or sentiment, are copied
+        over as well.
+        """
+        new_doc = cls([], text=document.text)
+        new_doc._columns = DocumentColumns.from_sentences(document.sentences)
+        new_doc.sentences = []
+        for sent_idx, sentence in enumerate(document.sentences):
+            new_sentence = ColumnarSentence(new_doc._columns, sent_idx, doc=new_doc)
+            for key, value in vars(sentence).items():
+                if key not in ('_tokens', '_words', '_dependencies', '_doc', '_ents', '_columns', '_column_index', '_words_version'):
+                    setattr(new_sentence, key, value)
+            new_doc.sentences.append(new_sentence)
+        for key, value in vars(document).items():
+            if key not in ('_sentences', '_ents', '_columns'):
+                setattr(new_doc, key, value)
+        if document.ents:
+            new_doc.build_ents()
+        return new_doc
+
+    @classmethod
+    def convert(cls, document):
+        """
+        Turn a Document into a ColumnarDocument in place
+
+        Unlike from_document, anything which already holds the
+        document, such as the caller of the pipeline, sees the columns
+        and any annotations added to them afterwards.
+        Returns the document.
+        """
+        if isinstance(document, cls):
+            return document
+        new_doc = cls.from_document(document)
+        document.__class__ = cls
+        document.__dict__ = new_doc.__dict__
+        for sentence in document.sentences:
+            sentence.doc = document
+        if document.ents:
+            document.build_ents()
+        return document
+
+    @property
+    def columns(self):
+        """ The DocumentColumns which store the annotations of this document """
+        return self._columns
+
+    def _column_runs(self):
+        """
+        Group the sentences into runs of consecutive sentences of the same columns
+
+        The sentences of a ColumnarDocument are normally one run, but
+        processors combine the sentences of several documents into one
+        when processing them together.  Returns None if any of the
+        sentences are not ColumnarSentences.
+        """
+        runs = []
+        for sentence in self.sentences:
+            if not isinstance(sentence, ColumnarSentence):
+                return None
+            if runs and runs[-1][0] is sentence._columns and runs[-1][2] == sentence._column_index:
+                runs[-1][2] += 1
+            else:
+                runs.append([sentence._columns, sentence._column_index, sentence._column_index + 1])
+        return runs
+
+    def _count_words(self):
+        runs = self._column_runs()
+        if runs is None:
+            super()._count_words()
+            return
+        self.num_tokens = sum(int(columns.sentence_tokens[last] - columns.sentence_tokens[first]) for columns, first, last in runs)
+        self.num_words = sum(int(columns.sentence_words[last] - columns.sentence_words[first]) for columns, first, last in runs)
+
+    def get(self, fields, as_sentences=False, from_token=False):
+        kind = TOKENS if from_token else WORDS
+        field_list = [fields] if isinstance(fields, str) else fields
+        runs = self._column_runs()
+        if runs is None or not isinstance(field_list, list) or len(field_list) == 0 or any(field not in GET_FIELDS[kind] for field in field_list):
+            return super().get(fields, as_sentences, from_token)
+
+        columns_values = [[] for _ in field_list]
+        lengths = []
+        for columns, first, last in runs:
+            offsets = columns.offsets(kind)
+            start, end = int(offsets[first]), int(offsets[last])
+            for values, field in zip(columns_values, field_list):
+                values.extend(columns.get_range(kind, field, start, end))
+            lengths.extend(np.diff(offsets[first:last+1]).tolist())
+
+        if len(field_list) == 1:
+            units = columns_values[0]
+        else:
+            units = [list(unit) for unit in zip(*columns_values)]
+        if not as_sentences:
+            return units
+        results = []
+        start = 0
+        for length in lengths:
+            results.append(units[start:start+length])
+            start += length
+        return results
+
+    def set(self, fields, contents, to_token=False, to_sentence=False):
+        kind = TOKENS if to_token else WORDS
+        field_list = [fields] if isinstance(fields, str) else fields
+        runs = self._column_runs()
+        if (to_sentence or runs is None or not isinstance(field_list, (tuple, list)) or len(field_list) == 0 or
+            not isinstance(contents, (tuple, list)) or any(field not in SET_FIELDS[kind] for field in field_list)):
+            super().set(fields, contents, to_token, to_sentence)
+            return
+
+        assert (to_token and self.num_tokens == len(contents)) or self.num_words == len(contents), \
+            "Contents must have the same length as the original file."
+
+        if len(field_list) == 1:
+            columns_values = [contents]
+        else:
+            columns_values = [[content[field_idx] for content in contents] for field_idx in range(len(field_list))]
+        offset = 0
+        for columns, first, last in runs:
+            offsets = columns.offsets(kind)
+            start, end = int(offsets[first]), int(offsets[last])
+            for field, values in zip(field_list, columns_values):
+                columns.set_range(kind, field, start, end, values[offset:offset+end-start])
+            offset += end - start
+
+    def set_mwt_expansions(self, expansions):
+        runs = self._column_runs()
+        if runs is None:
+            super().set_mwt_expansions(expansions)
+            return
+
+        idx_e = 0
+        for columns, first, last in runs:
+            idx_e += columns.expand_mwt(expansions[idx_e:], first, last)
+        for sentence in self.sentences:
+            sentence.rebuild_dependencies()
+
+        self._count_words() # update number of words & tokens
+        assert idx_e == len(expansions), "{} {}".format(idx_e, len(expansions))
+
+    def get_mwt_expansions(self, evaluation=False):
+        runs = self._column_runs()
+        if runs is None:
+            return super().get_mwt_expansions(evaluation)
+
+        expansions = []
+        for columns, first, last in runs:
+            expansions.extend(columns.mwt_expansions(first, last))
+        if evaluation: expansions = [e[0] for e in expansions]
+        return expansions
@@ -5,6 +5,7 @@ Run it as follows:
   python stanza/models/common/convert_pretrain.py <.pt file> <text file> <# vectors>
 
 Note that -1 for # of vectors will keep all the vectors.
+An optional 4th argument is the number of processes used to read the text file.
 You probably want to keep fewer than that for most publicly released
 embeddings, though, as they can get quite large.
 
@@ -30,11 +31,12 @@ def main():
         max_vocab = -1
     else:
         max_vocab = int(sys.argv[3])
+    num_workers = int(sys.argv[4]) if len(sys.argv) > 4 else 1
 
     if vec_filename.endswith(".csv"):
         pt = pretrain.Pretrain(filename, max_vocab=max_vocab, csv_filename=vec_filename)
     else:
-        pt = pretrain.Pretrain(filename, vec_filename, max_vocab=max_vocab)
+        pt = pretrain.Pretrain(filename, vec_filename, max_vocab=max_vocab, num_workers=num_workers)
     print("Pretrain is of size {}".format(len(pt.vocab)))
 
 if __name__ == '__main__':
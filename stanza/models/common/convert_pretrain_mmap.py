@@ -0,0 +1,30 @@
+"""
+A utility script to save a .pt pretrain as a directory which can be memory mapped
+
+Run it as follows:
+  python stanza/models/common/convert_pretrain_mmap.py <.pt file> <output directory>
+
+For example:
+  python3 stanza/models/common/convert_pretrain_mmap.py ~/stanza_resources/en/pretrain/combined.pt ~/stanza_resources/en/pretrain/combined.mmap
+
+The output directory can then be used in place of the .pt file, such as
+  stanza.Pipeline('en', processors='tokenize,pos', pos_pretrain_path='~/stanza_resources/en/pretrain/combined.mmap')
+Processes loading the same directory share one copy of the vectors.
+"""
+
+import os
+import sys
+
+from stanza.models.common import pretrain
+
+def main():
+    filename = sys.argv[1]
+    directory = sys.argv[2]
+    if not os.path.exists(filename):
+        raise FileNotFoundError("Pretrain file {} does not exist".format(filename))
+    pt = pretrain.Pretrain(filename)
+    pt.save_mmap(directory)
+    print("Pretrain of size {} saved to {}".format(len(pt.vocab), directory))
+
+if __name__ == '__main__':
+    main()
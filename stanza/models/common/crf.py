@@ -122,6 +122,45 @@ def viterbi_decode(scores, transition_params):
     viterbi_score = np.max(trellis[-1])
     return viterbi, viterbi_score
 
+def viterbi_decode_batch(scores, lengths, transition_params):
+    """
+    Decode the tag sequences of a whole batch at once with the viterbi algorithm.
+
+    Gives the same results as calling viterbi_decode on each sentence,
+    but each step is computed for the entire batch, on whatever device
+    the scores are on.
+    scores: batch_size x seq_len x num_tags (tensor)
+    lengths: the length of each sentence in the batch
+    transition_params: num_tags x num_tags (tensor)
+    @return:
+        viterbi: a list of lists of tag ids with highest score, one per sentence
+        viterbi_score: a list of the highest score of each sentence
+    """
+    batch_size, seq_len, _ = scores.shape
+    lengths = torch.as_tensor(lengths, device=scores.device)
+    transition_params = transition_params.to(scores.device).unsqueeze(0)
+
+    trellis = scores[:, 0]
+    backpointers = []
+    for t in range(1, seq_len):
+        v = trellis.unsqueeze(2) + transition_params
+        best, bp = torch.max(v, 1)
+        # sentences which have already ended keep their final trellis
+        trellis = torch.where((t < lengths).unsqueeze(1), scores[:, t] + best, trellis)
+        backpointers.append(bp)
+
+    viterbi_score, current = torch.max(trellis, 1)
+    viterbi = [current]
+    for t in range(seq_len - 1, 0, -1):
+        previous = backpointers[t-1].gather(1, current.unsqueeze(1)).squeeze(1)
+        # before the end of a sentence, follow the backpointers.  after it, stay on the last tag
+        current = torch.where(t < lengths, previous, current)
+        viterbi.append(current)
+    viterbi.reverse()
+    viterbi = torch.stack(viterbi, 1).tolist()
+    viterbi = [tags[:length] for tags, length in zip(viterbi, lengths.tolist())]
+    return viterbi, viterbi_score.tolist()
+
 def log_sum_exp(value, dim=None, keepdim=False):
     """Numerically stable implementation of the operation
     value.exp().sum(dim, keepdim).log()
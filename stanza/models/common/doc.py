@@ -153,20 +153,25 @@ class Document(StanzaObject):
         """ Set the list of entities in this document. """
         self._ents = value
 
+    def _build_sentence(self, sent_idx, tokens):
+        try:
+            return Sentence(tokens, doc=self)
+        except ValueError as e:
+            raise ValueError("Could not process document at sentence %d: %s" % (sent_idx, str(e))) from e
+
     def _process_sentences(self, sentences, comments=None):
         self.sentences = []
         for sent_idx, tokens in enumerate(sentences):
-            try:
-                sentence = Sentence(tokens, doc=self)
-            except ValueError as e:
-                raise ValueError("Could not process document at sentence %d: %s" % (sent_idx, str(e))) from e
+            sentence = self._build_sentence(sent_idx, tokens)
             self.sentences.append(sentence)
             begin_idx, end_idx = sentence.tokens[0].start_char, sentence.tokens[-1].end_char
             if all((self.text is not None, begin_idx is not None, end_idx is not None)): sentence.text = self.text[begin_idx: end_idx]
             sentence.index = sent_idx
 
         self._count_words()
+        self._process_comments(comments)
 
+    def _process_comments(self, comments):
         # Add a #text comment to each sentence in a doc if it doesn't already exist
         if not comments:
             comments = [[] for x in self.sentences]
@@ -412,31 +417,34 @@ class Sentence(StanzaObject):
 
     def _process_tokens(self, tokens):
         st, en = -1, -1
-        self.tokens, self.words = [], []
+        # local names for the lists, since this runs for every token of every document
+        sent_tokens, sent_words = [], []
+        self.tokens, self.words = sent_tokens, sent_words
         for i, entry in enumerate(tokens):
             if ID not in entry: # manually set a 1-based id for word if not exist
                 entry[ID] = (i+1, )
-            if isinstance(entry[ID], int):
-                entry[ID] = (entry[ID], )
-            m = (len(entry.get(ID)) > 1)
-            n = multi_word_token_misc.match(entry.get(MISC)) if entry.get(MISC, None) is not None else None
+            entry_id = entry[ID]
+            if isinstance(entry_id, int):
+                entry_id = entry[ID] = (entry_id, )
+            m = (len(entry_id) > 1)
+            misc = entry.get(MISC, None)
+            n = multi_word_token_misc.match(misc) if misc is not None else None
             if m or n: # if this token is a multi-word token
-                if m: st, en = entry[ID]
-                self.tokens.append(Token(entry))
+                if m: st, en = entry_id
+                sent_tokens.append(Token(entry))
             else: # else this token is a word
                 new_word = Word(entry)
-                self.words.append(new_word)
-                idx = entry.get(ID)[0]
-                if idx <= en:
-                    self.tokens[-1].words.append(new_word)
+                sent_words.append(new_word)
+                if entry_id[0] <= en:
+                    sent_tokens[-1].words.append(new_word)
                 else:
-                    self.tokens.append(Token(entry, words=[new_word]))
-                new_word.parent = self.tokens[-1]
+                    sent_tokens.append(Token(entry, words=[new_word]))
+                new_word.parent = sent_tokens[-1]
 
         # add back-pointers for words and tokens to the sentence
-        for w in self.words:
+        for w in sent_words:
             w.sent = self
-        for t in self.tokens:
+        for t in sent_tokens:
             t.sent = self
 
         self.rebuild_dependencies()
@@ -0,0 +1,127 @@
+"""
+Eisner's algorithm for the best projective dependency tree
+
+Uses the same scores as chuliu_edmonds: scores[i, j] is the score of
+word i having head j, with node 0 as the root.  The root is given
+exactly one dependent.
+
+The chart is filled one span width at a time, with every start
+position, split point, and sentence of a batch handled by a single
+numpy operation, so the python loop is O(N) instead of O(N^3).
+"""
+
+import numpy as np
+
+# directions of a span: headed by its last node or by its first node
+LEFT = 0
+RIGHT = 1
+
+def fill_chart(scores):
+    """
+    Fill the Eisner chart for a batch x N x N array of scores
+
+    complete[b, s, t, d] is the best span from s to t headed by t (LEFT)
+    or s (RIGHT) with nothing left to attach.  incomplete[b, s, t, d] is
+    the best span with an arc between s and t.  Spans only depend on the
+    nodes inside them, so the padding of shorter sentences does not
+    affect the spans they need.
+
+    Returns the charts and the best split point of each span
+    """
+    batch_size, max_len = scores.shape[0], scores.shape[1]
+    complete = np.full((batch_size, max_len, max_len, 2), -np.inf)
+    incomplete = np.full((batch_size, max_len, max_len, 2), -np.inf)
+    complete[:, np.arange(max_len), np.arange(max_len)] = 0
+    incomplete_split = np.zeros((batch_size, max_len, max_len), dtype=np.int64)
+    complete_split = np.zeros((batch_size, max_len, max_len, 2), dtype=np.int64)
+
+    for width in range(1, max_len):
+        # (M x 1) starts, (1 x width) offsets of the split point
+        start = np.arange(max_len - width)[:, None]
+        end = start + width
+        split = start + np.arange(width)[None, :]
+
+        # an arc between start and end, over [start, r] headed by start and [r+1, end] headed by end
+        span_scores = complete[:, start, split, RIGHT] + complete[:, split+1, end, LEFT]
+        best = np.argmax(span_scores, axis=2)
+        best_scores = np.take_along_axis(span_scores, best[:, :, None], axis=2)[:, :, 0]
+        incomplete_split[:, start[:, 0], end[:, 0]] = best + start[:, 0]
+        incomplete[:, start[:, 0], end[:, 0], LEFT] = best_scores + scores[:, start[:, 0], end[:, 0]]
+        incomplete[:, start[:, 0], end[:, 0], RIGHT] = best_scores + scores[:, end[:, 0], start[:, 0]]
+
+        # headed by end: [start, r] headed by r, then the arc from end to r
+        span_scores = complete[:, start, split, LEFT] + incomplete[:, split, end, LEFT]
+        best = np.argmax(span_scores, axis=2)
+        complete_split[:, start[:, 0], end[:, 0], LEFT] = best + start[:, 0]
+        complete[:, start[:, 0], end[:, 0], LEFT] = np.take_along_axis(span_scores, best[:, :, None], axis=2)[:, :, 0]
+
+        # headed by start: the arc from start to r, then [r, end] headed by r
+        span_scores = incomplete[:, start, split+1, RIGHT] + complete[:, split+1, end, RIGHT]
+        best = np.argmax(span_scores, axis=2)
+        complete_split[:, start[:, 0], end[:, 0], RIGHT] = best + start[:, 0] + 1
+        complete[:, start[:, 0], end[:, 0], RIGHT] = np.take_along_axis(span_scores, best[:, :, None], axis=2)[:, :, 0]
+
+    return complete, incomplete_split, complete_split
+
+def backtrack(root_child, length, incomplete_split, complete_split):
+    """
+    Read the tree for one sentence out of its split points
+
+    Uses an explicit stack rather than recursion, so long sentences do
+    not run into the python stack limit
+    """
+    tree = np.zeros(length, dtype=np.int64)
+    tree[root_child] = 0
+    # (is_complete, start, end, direction)
+    stack = [(True, 1, root_child, LEFT), (True, root_child, length - 1, RIGHT)]
+    while stack:
+        is_complete, start, end, direction = stack.pop()
+        if start == end:
+            continue
+        if is_complete:
+            split = complete_split[start, end, direction]
+            if direction == LEFT:
+                stack.append((True, start, split, LEFT))
+                stack.append((False, split, end, LEFT))
+            else:
+                stack.append((False, start, split, RIGHT))
+                stack.append((True, split, end, RIGHT))
+        else:
+            if direction == LEFT:
+                tree[start] = end
+            else:
+                tree[end] = start
+            split = incomplete_split[start, end]
+            stack.append((True, start, split, RIGHT))
+            stack.append((True, split + 1, end, LEFT))
+    return tree
+
+def eisner_batch(scores, lengths):
+    """
+    Find the best projective single-root tree for each of a padded batch of score matrices
+
+    scores: batch x N x N, where scores[b, i, j] is the score of word i having head j
+    lengths: the number of nodes in each sentence, counting the root
+
+    Returns a list of trees, one array of length lengths[b] per sentence
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    complete, incomplete_split, complete_split = fill_chart(scores)
+
+    trees = []
+    for idx, length in enumerate(lengths):
+        if length == 1:
+            trees.append(np.zeros(1, dtype=np.int64))
+            continue
+        # the root takes exactly one dependent r, which heads all of [1, length-1]
+        children = np.arange(1, length)
+        root_scores = scores[idx, children, 0] + complete[idx, 1, children, LEFT] + complete[idx, children, length-1, RIGHT]
+        root_child = children[np.argmax(root_scores)]
+        trees.append(backtrack(root_child, length, incomplete_split[idx], complete_split[idx]))
+    return trees
+
+def eisner(scores):
+    """
+    Find the best projective single-root tree for an N x N score matrix
+    """
+    return eisner_batch(scores[None, :, :], [scores.shape[0]])[0]
@@ -1,5 +1,9 @@
 """
 Keeps BERT, charlm, word embedings in a cache to save memory
+
+The cache can also keep the outputs of the charlms and transformers
+for each sentence, so that several processors using the same model
+only run it once on each sentence.  See ActivationCache
 """
 
 import logging
@@ -7,15 +11,78 @@ import threading
 
 from stanza.models.common import bert_embedding
 from stanza.models.common.char_model import CharacterLanguageModel
+from stanza.models.common.lru_cache import LRUCache
 from stanza.models.common.pretrain import Pretrain
 
 logger = logging.getLogger('stanza')
 
+def tensor_bytes(tensor):
+    return tensor.element_size() * tensor.nelement()
+
+class ActivationCache:
+    """
+    Keeps the output of a charlm or transformer for each sentence
+
+    The models loaded by a FoundationCache with activation_cache_mb
+    use this in CharacterLanguageModel.build_char_representation and
+    extract_bert_embeddings.  When the POS, NER, constituency, and
+    sentiment models of a pipeline share a charlm or a transformer,
+    the first to see a sentence runs the model on it, and the rest
+    reuse the result.
+
+    The results are kept on the device of the model.  When the results
+    go over the memory limit, the least recently used are dropped.
+    """
+    def __init__(self, max_bytes):
+        self.cache = LRUCache(max_bytes, sizeof=tensor_bytes)
+
+    def compute(self, model_key, sentences, compute):
+        """
+        Return the output of a model for each sentence in sentences
+
+        model_key: identifies the model and any options which change its output
+        sentences: a list of list of words
+        compute: runs the model on a list of sentences, returning one tensor per sentence.
+          Only called with the sentences which are not in the cache
+        """
+        keys = [(model_key, tuple(sentence)) for sentence in sentences]
+        results = [self.cache.get(key) for key in keys]
+        # a sentence repeated in the batch is only computed once
+        missing = {}
+        for idx, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                missing.setdefault(key, []).append(idx)
+        if missing:
+            computed = compute([sentences[indices[0]] for indices in missing.values()])
+            for (key, indices), result in zip(missing.items(), computed):
+                self.cache.put(key, result)
+                for idx in indices:
+                    results[idx] = result
+        return results
+
+    def stats(self):
+        """
+        Return a dict with the number of sentences kept, their total bytes, and the hits and misses of the cache
+        """
+        return self.cache.stats()
+
+    def clear(self):
+        self.cache.clear()
+
 class FoundationCache:
-    def __init__(self):
+    def __init__(self, activation_cache_mb=0):
+        """
+        activation_cache_mb: if more than 0, the charlms and transformers
+          loaded by this cache share their outputs for each sentence,
+          keeping up to this many megabytes of them.  See ActivationCache
+        """
         self.bert = {}
         self.charlms = {}
         self.pretrains = {}
+        if activation_cache_mb > 0:
+            self.activations = ActivationCache(int(activation_cache_mb * 1024 * 1024))
+        else:
+            self.activations = None
         # future proof the module by using a lock for the glorious day
         # when the GIL is finally gone
         self.lock = threading.Lock()
@@ -31,6 +98,8 @@ class FoundationCache:
         with self.lock:
             if transformer_name not in self.bert:
                 model, tokenizer = bert_embedding.load_bert(transformer_name)
+                if self.activations is not None:
+                    model.activation_cache = self.activations
                 self.bert[transformer_name] = (model, tokenizer)
             else:
                 logger.debug("Reusing bert %s", transformer_name)
@@ -44,7 +113,10 @@ class FoundationCache:
         with self.lock:
             if filename not in self.charlms:
                 logger.debug("Loading charlm from %s", filename)
-                self.charlms[filename] = CharacterLanguageModel.load(filename, finetune=False)
+                charlm = CharacterLanguageModel.load(filename, finetune=False)
+                if self.activations is not None:
+                    charlm.activation_cache = self.activations
+                self.charlms[filename] = charlm
             else:
                 logger.debug("Reusing charlm from %s", filename)
 
@@ -0,0 +1,113 @@
+"""
+A bounded cache which evicts the least recently used entries
+
+Used by processors to remember model outputs across documents
+"""
+
+from collections import OrderedDict
+import threading
+
+class LRUCache:
+    def __init__(self, max_size, sizeof=None):
+        """
+        max_size: the most entries to keep.  0 keeps nothing
+        sizeof: if given, a function returning the size of a value,
+          such as its bytes.  max_size is then the most total size to keep
+        """
+        if max_size < 0:
+            raise ValueError("LRUCache size must be non-negative, got %d" % max_size)
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.total_size = 0
+        # OrderedDict with the most recently used entry at the end
+        self._entries = OrderedDict()
+        # the size of each entry, when sizeof is given
+        self._sizes = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the value for key, or default if it is not in the cache
+
+        Counts a hit or a miss and marks the key as recently used
+        """
+        with self.lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """
+        Add or replace the value for key, evicting the least recently used entries if the cache is full
+
+        A value larger than the whole cache is not kept
+        """
+        with self.lock:
+            if self.max_size == 0:
+                return
+            if self.sizeof is None:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                return
+
+            if key in self._entries:
+                del self._entries[key]
+                self.total_size -= self._sizes.pop(key)
+            size = self.sizeof(value)
+            if size > self.max_size:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.total_size += size
+            while self.total_size > self.max_size:
+                old_key, _ = self._entries.popitem(last=False)
+                self.total_size -= self._sizes.pop(old_key)
+
+    def clear(self):
+        """
+        Remove all of the entries and reset the statistics
+        """
+        with self.lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def items(self):
+        """
+        Return a list of (key, value), from the least to the most recently used
+
+        Putting the items into another cache in this order keeps the same order of eviction
+        """
+        with self.lock:
+            return list(self._entries.items())
+
+    def stats(self):
+        """
+        Return a dict with the size, hits, misses, and hit rate of the cache
+
+        With sizeof, total_size is the size of all of the values
+        """
+        lookups = self.hits + self.misses
+        stats = {'size': len(self._entries),
+                 'max_size': self.max_size,
+                 'hits': self.hits,
+                 'misses': self.misses,
+                 'hit_rate': self.hits / lookups if lookups > 0 else 0.0}
+        if self.sizeof is not None:
+            stats['total_size'] = self.total_size
+        return stats
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
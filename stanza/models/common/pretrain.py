@@ -2,6 +2,11 @@
 Supports for pretrained data.
 """
 import csv
+from functools import partial
+import io
+import itertools
+import json
+import multiprocessing
 import os
 import re
 
@@ -17,6 +22,101 @@ from stanza.resources.common import DEFAULT_MODEL_DIR
 
 logger = logging.getLogger('stanza')
 
+# files in a memory mapped pretrain directory.  see Pretrain.save_mmap
+MMAP_EMB_FILE = 'emb.npy'
+MMAP_VOCAB_FILE = 'vocab.txt'
+
+# some vector files, such as Google News, use tabs
+VECTOR_SEPARATOR = re.compile(r"[ \t]+")
+# lines of a vector file parsed at once by read_from_file
+READ_CHUNK_LINES = 20000
+# how often read_from_file reports its progress
+READ_PROGRESS_LINES = 500000
+
+def parse_vector_rows(rows, cols):
+    """
+    Convert the text of several vectors, each with values separated by single spaces, to a float32 matrix
+
+    np.loadtxt parses the whole block in C.  Values are read as float64
+    and then rounded, so the result is the same as calling float() on
+    each value.  Anything loadtxt does not handle, such as the
+    underscores which float() allows, falls back to float()
+    """
+    emb = np.zeros((len(rows), cols), dtype=np.float32)
+    if not rows:
+        return emb
+    try:
+        values = np.loadtxt(io.StringIO("\n".join(rows)), dtype=np.float64, delimiter=' ', comments=None, ndmin=2)
+    except ValueError:
+        values = None
+    if values is not None and values.shape == emb.shape:
+        emb[:] = values
+    else:
+        for i, row in enumerate(rows):
+            emb[i] = [float(x) for x in row.split(' ')]
+    return emb
+
+def parse_vector_chunk(chunk, cols):
+    """
+    Parse a list of raw lines from a vector file with cols dimensions
+
+    Lines are split the same way as in Pretrain.read_from_file_by_line,
+    but most lines are separated into the word and the vector with a
+    single str.partition instead of splitting every value.
+
+    Returns words, emb, unk_lines, failed, exact
+      emb is None if some line has fewer than cols values or a value is not a number
+      unk_lines are the split <unk> lines, in order
+      failed is the number of lines which could not be decoded
+      exact is whether any word had exactly cols values
+    """
+    words = []
+    rows = []
+    unk_lines = []
+    failed = 0
+    exact = False
+    for line in chunk:
+        try:
+            line = line.decode()
+        except UnicodeDecodeError:
+            failed += 1
+            continue
+        line = line.rstrip()
+        if not line:
+            continue
+        if line.startswith('<unk>'):
+            pieces = VECTOR_SEPARATOR.split(line)
+            if pieces[0] == '<unk>':
+                unk_lines.append(pieces)
+                continue
+        if '\t' in line or '  ' in line or line[0] == ' ':
+            pieces = VECTOR_SEPARATOR.split(line)
+            if len(pieces) <= cols:
+                return words, None, unk_lines, failed, exact
+            exact = exact or len(pieces) == cols + 1
+            words.append('\xa0'.join(pieces[:-cols]))
+            rows.append(' '.join(pieces[-cols:]))
+            continue
+        word, _, row = line.partition(' ')
+        extra = row.count(' ') + 1 - cols if row else -cols
+        if extra < 0:
+            return words, None, unk_lines, failed, exact
+        if extra > 0:
+            # the word has spaces in it.  rejoin them with nbsp
+            word = line.rsplit(' ', cols)[0]
+            row = line[len(word)+1:]
+            word = word.replace(' ', '\xa0')
+        else:
+            exact = True
+        words.append(word)
+        rows.append(row)
+    try:
+        emb = parse_vector_rows(rows, cols)
+    except ValueError:
+        # a value which is not a number, possibly from guessing the wrong dimensionality
+        emb = None
+    return words, emb, unk_lines, failed, exact
+
 class PretrainedWordVocab(BaseVocab):
     def build_vocab(self):
         self._id2unit = VOCAB_PREFIX + self.data
@@ -31,12 +131,16 @@ class PretrainedWordVocab(BaseVocab):
 class Pretrain:
     """ A loader and saver for pretrained embeddings. """
 
-    def __init__(self, filename=None, vec_filename=None, max_vocab=-1, save_to_file=True, csv_filename=None):
+    def __init__(self, filename=None, vec_filename=None, max_vocab=-1, save_to_file=True, csv_filename=None, num_workers=1):
+        """
+        num_workers: processes used to parse vec_filename, if the .pt file needs to be built from it
+        """
         self.filename = filename
         self._vec_filename = vec_filename
         self._csv_filename = csv_filename
         self._max_vocab = max_vocab
         self._save_to_file = save_to_file
+        self._num_workers = num_workers
 
     @property
     def vocab(self):
@@ -51,6 +155,9 @@ class Pretrain:
         return self._emb
 
     def load(self):
+        if self.filename is not None and os.path.isdir(self.filename):
+            self._vocab, self._emb = self.load_mmap(self.filename)
+            return
         if self.filename is not None and os.path.exists(self.filename):
             try:
                 data = torch.load(self.filename, lambda storage, loc: storage)
@@ -95,6 +202,49 @@ class Pretrain:
         except BaseException as e:
             logger.warning("Saving pretrained data failed due to the following exception... continuing anyway.\n\t{}".format(e))
 
+    @staticmethod
+    def load_mmap(directory):
+        """
+        Load a pretrain written by save_mmap
+
+        The embedding is memory mapped copy-on-write rather than read
+        into memory, so loading is nearly instant, only the rows which
+        are used are read from disk, and every process using the same
+        directory shares one copy of it through the page cache.
+        """
+        with open(os.path.join(directory, MMAP_VOCAB_FILE), encoding="utf-8") as fin:
+            state = json.loads(fin.readline())
+            words = fin.read().split("\n")
+        state['_id2unit'] = words
+        state['_unit2id'] = {w:i for i, w in enumerate(words)}
+        vocab = PretrainedWordVocab.load_state_dict(state)
+        emb = np.load(os.path.join(directory, MMAP_EMB_FILE), mmap_mode='c')
+        if emb.shape[0] != len(words):
+            raise RuntimeError("Pretrain directory {} has {} vectors but {} words".format(directory, emb.shape[0], len(words)))
+        logger.debug("Memory mapped pretrain from {}".format(directory))
+        return vocab, emb
+
+    def save_mmap(self, directory):
+        """
+        Save the pretrain as a directory which can be memory mapped
+
+        The directory has the embedding as a .npy matrix and the vocab
+        as a text file with one word per line, after a line of json
+        with the rest of the vocab settings.  Use the directory as the
+        filename of a Pretrain, or as a pretrain_path in a Pipeline, to
+        load it with load_mmap.
+        """
+        words = self.vocab._id2unit
+        if any("\n" in word for word in words):
+            raise ValueError("Cannot save a pretrain with newlines in its words to {}".format(directory))
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, MMAP_EMB_FILE), np.ascontiguousarray(self.emb))
+        state = {attr: getattr(self.vocab, attr) for attr in ('lang', 'idx', 'cutoff', 'lower')}
+        with open(os.path.join(directory, MMAP_VOCAB_FILE), "w", encoding="utf-8") as fout:
+            fout.write(json.dumps(state))
+            fout.write("\n")
+            fout.write("\n".join(words))
+        logger.info("Saved memory mapped pretrained vocab and vectors to {}".format(directory))
 
     def write_text(self, filename):
         """
@@ -112,7 +262,7 @@ class Pretrain:
     def read_pretrain(self):
         # load from pretrained filename
         if self._vec_filename is not None:
-            words, emb, failed = self.read_from_file(self._vec_filename)
+            words, emb, failed = self.read_from_file(self._vec_filename, self._num_workers)
         elif self._csv_filename is not None:
             words, emb = self.read_from_csv(self._csv_filename)
         else:
@@ -150,20 +300,112 @@ class Pretrain:
         cols = len(lines[0]) - 1
 
         emb = np.zeros((rows + len(VOCAB_PREFIX), cols), dtype=np.float32)
-        for i, line in enumerate(lines):
-            emb[i+len(VOCAB_PREFIX)] = [float(x) for x in line[-cols:]]
+        try:
+            emb[len(VOCAB_PREFIX):] = np.array([line[-cols:] for line in lines], dtype=np.float64)
+        except ValueError:
+            # rows of different lengths, or values numpy can't parse
+            for i, line in enumerate(lines):
+                emb[i+len(VOCAB_PREFIX)] = [float(x) for x in line[-cols:]]
         words = [line[0].replace(' ', '\xa0') for line in lines]
         return words, emb
 
     @staticmethod
-    def read_from_file(filename):
+    def read_from_file(filename, num_workers=1):
         """
-        Open a vector file using the provided function and read from it.
+        Read a word vector file in chunks, parsing each chunk of vectors at once
+
+        gz, xz, and zip files are decompressed as they are read.  With
+        num_workers > 1, the chunks are parsed by that many processes.
+
+        The result is the same as read_from_file_by_line.  The number of
+        dimensions comes from the header line or, if there is no header,
+        from the first vector.  In the rare case that a later vector has
+        fewer dimensions or can't be parsed, the file is read again with
+        read_from_file_by_line
         """
         logger.info("Reading pretrained vectors from %s...", filename)
 
-        # some vector files, such as Google News, use tabs
-        tab_space_pattern = re.compile(r"[ \t]+")
+        failed = 0
+        cols = None
+        header = False
+        with open_read_binary(filename) as f:
+            first_lines = []
+            for line in f:
+                try:
+                    text = line.decode().rstrip()
+                except UnicodeDecodeError:
+                    failed += 1
+                    continue
+                if not text:
+                    continue
+                pieces = VECTOR_SEPARATOR.split(text)
+                if len(pieces) == 2:
+                    # the first line contains the number of word vectors and the dimensionality
+                    cols = int(pieces[1])
+                    header = True
+                else:
+                    # otherwise, guess the dimensionality from the first vector
+                    cols = len(pieces) - 1
+                    first_lines.append(line)
+                break
+
+            if cols is None or cols < 1:
+                return Pretrain.read_from_file_by_line(filename)
+
+            chunks = itertools.chain([first_lines], iter(lambda: list(itertools.islice(f, READ_CHUNK_LINES)), []))
+            words = []
+            blocks = []
+            unk_line = None
+            exact = False
+            if num_workers > 1:
+                pool = multiprocessing.Pool(num_workers)
+                results = pool.imap(partial(parse_vector_chunk, cols=cols), chunks)
+            else:
+                pool = None
+                results = (parse_vector_chunk(chunk, cols) for chunk in chunks)
+            try:
+                for chunk_words, chunk_emb, chunk_unk_lines, chunk_failed, chunk_exact in results:
+                    if chunk_emb is None:
+                        logger.debug("Could not read a vector with %d dimensions.  Reading %s again one line at a time", cols, filename)
+                        return Pretrain.read_from_file_by_line(filename)
+                    for pieces in chunk_unk_lines:
+                        if unk_line is not None:
+                            logger.error("More than one <unk> line in the pretrain!  Keeping the most recent one")
+                        else:
+                            logger.debug("Found an unk line while reading the pretrain")
+                        unk_line = pieces
+                    if len(words) // READ_PROGRESS_LINES != (len(words) + len(chunk_words)) // READ_PROGRESS_LINES:
+                        logger.info("Read %d vectors from %s", len(words) + len(chunk_words), filename)
+                    words.extend(chunk_words)
+                    blocks.append(chunk_emb)
+                    failed += chunk_failed
+                    exact = exact or chunk_exact
+            finally:
+                if pool is not None:
+                    pool.terminate()
+
+        if not header and not exact:
+            # every vector had more pieces than the first one.  not a format we can guess
+            return Pretrain.read_from_file_by_line(filename)
+
+        emb = np.zeros((len(words) + len(VOCAB_PREFIX), cols), dtype=np.float32)
+        if unk_line is not None:
+            emb[UNK_ID] = [float(x) for x in unk_line[-cols:]]
+        if blocks:
+            np.concatenate(blocks, out=emb[len(VOCAB_PREFIX):])
+        if failed > 0:
+            logger.info("Failed to read %d lines from embedding", failed)
+        return words, emb, failed
+
+    @staticmethod
+    def read_from_file_by_line(filename):
+        """
+        Open a vector file using the provided function and read from it one line at a time
+
+        This is much slower than read_from_file, but can figure out the
+        dimensionality of files with no header and words with spaces
+        """
+        tab_space_pattern = VECTOR_SEPARATOR
         first = True
         cols = None
         lines = []
@@ -11,7 +11,6 @@ import numpy as np
 import stanza.models.common.seq2seq_constant as constant
 from stanza.models.common import utils
 from stanza.models.common.seq2seq_modules import LSTMAttention
-from stanza.models.common.beam import Beam
 
 logger = logging.getLogger('stanza')
 
@@ -222,25 +221,32 @@ class Seq2SeqModel(nn.Module):
         dec_inputs = self.embedding(self.SOS_tensor)
         dec_inputs = dec_inputs.expand(batch_size, dec_inputs.size(0), dec_inputs.size(1))
 
-        done = [False for _ in range(batch_size)]
-        total_done = 0
-        max_len = 0
-        output_seqs = [[] for _ in range(batch_size)]
+        # the predictions are written to a tensor prefilled with EOS,
+        # so each output sequence ends at its first EOS.  rows which
+        # produced an EOS are dropped from the rest of the decoding
+        outputs = src.new_full((batch_size, self.max_dec_len), constant.EOS_ID)
+        active = torch.arange(batch_size, device=src.device)
 
-        while total_done < batch_size and max_len < self.max_dec_len:
+        for step in range(self.max_dec_len):
             log_probs, (hn, cn) = self.decode(dec_inputs, hn, cn, h_in, src_mask, src=src)
             assert log_probs.size(1) == 1, "Output must have 1-step of output."
-            _, preds = log_probs.squeeze(1).max(1, keepdim=True)
-            dec_inputs = self.embedding(preds) # update decoder inputs
-            max_len += 1
-            for i in range(batch_size):
-                if not done[i]:
-                    token = preds.data[i][0].item()
-                    if token == constant.EOS_ID:
-                        done[i] = True
-                        total_done += 1
-                    else:
-                        output_seqs[i].append(token)
+            _, preds = log_probs.squeeze(1).max(1)
+            outputs[active, step] = preds
+
+            unfinished = preds != constant.EOS_ID
+            if not unfinished.all():
+                keep = unfinished.nonzero().squeeze(1)
+                if len(keep) == 0:
+                    break
+                active, preds = active[keep], preds[keep]
+                hn, cn, h_in, src_mask, src = hn[keep], cn[keep], h_in[keep], src_mask[keep], src[keep]
+            dec_inputs = self.embedding(preds).unsqueeze(1) # update decoder inputs
+
+        output_seqs = []
+        for seq in outputs.tolist():
+            if constant.EOS_ID in seq:
+                seq = seq[:seq.index(constant.EOS_ID)]
+            output_seqs.append(seq)
         return output_seqs, edit_logits
 
     def predict(self, src, src_mask, pos=None, beam_size=5):
@@ -267,51 +273,84 @@ class Seq2SeqModel(nn.Module):
             edit_logits = None
 
         # (2) set up beam
+        # the hypotheses are laid out beam major, so with A items still
+        # decoding, row k * A + b of the decoder state is hypothesis k of item b
         with torch.no_grad():
             h_in = h_in.data.repeat(beam_size, 1, 1) # repeat data for beam search
             src_mask = src_mask.repeat(beam_size, 1)
             # repeat decoder hidden states
             hn = hn.data.repeat(beam_size, 1)
             cn = cn.data.repeat(beam_size, 1)
-        beam = [Beam(beam_size, self.use_cuda) for _ in range(batch_size)]
 
-        def update_state(states, idx, positions, beam_size):
-            """ Select the states according to back pointers. """
-            for e in states:
-                br, d = e.size()
-                s = e.contiguous().view(beam_size, br // beam_size, d)[:,idx]
-                s.data.copy_(s.data.index_select(0, positions))
+        # the tokens and back pointers chosen at each step, batch x beam
+        # only the rows which were still decoding at that step are filled in
+        all_tokens = []
+        all_origins = []
+        # the number of steps each item was decoded for
+        num_steps = src.new_zeros(batch_size)
+        scores = h_in.new_zeros(batch_size, beam_size)
+        tokens = src.new_full((batch_size, beam_size), constant.PAD_ID)
+        tokens[:, 0] = constant.SOS_ID
+        # indices of the items which are still decoding
+        active = torch.arange(batch_size, device=src.device)
 
         # (3) main loop
         for i in range(self.max_dec_len):
-            dec_inputs = torch.stack([b.get_current_state() for b in beam]).t().contiguous().view(-1, 1)
-            dec_inputs = self.embedding(dec_inputs)
+            num_active = len(active)
+            dec_inputs = self.embedding(tokens.t().reshape(-1, 1))
+            # as src is not repeated, the copy mechanism only applies to
+            # the first hypothesis of each item.  this matches the
+            # original one beam at a time implementation
             log_probs, (hn, cn) = self.decode(dec_inputs, hn, cn, h_in, src_mask, src=src)
-            log_probs = log_probs.view(beam_size, batch_size, -1).transpose(0,1)\
-                    .contiguous() # [batch, beam, V]
-
-            # advance each beam
-            done = []
-            for b in range(batch_size):
-                is_done = beam[b].advance(log_probs.data[b])
-                if is_done:
-                    done += [b]
-                # update beam state
-                update_state((hn, cn), b, beam[b].get_current_origin(), beam_size)
-
-            if len(done) == batch_size:
-                break
+            log_probs = log_probs.view(beam_size, num_active, -1).transpose(0, 1).contiguous() # [batch, beam, V]
+            num_words = log_probs.size(2)
+
+            if i == 0:
+                # first step, expand from the first position
+                beam_scores = log_probs[:, 0]
+            else:
+                beam_scores = (log_probs + scores[active].unsqueeze(2)).view(num_active, -1)
+            best_scores, best_ids = beam_scores.topk(beam_size, 1, True, True)
+            origins = torch.div(best_ids, num_words, rounding_mode='trunc')
+            tokens = best_ids - origins * num_words
+
+            step_tokens = src.new_zeros(batch_size, beam_size)
+            step_tokens[active] = tokens
+            all_tokens.append(step_tokens)
+            step_origins = src.new_zeros(batch_size, beam_size)
+            step_origins[active] = origins
+            all_origins.append(step_origins)
+            scores[active] = best_scores
+            num_steps[active] += 1
+
+            # select the states according to back pointers
+            batch_idx = torch.arange(num_active, device=src.device)
+            hn = hn.view(beam_size, num_active, -1)[origins.t(), batch_idx].reshape(beam_size * num_active, -1)
+            cn = cn.view(beam_size, num_active, -1)[origins.t(), batch_idx].reshape(beam_size * num_active, -1)
+
+            # an item is done once the top of its beam is EOS
+            unfinished = tokens[:, 0] != constant.EOS_ID
+            if not unfinished.all():
+                keep = unfinished.nonzero().squeeze(1)
+                if len(keep) == 0:
+                    break
+                num_active = len(keep)
+                active, tokens, src = active[keep], tokens[keep], src[keep]
+                hn = hn.view(beam_size, -1, hn.size(1))[:, keep].reshape(beam_size * num_active, -1)
+                cn = cn.view(beam_size, -1, cn.size(1))[:, keep].reshape(beam_size * num_active, -1)
+                h_in = h_in.view(beam_size, -1, h_in.size(1), h_in.size(2))[:, keep].reshape(beam_size * num_active, h_in.size(1), h_in.size(2))
+                src_mask = src_mask.view(beam_size, -1, src_mask.size(1))[:, keep].reshape(beam_size * num_active, -1)
 
         # back trace and find hypothesis
-        all_hyp, all_scores = [], []
-        for b in range(batch_size):
-            scores, ks = beam[b].sort_best()
-            all_scores += [scores[0]]
-            k = ks[0]
-            hyp = beam[b].get_hyp(k)
-            hyp = utils.prune_hyp(hyp)
-            hyp = [i.item() for i in hyp]
-            all_hyp += [hyp]
+        _, best = torch.sort(scores, 1, True)
+        k = best[:, 0]
+        hyps = src.new_zeros(batch_size, len(all_tokens))
+        for j in range(len(all_tokens) - 1, -1, -1):
+            hyps[:, j] = all_tokens[j].gather(1, k.unsqueeze(1)).squeeze(1)
+            prev_k = all_origins[j].gather(1, k.unsqueeze(1)).squeeze(1)
+            k = torch.where(j < num_steps, prev_k, k)
+
+        all_hyp = [utils.prune_hyp(hyp[:length]) for hyp, length in zip(hyps.tolist(), num_steps.tolist())]
 
         return all_hyp, edit_logits
 
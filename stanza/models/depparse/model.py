@@ -134,7 +134,6 @@ class Parser(nn.Module):
         lstm_outputs, _ = pad_packed_sequence(lstm_outputs, batch_first=True)
 
         unlabeled_scores = self.unlabeled(self.drop(lstm_outputs), self.drop(lstm_outputs)).squeeze(3)
-        deprel_scores = self.deprel(self.drop(lstm_outputs), self.drop(lstm_outputs))
 
         #goldmask = head.new_zeros(*head.size(), head.size(-1)+1, dtype=torch.uint8)
         #goldmask.scatter_(2, head.unsqueeze(2), 1)
@@ -164,6 +163,7 @@ class Parser(nn.Module):
             unlabeled_target = head.masked_fill(word_mask[:, 1:], -1)
             loss = self.crit(unlabeled_scores.contiguous().view(-1, unlabeled_scores.size(2)), unlabeled_target.view(-1))
 
+            deprel_scores = self.deprel(self.drop(lstm_outputs), self.drop(lstm_outputs))
             deprel_scores = deprel_scores[:, 1:] # exclude attachment for the root symbol
             #deprel_scores = deprel_scores.masked_select(goldmask.unsqueeze(3)).view(-1, len(self.vocab['deprel']))
             deprel_scores = torch.gather(deprel_scores, 2, head.unsqueeze(2).unsqueeze(3).expand(-1, -1, -1, len(self.vocab['deprel']))).view(-1, len(self.vocab['deprel']))
@@ -187,6 +187,24 @@ class Parser(nn.Module):
         else:
             loss = 0
             preds.append(F.log_softmax(unlabeled_scores, 2).detach().cpu().numpy())
-            preds.append(deprel_scores.max(3)[1].detach().cpu().numpy())
+            # the labels are only scored once the heads are chosen.  see predict_deprels
+            preds.append(lstm_outputs.detach())
 
         return loss, preds
+
+    def predict_deprels(self, lstm_outputs, heads):
+        """
+        Choose the dependency label of each word for the given head
+
+        lstm_outputs: the second prediction returned by forward() at eval time
+        heads: batch x N-1 head of each word, not counting the root
+
+        Only the (word, head) pairs are scored, rather than every pair
+        of words, so this needs O(N x deprels) memory instead of O(N^2 x deprels)
+
+        Returns batch x N-1 deprel ids
+        """
+        # the root is not given a label, so it is paired with itself
+        index = torch.cat([heads.new_zeros(heads.size(0), 1), heads], dim=1)
+        deprel_scores = self.deprel.forward_pairs(self.drop(lstm_outputs), self.drop(lstm_outputs), index)
+        return deprel_scores[:, 1:].max(2)[1]
@@ -9,7 +9,8 @@ from torch import nn
 
 from stanza.models.common.trainer import Trainer as BaseTrainer
 from stanza.models.common import utils, loss
-from stanza.models.common.chuliu_edmonds import chuliu_edmonds_one_root
+from stanza.models.common.chuliu_edmonds import chuliu_edmonds_one_root_batch
+from stanza.models.common.eisner import eisner_batch
 from stanza.models.depparse.model import Parser
 from stanza.models.pos.vocab import MultiVocab
 
@@ -72,8 +73,17 @@ class Trainer(BaseTrainer):
         self.model.eval()
         batch_size = word.size(0)
         _, preds = self.model(word, word_mask, wordchars, wordchars_mask, upos, xpos, ufeats, pretrained, lemma, head, deprel, word_orig_idx, sentlens, wordlens)
-        head_seqs = [chuliu_edmonds_one_root(adj[:l, :l])[1:] for adj, l in zip(preds[0], sentlens)] # remove attachment for the root
-        deprel_seqs = [self.vocab['deprel'].unmap([preds[1][i][j+1][h] for j, h in enumerate(hs)]) for i, hs in enumerate(head_seqs)]
+        if self.args.get('decoder', 'mst') == 'eisner':
+            trees = eisner_batch(preds[0], sentlens)
+        else:
+            trees = chuliu_edmonds_one_root_batch(preds[0], sentlens)
+        head_seqs = [tree[1:] for tree in trees] # remove attachment for the root
+        # score the labels only for the chosen heads
+        heads = torch.zeros(batch_size, preds[1].size(1) - 1, dtype=torch.long, device=preds[1].device)
+        for i, hs in enumerate(head_seqs):
+            heads[i, :len(hs)] = torch.from_numpy(hs)
+        deprel_ids = self.model.predict_deprels(preds[1], heads).cpu().numpy()
+        deprel_seqs = [self.vocab['deprel'].unmap(deprel_ids[i][:len(hs)]) for i, hs in enumerate(head_seqs)]
 
         pred_tokens = [[[str(head_seqs[i][j]), deprel_seqs[i][j]] for j in range(sentlens[i]-1)] for i in range(batch_size)]
         if unsort:
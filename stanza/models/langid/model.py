@@ -1,5 +1,6 @@
 import torch
 import torch.nn as nn
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
 
 
 class LangIDBiLSTM(nn.Module):
@@ -71,23 +72,39 @@ class LangIDBiLSTM(nn.Module):
     def loss(self, Y_hat, Y):
         return self.loss_train(Y_hat, Y)
 
-    def forward(self, x):
+    def forward(self, x, lengths=None):
+        """
+        x: batch of char indices.  If lengths is given, the sequences are
+        padded and only the first lengths[i] characters of row i are used
+        """
         # embed input
         x = self.char_embeds(x)
-        
-        # run through LSTM
-        x, _ = self.lstm(x)
-        
+
+        if lengths is None:
+            # run through LSTM
+            x, _ = self.lstm(x)
+        else:
+            # pack the batch so the padding doesn't affect the LSTM
+            total_length = x.shape[1]
+            x = pack_padded_sequence(x, lengths.clamp(min=1).cpu(), batch_first=True, enforce_sorted=False)
+            x, _ = self.lstm(x)
+            x, _ = pad_packed_sequence(x, batch_first=True, total_length=total_length)
+
         # run through linear layer
         x = self.hidden_to_tag(x)
-        
+
+        if lengths is not None:
+            # the padding positions would otherwise add the bias of the linear layer to the sum
+            mask = torch.arange(x.shape[1], device=x.device).unsqueeze(0) < lengths.to(x.device).unsqueeze(1)
+            x = x * mask.unsqueeze(2)
+
         # sum character outputs for each sequence
         x = torch.sum(x, dim=1)
 
         return x
 
-    def prediction_scores(self, x):
-        prediction_probs = self(x)
+    def prediction_scores(self, x, lengths=None):
+        prediction_probs = self(x, lengths)
         if self.lang_subset:
             prediction_batch_size = prediction_probs.size()[0]
             batch_mask = torch.stack([self.lang_mask for _ in range(prediction_batch_size)])
@@ -100,7 +100,13 @@ class DataLoader:
             yield self.__getitem__(i)
 
     def load_doc(self, doc, evaluation=False):
-        data = doc.get_mwt_expansions(evaluation)
+        """
+        doc can also be a list of the tokens to expand, such as the distinct tokens of a document
+        """
+        if isinstance(doc, Document):
+            data = doc.get_mwt_expansions(evaluation)
+        else:
+            data = list(doc)
         if evaluation: data = [[e] for e in data]
         return data
 
@@ -110,6 +110,10 @@ class Trainer(BaseTrainer):
                 expansions += [w]
         return expansions
 
+    def skip_seq2seq(self, words):
+        """ Determine which words can skip the seq2seq model because the dict will expand them when ensembling. """
+        return [w in self.expansion_dict or w.lower() in self.expansion_dict for w in words]
+
     def ensemble(self, cands, other_preds):
         """ Ensemble the dict with statistical model predictions. """
         expansions = []
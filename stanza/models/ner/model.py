@@ -10,14 +10,23 @@ from stanza.models.common.data import map_to_ids, get_long_tensor
 
 from stanza.models.common.packed_lstm import PackedLSTM
 from stanza.models.common.dropout import WordDropout, LockedDropout
-from stanza.models.common.char_model import CharacterModel, CharacterLanguageModel
+from stanza.models.common.char_model import CharacterModel
 from stanza.models.common.crf import CRFLoss
 from stanza.models.common.vocab import PAD_ID, UNK_ID
 from stanza.models.common.bert_embedding import extract_bert_embeddings
+from stanza.models.common.foundation_cache import load_charlm
 logger = logging.getLogger('stanza')
 
+def same_inputs(inputs, other):
+    """
+    Compare two tuples of module inputs, which may include tensors
+    """
+    if len(inputs) != len(other):
+        return False
+    return all(torch.equal(x, y) if torch.is_tensor(x) else x == y for x, y in zip(inputs, other))
+
 class NERTagger(nn.Module):
-    def __init__(self, args, vocab, emb_matrix=None, bert_model=None, bert_tokenizer=None, use_cuda=False):
+    def __init__(self, args, vocab, emb_matrix=None, bert_model=None, bert_tokenizer=None, use_cuda=False, foundation_cache=None):
         super().__init__()
 
         self.use_cuda = use_cuda
@@ -79,9 +88,15 @@ class NERTagger(nn.Module):
                     raise FileNotFoundError('Could not find forward character model: {}  Please specify with --charlm_forward_file'.format(args['charlm_forward_file']))
                 if args['charlm_backward_file'] is None or not os.path.exists(args['charlm_backward_file']):
                     raise FileNotFoundError('Could not find backward character model: {}  Please specify with --charlm_backward_file'.format(args['charlm_backward_file']))
-                add_unsaved_module('charmodel_forward', CharacterLanguageModel.load(args['charlm_forward_file'], finetune=False))
-                add_unsaved_module('charmodel_backward', CharacterLanguageModel.load(args['charlm_backward_file'], finetune=False))
+                add_unsaved_module('charmodel_forward', load_charlm(args['charlm_forward_file'], foundation_cache))
+                add_unsaved_module('charmodel_backward', load_charlm(args['charlm_backward_file'], foundation_cache))
                 input_size += self.charmodel_forward.hidden_dim() + self.charmodel_backward.hidden_dim()
+                # if the characters are numbered the same way as in the charlm,
+                # the charlm outputs can come from build_char_representation,
+                # which shares them with the other models using this charlm
+                charlm_vocab = self.charmodel_forward.char_vocab()
+                self.charlm_same_vocab = (vocab['char']._unit2id == charlm_vocab._unit2id and
+                                          getattr(vocab['char'], 'lower', False) == getattr(charlm_vocab, 'lower', False))
             else:
                 self.charmodel = CharacterModel(args, vocab, bidirectional=True, attention=False)
                 input_size += self.args['char_hidden_dim'] * 2
@@ -121,23 +136,44 @@ class NERTagger(nn.Module):
             "Input embedding matrix must match size: {} x {}, found {}".format(vocab_size, dim, emb_matrix.size())
         self.word_emb.weight.data.copy_(emb_matrix)
 
-    def forward(self, sentences, wordchars, wordchars_mask, tags, word_orig_idx, sentlens, wordlens, chars, charoffsets, charlens, char_orig_idx):
-        
+    def forward(self, sentences, wordchars, wordchars_mask, tags, word_orig_idx, sentlens, wordlens, chars, charoffsets, charlens, char_orig_idx, cache=None):
+        """
+        cache: an optional dict shared by several models predicting the same batch
+
+        Outputs of the modules which the models have in common, such as
+        the charlm, the transformer, or a word embedding tied by the
+        NERProcessor, are computed by the first model and reused by the
+        rest.  Each entry keeps its inputs, so a cache built from a
+        different batch is never used by mistake.
+        """
         def pack(x):
             return pack_padded_sequence(x, sentlens, batch_first=True)
-        
+
+        def cached(key, inputs, compute):
+            if cache is None:
+                return compute()
+            if key in cache and same_inputs(cache[key][0], inputs):
+                return cache[key][1]
+            result = compute()
+            cache[key] = (inputs, result)
+            return result
+
         inputs = []
         batch_size = len(sentences)
 
         if self.args['word_emb_dim'] > 0:
-            #extract static embeddings
-            static_words, word_mask = self.extract_static_embeddings(self.args, sentences, self.vocab['word'])
+            def static_embeddings():
+                #extract static embeddings
+                static_words, word_mask = self.extract_static_embeddings(self.args, sentences, self.vocab['word'])
+
+                if self.use_cuda:
+                    word_mask = word_mask.cuda()
+                    static_words = static_words.cuda()
 
-            if self.use_cuda:
-                word_mask = word_mask.cuda()
-                static_words = static_words.cuda()
-                
-            word_static_emb = self.word_emb(static_words)
+                return static_words, word_mask, self.word_emb(static_words)
+
+            static_words, word_mask, word_static_emb = cached(('word_emb', id(self.word_emb), self.args.get('lowercase', True)),
+                                                              (sentences,), static_embeddings)
 
             if 'delta' in self.vocab and self.delta_emb is not None:
                 # masks should be the same
@@ -165,7 +201,8 @@ class NERTagger(nn.Module):
 
         if self.bert_model is not None:
             device = next(self.parameters()).device
-            processed_bert = extract_bert_embeddings(self.args['bert_model'], self.bert_tokenizer, self.bert_model, sentences, device, keep_endpoints=False)
+            processed_bert = cached(('bert', id(self.bert_model)), (sentences,),
+                                    lambda: extract_bert_embeddings(self.args['bert_model'], self.bert_tokenizer, self.bert_model, sentences, device, keep_endpoints=False))
             processed_bert = pad_sequence(processed_bert, batch_first=True)
             inputs += [pack(processed_bert)]
 
@@ -173,10 +210,22 @@ class NERTagger(nn.Module):
             return pad_packed_sequence(PackedSequence(x, word_emb.batch_sizes), batch_first=True)[0]
 
         if self.args['char'] and self.args['char_emb_dim'] > 0:
-            if self.args.get('charlm', None):
-                char_reps_forward = self.charmodel_forward.get_representation(chars[0], charoffsets[0], charlens, char_orig_idx)
+            if self.args.get('charlm', None) and self.charlm_same_vocab and getattr(self.charmodel_forward, 'activation_cache', None) is not None:
+                if self.args.get('char_lowercase', False):
+                    char_sentences = [[word.lower() for word in sentence] for sentence in sentences]
+                else:
+                    char_sentences = sentences
+                char_reps_forward = cached(('charlm', id(self.charmodel_forward)), (chars[0], charoffsets[0]),
+                                           lambda: pack_sequence(self.charmodel_forward.build_char_representation(char_sentences)))
+                char_reps_backward = cached(('charlm', id(self.charmodel_backward)), (chars[1], charoffsets[1]),
+                                            lambda: pack_sequence(self.charmodel_backward.build_char_representation(char_sentences)))
+                inputs += [char_reps_forward, char_reps_backward]
+            elif self.args.get('charlm', None):
+                char_reps_forward = cached(('charlm', id(self.charmodel_forward)), (chars[0], charoffsets[0]),
+                                           lambda: self.charmodel_forward.get_representation(chars[0], charoffsets[0], charlens, char_orig_idx))
                 char_reps_forward = PackedSequence(char_reps_forward.data, char_reps_forward.batch_sizes)
-                char_reps_backward = self.charmodel_backward.get_representation(chars[1], charoffsets[1], charlens, char_orig_idx)
+                char_reps_backward = cached(('charlm', id(self.charmodel_backward)), (chars[1], charoffsets[1]),
+                                            lambda: self.charmodel_backward.get_representation(chars[1], charoffsets[1], charlens, char_orig_idx))
                 char_reps_backward = PackedSequence(char_reps_backward.data, char_reps_backward.batch_sizes)
                 inputs += [char_reps_forward, char_reps_backward]
             else:
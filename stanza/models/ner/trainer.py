@@ -13,7 +13,7 @@ from stanza.models.common.vocab import VOCAB_PREFIX
 from stanza.models.common import utils, loss
 from stanza.models.ner.model import NERTagger
 from stanza.models.ner.vocab import MultiVocab
-from stanza.models.common.crf import viterbi_decode
+from stanza.models.common.crf import viterbi_decode_batch
 
 logger = logging.getLogger('stanza')
 
@@ -75,7 +75,7 @@ class Trainer(BaseTrainer):
             self.args = args
             self.vocab = vocab
             self.bert_model, self.bert_tokenizer = load_bert(args['bert_model'], foundation_cache)
-            self.model = NERTagger(args, vocab, emb_matrix=pretrain.emb, bert_model = self.bert_model, bert_tokenizer = self.bert_tokenizer, use_cuda = self.use_cuda)
+            self.model = NERTagger(args, vocab, emb_matrix=pretrain.emb, bert_model = self.bert_model, bert_tokenizer = self.bert_tokenizer, use_cuda = self.use_cuda, foundation_cache=foundation_cache)
 
         if train_classifier_only:
             logger.info('Disabling gradient for non-classifier layers')
@@ -109,24 +109,20 @@ class Trainer(BaseTrainer):
         self.optimizer.step()
         return loss_val
 
-    def predict(self, batch, unsort=True):
+    def predict(self, batch, unsort=True, cache=None):
+        """
+        cache: a dict shared with other models predicting the same batch.  see NERTagger.forward
+        """
         inputs, orig_idx, word_orig_idx, char_orig_idx, sentlens, wordlens, charlens, charoffsets = unpack_batch(batch, self.use_cuda)
         word, wordchars, wordchars_mask, chars, tags = inputs
 
         self.model.eval()
         #batch_size = word.size(0)
-        _, logits, trans = self.model(word, wordchars, wordchars_mask, tags, word_orig_idx, sentlens, wordlens, chars, charoffsets, charlens, char_orig_idx)
+        _, logits, trans = self.model(word, wordchars, wordchars_mask, tags, word_orig_idx, sentlens, wordlens, chars, charoffsets, charlens, char_orig_idx, cache=cache)
 
         # decode
-        trans = trans.data.cpu().numpy()
-        scores = logits.data.cpu().numpy()
-        bs = logits.size(0)
-        tag_seqs = []
-        for i in range(bs):
-            tags, _ = viterbi_decode(scores[i, :sentlens[i]], trans)
-            tags = self.vocab['tag'].unmap(tags)
-            tags = fix_singleton_tags(tags)
-            tag_seqs += [tags]
+        tag_ids, _ = viterbi_decode_batch(logits.data, sentlens, trans.data)
+        tag_seqs = [fix_singleton_tags(self.vocab['tag'].unmap(tags)) for tags in tag_ids]
 
         if unsort:
             tag_seqs = utils.unsort(tag_seqs, orig_idx)
@@ -167,7 +163,7 @@ class Trainer(BaseTrainer):
         if pretrain is not None:
             emb_matrix = pretrain.emb
 
-        self.model = NERTagger(self.args, self.vocab, emb_matrix=emb_matrix, bert_model=self.bert_model, bert_tokenizer=self.bert_tokenizer, use_cuda=self.use_cuda)
+        self.model = NERTagger(self.args, self.vocab, emb_matrix=emb_matrix, bert_model=self.bert_model, bert_tokenizer=self.bert_tokenizer, use_cuda=self.use_cuda, foundation_cache=foundation_cache)
         self.model.load_state_dict(checkpoint['model'], strict=False)
 
         # there is a possible issue with the delta embeddings.
@@ -67,6 +67,7 @@ def parse_args(args=None):
     parser.add_argument('--no_pretrain', dest='pretrain', action='store_false', help="Turn off pretrained embeddings.")
     parser.add_argument('--no_linearization', dest='linearization', action='store_false', help="Turn off linearization term.")
     parser.add_argument('--no_distance', dest='distance', action='store_false', help="Turn off distance term.")
+    parser.add_argument('--decoder', default='mst', choices=['mst', 'eisner'], help='Decode the best tree (mst) or the best projective tree (eisner)')
 
     parser.add_argument('--sample_train', type=float, default=1.0, help='Subsample training data.')
     parser.add_argument('--optim', type=str, default='adam', help='sgd, adagrad, adam or adamax.')
@@ -276,7 +277,7 @@ def evaluate(args):
 
     # load config
     for k in args:
-        if k.endswith('_dir') or k.endswith('_file') or k in ['shorthand'] or k == 'mode':
+        if k.endswith('_dir') or k.endswith('_file') or k in ['shorthand', 'decoder'] or k == 'mode':
             loaded_args[k] = args[k]
 
     # load data
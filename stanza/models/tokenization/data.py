@@ -37,6 +37,8 @@ class TokenizationDataset:
         self.eval = evaluation
         self.dictionary = dictionary
         self.vocab = vocab
+        # lookup table of vocab ids & features, built by featurize_units
+        self._unit_table = None
 
         # get input files
         txt_file = input_files['txt']
@@ -116,9 +118,47 @@ class TokenizationDataset:
 
         return dict_forward_feats + dict_backward_feats
 
-    def para_to_sentences(self, para):
-        """ Convert a paragraph to a list of processed sentences. """
-        res = []
+    def extract_dict_feats(self, units):
+        """
+        Extract the dictionary features for every character of a paragraph at once
+
+        Returns an array of shape (len(units), 2 * num_dict_feat) with
+        the same values as calling extract_dict_feat on each position.
+        The windows are extended one character at a time and stop as
+        soon as the text is no longer a prefix (or suffix) of a
+        dictionary word, so most positions only cost a lookup or two.
+        """
+        num_dict_feat = self.args['num_dict_feat']
+        length = len(units)
+        feats = np.zeros((length, 2 * num_dict_feat), dtype=np.int64)
+
+        words = self.dictionary["words"]
+        prefixes = self.dictionary["prefixes"]
+        suffixes = self.dictionary["suffixes"]
+        lowered = [unit.lower() for unit in units]
+        for idx, unit in enumerate(units):
+            forward_word = unit
+            for window in range(1, min(num_dict_feat, length - 1 - idx) + 1):
+                forward_word = forward_word + lowered[idx + window]
+                if forward_word in words:
+                    feats[idx, window - 1] = 1
+                if forward_word not in prefixes:
+                    break
+            backward_word = unit
+            for window in range(1, min(num_dict_feat, idx) + 1):
+                backward_word = lowered[idx - window] + backward_word
+                if backward_word in words:
+                    feats[idx, num_dict_feat + window - 1] = 1
+                if backward_word not in suffixes:
+                    break
+        return feats
+
+    def feature_funcs(self):
+        """
+        The character level feature functions in the order given by feat_funcs
+
+        Position-dependent features are not included
+        """
         funcs = []
         for feat_func in self.args['feat_funcs']:
             if feat_func == 'end_of_para' or feat_func == 'start_of_para':
@@ -134,46 +174,84 @@ class TokenizationDataset:
                 raise ValueError('Feature function "{}" is undefined.'.format(feat_func))
 
             funcs.append(func)
+        return funcs
+
+    def featurize_units(self, units):
+        """
+        Look up the vocab ids and the character level features of a list of units
 
-        # stacking all featurize functions
-        composite_func = lambda x: [f(x) for f in funcs]
-
-        def process_sentence(sent):
-            return np.array([self.vocab.unit2id(y[0]) for y in sent]), np.array([y[1] for y in sent]), np.array([y[2] for y in sent]), [y[0] for y in sent]
-
-        use_end_of_para = 'end_of_para' in self.args['feat_funcs']
-        use_start_of_para = 'start_of_para' in self.args['feat_funcs']
-        current = []
-        use_dictionary = self.args['use_dictionary']
-        for i, (unit, label) in enumerate(para):
-            feats = composite_func(unit)
-            # position-dependent features
-            if use_end_of_para:
-                f = 1 if i == len(para)-1 else 0
-                feats.append(f)
-            if use_start_of_para:
-                f = 1 if i == 0 else 0
-                feats.append(f)
-
-            #if dictionary feature is selected
-            if use_dictionary:
-                dict_feats = self.extract_dict_feat(para, i)
-                feats = feats + dict_feats
-
-            current += [(unit, label, feats)]
-            if not self.eval and (label == 2 or label == 4): # end of sentence
-                if len(current) <= self.args['max_seqlen']:
-                    # get rid of sentences that are too long during training of the tokenizer
-                    res.append(process_sentence(current))
-                current = []
-
-        if len(current) > 0:
-            if self.eval or len(current) <= self.args['max_seqlen']:
-                res.append(process_sentence(current))
+        The ids and features only depend on the unit itself, so they
+        are computed once per distinct unit and kept in a lookup table.
+        Each paragraph then only needs a table lookup per character.
+        """
+        if self._unit_table is None:
+            self._unit_funcs = self.feature_funcs()
+            self._unit_index = {}
+            self._unit_table = np.zeros((64, len(self._unit_funcs) + 1), dtype=np.int64)
+        index = self._unit_index
+        new_units = [unit for unit in set(units) if unit not in index]
+        if new_units:
+            num_units = len(index)
+            needed = num_units + len(new_units)
+            if needed > len(self._unit_table):
+                # the table doubles in size, so adding units a few at a time stays linear
+                table = np.zeros((max(needed, 2 * len(self._unit_table)), self._unit_table.shape[1]), dtype=np.int64)
+                table[:num_units] = self._unit_table[:num_units]
+                self._unit_table = table
+            self._unit_table[num_units:needed] = [[self.vocab.unit2id(unit)] + [f(unit) for f in self._unit_funcs] for unit in new_units]
+            for unit_idx, unit in enumerate(new_units, start=num_units):
+                index[unit] = unit_idx
+
+        rows = self._unit_table[np.fromiter(map(index.__getitem__, units), dtype=np.int64, count=len(units))]
+        return rows[:, 0], rows[:, 1:]
+
+    def para_to_sentences(self, para):
+        """ Convert a paragraph to a list of processed sentences. """
+        if len(para) == 0:
+            return []
+
+        units = [unit for unit, _ in para]
+        labels = np.array([label for _, label in para])
+        unit_ids, feats = self.featurize_units(units)
+
+        # position-dependent features
+        feats = [feats]
+        if 'end_of_para' in self.args['feat_funcs']:
+            end_of_para = np.zeros((len(units), 1), dtype=np.int64)
+            end_of_para[-1] = 1
+            feats.append(end_of_para)
+        if 'start_of_para' in self.args['feat_funcs']:
+            start_of_para = np.zeros((len(units), 1), dtype=np.int64)
+            start_of_para[0] = 1
+            feats.append(start_of_para)
+
+        #if dictionary feature is selected
+        if self.args['use_dictionary']:
+            feats.append(self.extract_dict_feats(units))
+        feats = np.concatenate(feats, axis=1) if len(feats) > 1 else feats[0]
+
+        if self.eval:
+            ends = []
+        else:
+            # end of sentence
+            ends = np.nonzero((labels == 2) | (labels == 4))[0].tolist()
+
+        res = []
+        start = 0
+        for end in ends:
+            end = end + 1
+            if end - start <= self.args['max_seqlen']:
+                # get rid of sentences that are too long during training of the tokenizer
+                res.append((unit_ids[start:end], labels[start:end], feats[start:end], units[start:end]))
+            start = end
+
+        if start < len(units):
+            if self.eval or len(units) - start <= self.args['max_seqlen']:
+                res.append((unit_ids[start:], labels[start:], feats[start:], units[start:]))
 
         return res
 
-    def advance_old_batch(self, eval_offsets, old_batch):
+    def advance_old_batch(self, eval_offsets, old_batch, max_len=None, rows=None):
         """
         Advance to a new position in a batch where we have partially processed the batch
 
@@ -181,26 +259,35 @@ class TokenizationDataset:
         prediction on later characters in those paragraphs, we can avoid rebuilding the converted data from scratch
         and just (essentially) advance the indices/offsets from where we read converted data in this old batch.
         In this case, eval_offsets index within the old_batch to advance the strings to process.
+
+        rows picks which rows of old_batch to advance (by default, all of them) and max_len limits the length
+        of the new batch.  Together they cut a window out of a long batch without copying the rest of it.
         """
-        unkid = self.vocab.unit2id('<UNK>')
         padid = self.vocab.unit2id('<PAD>')
 
         ounits, olabels, ofeatures, oraw = old_batch
-        feat_size = ofeatures.shape[-1]
-        lens = (ounits != padid).sum(1).tolist()
-        pad_len = max(l-i for i, l in zip(eval_offsets, lens))
-
-        units = torch.full((len(ounits), pad_len), padid, dtype=torch.int32)
-        labels = torch.full((len(ounits), pad_len), -1, dtype=torch.int32)
-        features = torch.zeros((len(ounits), pad_len, feat_size), dtype=torch.float32)
+        if rows is None:
+            rows = list(range(len(ounits)))
+        width = ounits.shape[1] if max_len is None else max_len
+
+        # read each row starting from its offset.  the rows are only
+        # padded at the end, so anything past the end of a row is a PAD
+        row_idx = torch.tensor(rows, dtype=torch.long).unsqueeze(1)
+        positions = torch.tensor(eval_offsets, dtype=torch.long).unsqueeze(1) + torch.arange(width).unsqueeze(0)
+        gather_idx = positions.clamp(max=ounits.shape[1] - 1)
+        units = ounits[row_idx, gather_idx]
+        in_row = (units != padid) & (positions < ounits.shape[1])
+        new_lens = in_row.sum(1)
+        pad_len = new_lens.max().item() if len(rows) > 0 else 0
+
+        in_row = in_row[:, :pad_len]
+        gather_idx = gather_idx[:, :pad_len]
+        units = torch.where(in_row, units[:, :pad_len], padid).to(torch.int32)
+        labels = torch.where(in_row, olabels[row_idx, gather_idx], -1).to(torch.int32)
+        features = (ofeatures[row_idx, gather_idx] * in_row.unsqueeze(2)).to(torch.float32)
         raw_units = []
-
-        for i in range(len(ounits)):
-            eval_offsets[i] = min(eval_offsets[i], lens[i])
-            units[i, :(lens[i] - eval_offsets[i])] = ounits[i, eval_offsets[i]:lens[i]]
-            labels[i, :(lens[i] - eval_offsets[i])] = olabels[i, eval_offsets[i]:lens[i]]
-            features[i, :(lens[i] - eval_offsets[i])] = ofeatures[i, eval_offsets[i]:lens[i]]
-            raw_units.append(oraw[i][eval_offsets[i]:lens[i]] + ['<PAD>'] * (pad_len - lens[i] + eval_offsets[i]))
+        for row, offset, l in zip(rows, eval_offsets, new_lens.tolist()):
+            raw_units.append(oraw[row][offset:offset + l] + ['<PAD>'] * (pad_len - l))
 
         return units, labels, features, raw_units
 
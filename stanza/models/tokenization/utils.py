@@ -243,6 +243,7 @@ def update_pred_regex(raw, pred):
 
 SPACE_RE = re.compile(r'\s')
 SPACE_SPLIT_RE = re.compile(r'( *[^ ]+)')
+SPACES_RE = re.compile(r' *')
 
 def output_predictions(output_file, trainer, data_generator, vocab, mwt_dict, max_seqlen=1000, orig_text=None, no_ssplit=False, use_regex_tokens=True, num_workers=0):
     batch_size = trainer.args['batch_size']
@@ -263,34 +264,39 @@ def output_predictions(output_file, trainer, data_generator, vocab, mwt_dict, ma
         if N <= max_seqlen:
             pred = np.argmax(trainer.predict(batch), axis=2)
         else:
-            # TODO: we could shortcircuit some processing of
-            # long strings of PAD by tracking which rows are finished
+            # long paragraphs are predicted one window of max_seqlen
+            # characters at a time.  each row keeps the predictions up to
+            # the last sentence break in its window and starts its next
+            # window there.  the windows are cut directly out of the
+            # original batch, and rows which have reached the end of
+            # their paragraph are dropped, so each step only costs as
+            # much as the windows themselves
             idx = [0] * num_sentences
-            adv = [0] * num_sentences
             para_lengths = [x.index('<PAD>') for x in batch[3]]
             pred = [[] for _ in range(num_sentences)]
+            active = list(range(num_sentences))
             while True:
-                ens = [min(N - idx1, max_seqlen) for idx1, N in zip(idx, para_lengths)]
+                ens = [min(para_lengths[j] - idx[j], max_seqlen) for j in active]
                 en = max(ens)
-                batch1 = batch[0][:, :en], batch[1][:, :en], batch[2][:, :en], [x[:en] for x in batch[3]]
+                if all(idx[j] == 0 for j in active):
+                    batch1 = batch[0][:, :en], batch[1][:, :en], batch[2][:, :en], [x[:en] for x in batch[3]]
+                else:
+                    batch1 = data_generator.advance_old_batch([idx[j] for j in active], batch, max_len=en, rows=active)
                 pred1 = np.argmax(trainer.predict(batch1), axis=2)
 
-                for j in range(num_sentences):
-                    sentbreaks = np.where((pred1[j] == 2) + (pred1[j] == 4))[0]
+                for row, j in enumerate(active):
+                    sentbreaks = np.where((pred1[row] == 2) + (pred1[row] == 4))[0]
                     if len(sentbreaks) <= 0 or idx[j] >= para_lengths[j] - max_seqlen:
-                        advance = ens[j]
+                        advance = ens[row]
                     else:
                         advance = np.max(sentbreaks) + 1
 
-                    pred[j] += [pred1[j, :advance]]
+                    pred[j] += [pred1[row, :advance]]
                     idx[j] += advance
-                    adv[j] = advance
 
-                if all([idx1 >= N for idx1, N in zip(idx, para_lengths)]):
+                active = [j for j in active if idx[j] < para_lengths[j]]
+                if len(active) == 0:
                     break
-                # once we've made predictions on a certain number of characters for each paragraph (recorded in `adv`),
-                # we skip the first `adv` characters to make the updated batch
-                batch = data_generator.advance_old_batch(adv, batch)
 
             pred = [np.concatenate(p, 0) for p in pred]
 
@@ -335,67 +341,92 @@ def decode_predictions(vocab, mwt_dict, orig_text, all_raw, all_preds, no_ssplit
     text = SPACE_RE.sub(' ', orig_text) if orig_text is not None else None
     char_offset = 0
 
+    def align_part(part, char_offset):
+        """
+        Find the next occurrence of part in the text starting from char_offset
+
+        The raw units only differ from the text by the whitespace the
+        dataset collapsed (and, with skip_newline, the newlines it
+        removed), so this only ever needs to skip whitespace.  Returns
+        the start of the non-space characters of part and the end of
+        the match.
+        """
+        lstripped = part.lstrip()
+        space_end = SPACES_RE.match(text, char_offset).end()
+        if space_end - char_offset < len(part) - len(lstripped):
+            # the part has more leading spaces than the text
+            return None
+        if not lstripped:
+            # only spaces, which take the first whitespace(s) in the text
+            return char_offset + len(part), char_offset + len(part)
+        if text.startswith(lstripped, space_end):
+            return space_end, space_end + len(lstripped)
+        if not skip_newline:
+            return None
+        # newlines were removed from the units, so there may be whitespace between any two characters
+        end = space_end
+        for c in lstripped:
+            end = SPACES_RE.match(text, end).end()
+            if not text.startswith(c, end):
+                return None
+            end += 1
+        return space_end, end
+
     if vocab is not None:
         UNK_ID = vocab.unit2id('<UNK>')
 
     for raw, pred in zip(all_raw, all_preds):
-        current_tok = ''
         current_sent = []
 
-        for t, p in zip(raw, pred):
-            if t == '<PAD>':
-                break
-            # hack la_ittb
-            if use_la_ittb_shorthand and t in (":", ";"):
-                p = 2
-            offset += 1
-            if vocab is not None and vocab.unit2id(t) == UNK_ID:
-                oov_count += 1
-
-            current_tok += t
-            if p >= 1:
-                if vocab is not None:
-                    tok = vocab.normalize_token(current_tok)
-                else:
-                    tok = current_tok
-                assert '\t' not in tok, tok
-                if len(tok) <= 0:
-                    current_tok = ''
-                    continue
-                if orig_text is not None:
-                    st = -1
-                    tok_len = 0
-                    for part in SPACE_SPLIT_RE.split(current_tok):
-                        if len(part) == 0: continue
-                        if skip_newline:
-                            part_pattern = re.compile(r'\s*'.join(re.escape(c) for c in part))
-                            match = part_pattern.search(text, char_offset)
-                            st0 = match.start(0) - char_offset
-                            partlen = match.end(0) - match.start(0)
-                            lstripped = match.group(0).lstrip()
-                        else:
-                            try:
-                                st0 = text.index(part, char_offset) - char_offset
-                            except ValueError as e:
-                                sub_start = max(0, char_offset - 20)
-                                sub_end = min(len(text), char_offset + 20)
-                                sub = text[sub_start:sub_end]
-                                raise ValueError("Could not find |%s| starting from char_offset %d.  Surrounding text: |%s|" % (part, char_offset, sub)) from e
-                            partlen = len(part)
-                            lstripped = part.lstrip()
-                        if st < 0:
-                            st = char_offset + st0 + (partlen - len(lstripped))
-                        char_offset += st0 + partlen
-                    position_info = (st, char_offset)
-                else:
-                    position_info = None
-                current_sent.append((tok, p, position_info))
-                current_tok = ''
-                if (p == 2 or p == 4) and not no_ssplit:
-                    doc.append(process_sentence(current_sent, mwt_dict))
-                    current_sent = []
-
-        if len(current_tok) > 0:
+        length = raw.index('<PAD>') if '<PAD>' in raw else len(raw)
+        raw = raw[:length]
+        pred = pred[:length]
+        offset += length
+        if vocab is not None:
+            oov_count += sum(count for unit, count in Counter(raw).items() if vocab.unit2id(unit) == UNK_ID)
+        # hack la_ittb
+        if use_la_ittb_shorthand:
+            pred = [2 if t in (":", ";") else p for t, p in zip(raw, pred)]
+
+        # each token runs from the end of the previous token to the next unit predicted as an end
+        tok_start = 0
+        for tok_end in np.nonzero(np.asarray(pred) >= 1)[0].tolist():
+            p = pred[tok_end]
+            current_tok = ''.join(raw[tok_start:tok_end+1])
+            tok_start = tok_end + 1
+            if vocab is not None:
+                tok = vocab.normalize_token(current_tok)
+            else:
+                tok = current_tok
+            assert '\t' not in tok, tok
+            if len(tok) <= 0:
+                continue
+            if orig_text is not None:
+                st = -1
+                for part in SPACE_SPLIT_RE.split(current_tok):
+                    if len(part) == 0: continue
+                    if text.startswith(part, char_offset):
+                        # the usual case: the units line up exactly with the text
+                        span = (char_offset + len(part) - len(part.lstrip()), char_offset + len(part))
+                    else:
+                        span = align_part(part, char_offset)
+                    if span is None:
+                        sub_start = max(0, char_offset - 20)
+                        sub_end = min(len(text), char_offset + 20)
+                        sub = text[sub_start:sub_end]
+                        raise ValueError("Could not find |%s| starting from char_offset %d.  Surrounding text: |%s|" % (part, char_offset, sub))
+                    if st < 0:
+                        st = span[0]
+                    char_offset = span[1]
+                position_info = (st, char_offset)
+            else:
+                position_info = None
+            current_sent.append((tok, p, position_info))
+            if (p == 2 or p == 4) and not no_ssplit:
+                doc.append(process_sentence(current_sent, mwt_dict))
+                current_sent = []
+
+        if tok_start < length:
             raise ValueError("Finished processing tokens, but there is still text left!")
         if len(current_sent):
             doc.append(process_sentence(current_sent, mwt_dict))
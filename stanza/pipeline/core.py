@@ -10,6 +10,8 @@ import torch
 import logging
 import json
 import os
+import queue
+import threading
 
 from distutils.util import strtobool
 from stanza.pipeline._constants import *
@@ -17,15 +19,7 @@ from stanza.models.common.doc import Document
 from stanza.models.common.foundation_cache import FoundationCache
 from stanza.pipeline.processor import Processor, ProcessorRequirementsException
 from stanza.pipeline.registry import NAME_TO_PROCESSOR_CLASS, PIPELINE_NAMES, PROCESSOR_VARIANTS
-from stanza.pipeline.langid_processor import LangIDProcessor
-from stanza.pipeline.tokenize_processor import TokenizeProcessor
-from stanza.pipeline.mwt_processor import MWTProcessor
-from stanza.pipeline.pos_processor import POSProcessor
-from stanza.pipeline.lemma_processor import LemmaProcessor
-from stanza.pipeline.depparse_processor import DepparseProcessor
-from stanza.pipeline.sentiment_processor import SentimentProcessor
-from stanza.pipeline.constituency_processor import ConstituencyProcessor
-from stanza.pipeline.ner_processor import NERProcessor
+from stanza.pipeline.sentence_cache import SentenceCache
 from stanza.resources.common import DEFAULT_MODEL_DIR, DEFAULT_RESOURCES_URL, DEFAULT_RESOURCES_VERSION, ModelSpecification, add_dependencies, add_mwt, download_models, download_resources_json, flatten_processor_list, load_resources_json, maintain_processor_list, process_pipeline_parameters, set_logging_level, sort_processors
 from stanza.utils.helper_func import make_table
 
@@ -60,6 +54,42 @@ class IllegalPackageError(ValueError):
     def __init__(self, msg):
         super().__init__(msg)
 
+class _StageFailure:
+    """
+    Wraps an exception raised in one stage of a pipelined stream so it can be passed along the queues
+    """
+    def __init__(self, exception):
+        self.exception = exception
+
+# marks the end of the input in a pipelined stream
+_END_OF_STREAM = object()
+
+class _LazyProcessor:
+    """
+    Stands in for a processor of a lazy_load Pipeline until it is needed
+
+    Looking up anything other than provides, such as process or
+    trainer, loads the real processor, which then replaces this
+    object in Pipeline.processors.
+    """
+    def __init__(self, pipeline, name):
+        self._pipeline = pipeline
+        self._name = name
+
+    @property
+    def provides(self):
+        # no processor changes its provides from the class default,
+        # so the requirements of the other processors can be checked without loading this one
+        return NAME_TO_PROCESSOR_CLASS[self._name].PROVIDES_DEFAULT
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return getattr(self._pipeline.load_processor(self._name), attr)
+
+    def __str__(self):
+        return "%s(not loaded)" % NAME_TO_PROCESSOR_CLASS[self._name].__name__
+
 class PipelineRequirementsException(Exception):
     """
     Exception indicating one or more requirements failures while attempting to build a pipeline.
@@ -168,6 +198,9 @@ def normalize_download_method(download_method):
             raise ValueError("Unknown download method %s" % download_method) from e
     return download_method
 
+# processors which annotate each sentence on its own, so their results can be reused by the sentence cache
+SENTENCE_CACHE_PROCESSORS = (POS, LEMMA, DEPPARSE, SENTIMENT, CONSTITUENCY, NER)
+
 class Pipeline:
 
     def __init__(self,
@@ -184,7 +217,27 @@ class Pipeline:
                  resources_branch=None,
                  resources_version=DEFAULT_RESOURCES_VERSION,
                  proxies=None,
+                 lazy_load=False,
+                 load_in_background=False,
+                 sentence_cache_size=0,
+                 sentence_cache_path=None,
+                 activation_cache_mb=0,
                  **kwargs):
+        """
+        lazy_load: load each processor the first time it is used, rather than all of them here.
+          A pipeline which is only ever asked for processors="tokenize" never loads the rest
+        load_in_background: with lazy_load, start loading the processors in a background thread.
+          A document which needs a processor which is still loading waits for it
+        sentence_cache_size: if more than 0, remember the annotations of this many sentences.
+          A sentence with the same tokens as one seen before reuses its annotations
+          instead of going through the processors after tokenization and mwt
+        sentence_cache_path: a file to load the sentence cache from, if it exists.
+          save_sentence_cache() writes the cache back to it
+        activation_cache_mb: if more than 0, processors which use the same charlm or transformer
+          share its output for each sentence instead of each running it again.
+          Up to this many megabytes of outputs are kept, on the device of the models.
+          See foundation_cache.ActivationCache
+        """
         self.lang, self.dir, self.kwargs = lang, dir, kwargs
         if model_dir is not None and dir == DEFAULT_MODEL_DIR:
             self.dir = model_dir
@@ -194,7 +247,14 @@ class Pipeline:
 
         # processors can use this to save on the effort of loading
         # large sub-models, such as pretrained embeddings, bert, etc
-        self.foundation_cache = FoundationCache()
+        self.foundation_cache = FoundationCache(activation_cache_mb=activation_cache_mb)
+
+        if sentence_cache_size > 0:
+            self.sentence_cache = SentenceCache(sentence_cache_size, sentence_cache_path)
+        elif sentence_cache_path is not None:
+            raise ValueError("sentence_cache_path was given, but sentence_cache_size is 0")
+        else:
+            self.sentence_cache = None
 
         download_method = normalize_download_method(download_method)
         if (download_method is DownloadMethod.DOWNLOAD_RESOURCES or
@@ -255,60 +315,33 @@ class Pipeline:
         self.processors = {}
 
         # configs that are the same for all processors
-        pipeline_level_configs = {'lang': lang, 'mode': 'predict'}
+        self._pipeline_level_configs = {'lang': lang, 'mode': 'predict'}
+        self._resources = resources
+        self._lang = lang
         self.use_gpu = torch.cuda.is_available() and use_gpu
         logger.info("Use device: {}".format("gpu" if self.use_gpu else "cpu"))
+        self._load_lock = threading.RLock()
+
+        if lazy_load:
+            for processor_name, _ in self.load_list:
+                self.processors[processor_name] = _LazyProcessor(self, processor_name)
+            if load_in_background:
+                threading.Thread(target=self._load_in_background, daemon=True).start()
+            return
 
         # set up processors
         pipeline_reqs_exceptions = []
         for item in self.load_list:
             processor_name, _ = item
-            logger.info('Loading: ' + processor_name)
-            curr_processor_config = self.filter_config(processor_name, self.config)
-            curr_processor_config.update(pipeline_level_configs)
-            # TODO: this is obviously a hack
-            # a better solution overall would be to make a pretagged version of the pos annotator
-            # and then subsequent modules can use those tags without knowing where those tags came from
-            if "pretagged" in self.config and "pretagged" not in curr_processor_config:
-                curr_processor_config["pretagged"] = self.config["pretagged"]
-            logger.debug('With settings: ')
-            logger.debug(curr_processor_config)
             try:
                 # try to build processor, throw an exception if there is a requirements issue
-                self.processors[processor_name] = NAME_TO_PROCESSOR_CLASS[processor_name](config=curr_processor_config,
-                                                                                          pipeline=self,
-                                                                                          use_gpu=self.use_gpu)
+                self._build_processor(processor_name)
             except ProcessorRequirementsException as e:
                 # if there was a requirements issue, add it to list which will be printed at end
                 pipeline_reqs_exceptions.append(e)
                 # add the broken processor to the loaded processors for the sake of analyzing the validity of the
                 # entire proposed pipeline, but at this point the pipeline will not be built successfully
                 self.processors[processor_name] = e.err_processor
-            except FileNotFoundError as e:
-                # For a FileNotFoundError, we try to guess if there's
-                # a missing model directory or file.  If so, we
-                # suggest the user try to download the models
-                if 'model_path' in curr_processor_config:
-                    model_path = curr_processor_config['model_path']
-                    if e.filename == model_path or (isinstance(model_path, (tuple, list)) and e.filename in model_path):
-                        model_path = e.filename
-                    model_dir, model_name = os.path.split(model_path)
-                    lang_dir = os.path.dirname(model_dir)
-                    if not os.path.exists(lang_dir):
-                        # model files for this language can't be found in the expected directory
-                        raise LanguageNotDownloadedError(lang, lang_dir, model_path) from e
-                    if processor_name not in resources[lang]:
-                        # user asked for a model which doesn't exist for this language?
-                        raise UnsupportedProcessorError(processor_name, lang)
-                    if not os.path.exists(model_path):
-                        model_name, _ = os.path.splitext(model_name)
-                        # TODO: before recommending this, check that such a thing exists in resources.json.
-                        # currently that case is handled by ignoring the model, anyway
-                        raise FileNotFoundError('Could not find model file %s, although there are other models downloaded for language %s.  Perhaps you need to download a specific model.  Try: stanza.download(lang="%s",package=None,processors={"%s":"%s"})' % (model_path, lang, lang, processor_name, model_name)) from e
-
-                # if we couldn't find a more suitable description of the
-                # FileNotFoundError, just raise the old error
-                raise
 
         # if there are any processor exceptions, throw an exception to indicate pipeline build failure
         if pipeline_reqs_exceptions:
@@ -317,6 +350,90 @@ class Pipeline:
 
         logger.info("Done loading processors!")
 
+    def _build_processor(self, processor_name):
+        """
+        Build one processor and add it to self.processors
+
+        Raises ProcessorRequirementsException if the processors already
+        in the pipeline do not provide what this one needs
+        """
+        lang = self._lang
+        resources = self._resources
+        logger.info('Loading: ' + processor_name)
+        curr_processor_config = self.filter_config(processor_name, self.config)
+        curr_processor_config.update(self._pipeline_level_configs)
+        # TODO: this is obviously a hack
+        # a better solution overall would be to make a pretagged version of the pos annotator
+        # and then subsequent modules can use those tags without knowing where those tags came from
+        if "pretagged" in self.config and "pretagged" not in curr_processor_config:
+            curr_processor_config["pretagged"] = self.config["pretagged"]
+        logger.debug('With settings: ')
+        logger.debug(curr_processor_config)
+        try:
+            processor = NAME_TO_PROCESSOR_CLASS[processor_name](config=curr_processor_config,
+                                                                pipeline=self,
+                                                                use_gpu=self.use_gpu)
+        except FileNotFoundError as e:
+            # For a FileNotFoundError, we try to guess if there's
+            # a missing model directory or file.  If so, we
+            # suggest the user try to download the models
+            if 'model_path' in curr_processor_config:
+                model_path = curr_processor_config['model_path']
+                if e.filename == model_path or (isinstance(model_path, (tuple, list)) and e.filename in model_path):
+                    model_path = e.filename
+                model_dir, model_name = os.path.split(model_path)
+                lang_dir = os.path.dirname(model_dir)
+                if not os.path.exists(lang_dir):
+                    # model files for this language can't be found in the expected directory
+                    raise LanguageNotDownloadedError(lang, lang_dir, model_path) from e
+                if processor_name not in resources[lang]:
+                    # user asked for a model which doesn't exist for this language?
+                    raise UnsupportedProcessorError(processor_name, lang)
+                if not os.path.exists(model_path):
+                    model_name, _ = os.path.splitext(model_name)
+                    # TODO: before recommending this, check that such a thing exists in resources.json.
+                    # currently that case is handled by ignoring the model, anyway
+                    raise FileNotFoundError('Could not find model file %s, although there are other models downloaded for language %s.  Perhaps you need to download a specific model.  Try: stanza.download(lang="%s",package=None,processors={"%s":"%s"})' % (model_path, lang, lang, processor_name, model_name)) from e
+
+            # if we couldn't find a more suitable description of the
+            # FileNotFoundError, just raise the old error
+            raise
+        self.processors[processor_name] = processor
+        return processor
+
+    def load_processor(self, processor_name):
+        """
+        Return the processor with this name, loading it first if the pipeline was built with lazy_load
+
+        Safe to call from several threads.  A processor is only loaded once
+        """
+        processor = self.processors[processor_name]
+        if not isinstance(processor, _LazyProcessor):
+            return processor
+        with self._load_lock:
+            processor = self.processors[processor_name]
+            if not isinstance(processor, _LazyProcessor):
+                return processor
+            try:
+                return self._build_processor(processor_name)
+            except ProcessorRequirementsException as e:
+                raise PipelineRequirementsException([e]) from e
+
+    def load_processors(self):
+        """
+        Load every processor of a lazy_load pipeline which is not loaded yet
+        """
+        for processor_name, _ in self.load_list:
+            self.load_processor(processor_name)
+
+    def _load_in_background(self):
+        try:
+            self.load_processors()
+            logger.info("Done loading processors!")
+        except Exception as e:
+            # the processor will be loaded again, raising the same error, when it is used
+            logger.warning("Loading processors in the background failed: %s", e)
+
     @staticmethod
     def update_kwargs(kwargs, processor_list):
         processor_dict = {processor: [{'package': model_spec.package, 'dependencies': model_spec.dependencies} for model_spec in model_specs]
@@ -376,26 +493,193 @@ class Pipeline:
         # determine whether we are in bulk processing mode for multiple documents
         bulk=(isinstance(doc, list) and len(doc) > 0 and isinstance(doc[0], Document))
 
+        processors, cached = self._split_cached_processors(processors)
+
+        for processor_name in processors:
+            processor = self.load_processor(processor_name)
+            process = processor.bulk_process if bulk else processor.process
+            doc = process(doc)
+        if cached:
+            if not (bulk or isinstance(doc, Document)):
+                raise ValueError("The sentence cache needs tokenized Documents, but got {}.  Is tokenize missing from the processors?".format(type(doc)))
+            docs = self.sentence_cache.process(self, doc if bulk else [doc], cached)
+            doc = docs if bulk else docs[0]
+        return doc
+
+    def _split_cached_processors(self, processors):
+        """
+        Return the names of the processors to run, split into those run directly and those run through the sentence cache
+
+        processors is the argument to process() or stream()
+        """
+        processors = [name for name in self._resolve_processors(processors) if self.processors.get(name)]
+        if self.sentence_cache is None:
+            return processors, []
+        # the sentences are only known after tokenization, so the
+        # cache takes over for the processors after that.
+        # other processors, such as ones registered by the user,
+        # may not work one sentence at a time, so with any of
+        # those the cache is not used
+        first_cached = next((idx for idx, name in enumerate(processors) if name in SENTENCE_CACHE_PROCESSORS), len(processors))
+        if all(name in SENTENCE_CACHE_PROCESSORS for name in processors[first_cached:]):
+            return processors[:first_cached], processors[first_cached:]
+        return processors, []
+
+    def save_sentence_cache(self, path=None):
+        """
+        Write the sentence cache to path, or to the sentence_cache_path the pipeline was built with
+        """
+        if self.sentence_cache is None:
+            raise ValueError("This pipeline was not built with a sentence cache")
+        self.sentence_cache.save(path)
+
+    def _resolve_processors(self, processors):
+        """
+        Turn the processors argument of process() or stream() into a list of processor names in execution order
+        """
         # various options to limit the processors used by this pipeline action
         if processors is None:
-            processors = PIPELINE_NAMES
+            return PIPELINE_NAMES
         elif not isinstance(processors, (str, list, tuple, set)):
             raise ValueError("Cannot process {} as a list of processors to run".format(type(processors)))
+
+        if isinstance(processors, str):
+            processors = {x for x in processors.split(",")}
         else:
-            if isinstance(processors, str):
-                processors = {x for x in processors.split(",")}
-            else:
-                processors = set(processors)
-            if TOKENIZE in processors and MWT in self.processors and MWT not in processors:
-                logger.debug("Requested processors for pipeline did not have mwt, but pipeline needs mwt, so mwt is added")
-                processors.add(MWT)
-            processors = [x for x in PIPELINE_NAMES if x in processors]
+            processors = set(processors)
+        if TOKENIZE in processors and MWT in self.processors and MWT not in processors:
+            logger.debug("Requested processors for pipeline did not have mwt, but pipeline needs mwt, so mwt is added")
+            processors.add(MWT)
+        return [x for x in PIPELINE_NAMES if x in processors]
 
-        for processor_name in processors:
-            if self.processors.get(processor_name):
-                process = self.processors[processor_name].bulk_process if bulk else self.processors[processor_name].process
-                doc = process(doc)
-        return doc
+    def stream(self, docs, batch_docs=50, max_chars=None, processors=None, pipelined=False, queue_size=2):
+        """
+        Run the pipeline over an iterable of documents, yielding the annotated Documents
+
+        docs: an iterable (such as a generator or a file) of str or Document
+          it is only read as far as needed to fill the next batch,
+          so it does not need to fit in memory
+        batch_docs: maximum number of documents sent through bulk_process together
+        max_chars: if set, a batch is also closed once its text reaches this many characters
+          a single document longer than this is processed in a batch by itself
+        processors: same as for process()
+        pipelined: if True, each processor runs in its own thread, with
+          batches handed from one processor to the next through queues.
+          This way, batch N+1 can be tokenized while batch N is being parsed.
+          Useful on multicore machines, as torch releases the GIL for most of its work.
+          Each processor still only works on one batch at a time.
+        queue_size: when pipelined, the number of batches which can wait between two processors
+
+        Documents are yielded in the same order they were read.
+        Only one batch is held in memory at any time, or roughly
+        queue_size batches per processor when pipelined.
+        """
+        if batch_docs < 1:
+            raise ValueError("batch_docs must be at least 1, got {}".format(batch_docs))
+
+        batches = self._batch_documents(docs, batch_docs, max_chars)
+        if pipelined:
+            yield from self._stream_pipelined(batches, processors, queue_size)
+        else:
+            for batch in batches:
+                yield from self.process(batch, processors=processors)
+
+    @staticmethod
+    def _batch_documents(docs, batch_docs, max_chars):
+        """
+        Group an iterable of str or Document into lists of Documents for stream()
+        """
+        batch = []
+        batch_chars = 0
+        for doc in docs:
+            if isinstance(doc, str):
+                doc = Document([], text=doc)
+            elif not isinstance(doc, Document):
+                raise ValueError("Cannot stream {} as a document.  Input should be str or Document".format(type(doc)))
+            batch.append(doc)
+            batch_chars += len(doc.text) if doc.text else 0
+            if len(batch) >= batch_docs or (max_chars is not None and batch_chars >= max_chars):
+                yield batch
+                batch = []
+                batch_chars = 0
+
+        if batch:
+            yield batch
+
+    def _stream_pipelined(self, batches, processors, queue_size):
+        """
+        Run each processor in its own thread, passing batches between them with queues
+
+        The batches are read in a separate thread as well.  An
+        exception in any stage is passed down the queues and reraised
+        here.  If the caller stops reading early, the threads are
+        told to stop.
+        """
+        processors, cached = self._split_cached_processors(processors)
+        stages = [self.load_processor(name).bulk_process for name in processors]
+        if cached:
+            # the processors behind the sentence cache run together as the last stage
+            stages.append(lambda batch: self.sentence_cache.process(self, batch, cached))
+        queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+        stop = threading.Event()
+
+        def put(out_queue, item):
+            while not stop.is_set():
+                try:
+                    out_queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def get(in_queue):
+            while not stop.is_set():
+                try:
+                    return in_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return _END_OF_STREAM
+
+        def read_batches():
+            try:
+                for batch in batches:
+                    if stop.is_set():
+                        return
+                    put(queues[0], batch)
+            except BaseException as e:
+                put(queues[0], _StageFailure(e))
+                return
+            put(queues[0], _END_OF_STREAM)
+
+        def run_stage(process, in_queue, out_queue):
+            while True:
+                item = get(in_queue)
+                if item is _END_OF_STREAM or isinstance(item, _StageFailure):
+                    put(out_queue, item)
+                    return
+                try:
+                    item = process(item)
+                except BaseException as e:
+                    item = _StageFailure(e)
+                put(out_queue, item)
+
+        threads = [threading.Thread(target=read_batches, daemon=True)]
+        threads += [threading.Thread(target=run_stage, args=(stage, queues[idx], queues[idx+1]), daemon=True)
+                    for idx, stage in enumerate(stages)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _END_OF_STREAM:
+                    break
+                if isinstance(item, _StageFailure):
+                    raise item.exception
+                yield from item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
 
     def __str__(self):
         """
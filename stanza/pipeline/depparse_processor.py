@@ -34,6 +34,8 @@ class DepparseProcessor(UDProcessor):
     def _set_up_model(self, config, pipeline, use_gpu):
         self._pretrain = pipeline.foundation_cache.load_pretrain(config['pretrain_path']) if 'pretrain_path' in config else None
         self._trainer = Trainer(pretrain=self.pretrain, model_file=config['model_path'], use_cuda=use_gpu)
+        if 'decoder' in config:
+            self._trainer.args['decoder'] = config['decoder']
 
     def get_known_relations(self):
         """
@@ -71,7 +71,8 @@ class PyThaiNLPTokenizer(ProcessorVariant):
                 # create token entry
                 token_entry = {
                     doc.TEXT: token_str,
-                    doc.MISC: f"{doc.START_CHAR}={offset}|{doc.END_CHAR}={offset+len(token_str)}"
+                    doc.START_CHAR: offset,
+                    doc.END_CHAR: offset+len(token_str)
                 }
                 current_sentence.append(token_entry)
                 offset += len(token_str)
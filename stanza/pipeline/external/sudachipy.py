@@ -70,7 +70,8 @@ class SudachiPyTokenizer(ProcessorVariant):
 
             token_entry = {
                 doc.TEXT: token_text,
-                doc.MISC: f"{doc.START_CHAR}={start}|{doc.END_CHAR}={end}"
+                doc.START_CHAR: start,
+                doc.END_CHAR: end
             }
             current_sentence.append(token_entry)
 
@@ -2,7 +2,10 @@
 Processor for determining language of text.
 """
 
+from collections import defaultdict
+
 import emoji
+import numpy as np
 import re
 import stanza
 import torch
@@ -28,6 +31,9 @@ class LangIDProcessor(UDProcessor):
     # default max sequence length
     MAX_SEQ_LENGTH_DEFAULT = 1000
 
+    # groups of texts with the same length at least this large are run without padding
+    MIN_UNPADDED_BATCH = 16
+
     def _set_up_model(self, config, pipeline, use_gpu):
         batch_size = config.get("batch_size", 64)
         self._model = LangIDBiLSTM.load(path=config["model_path"], use_cuda=use_gpu,
@@ -35,23 +41,33 @@ class LangIDProcessor(UDProcessor):
         self._device = torch.device("cuda") if use_gpu else None
         self._char_index = self._model.char_to_idx
         self._clean_text = config.get("clean_text")
+        self._batch_size = batch_size
+        # if set, only the first max_seqlen characters of each text are used
+        self._max_seqlen = config.get("max_seqlen")
+
+        # code points of the known characters, sorted so text can be mapped to indices with numpy
+        chars = sorted(c for c in self._char_index if len(c) == 1)
+        self._char_codes = np.array([ord(c) for c in chars], dtype=np.uint32)
+        self._char_ids = np.array([self._char_index[c] for c in chars], dtype=np.int64)
 
     def _text_to_tensor(self, docs):
         """
-        Map list of strings to batch tensor. Assumed all docs are same length.
+        Map list of strings to batch tensor.  Strings shorter than the longest one are padded
         """
+        lengths = np.array([len(doc) for doc in docs], dtype=np.int64)
+        codes = np.frombuffer("".join(docs).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        positions = np.searchsorted(self._char_codes, codes).clip(max=len(self._char_codes) - 1)
+        char_ids = np.where(self._char_codes[positions] == codes, self._char_ids[positions], self._char_index["UNK"])
 
-        all_docs = []
-        for doc in docs:
-            doc_chars = [self._char_index.get(c, self._char_index["UNK"]) for c in list(doc)]
-            all_docs.append(doc_chars)
-        return torch.tensor(all_docs, device=self._device, dtype=torch.long)
+        batch = np.full((len(docs), max(lengths.max(), 1)), self._model.padding_idx, dtype=np.int64)
+        batch[np.arange(batch.shape[1]) < lengths[:, None]] = char_ids
+        return torch.as_tensor(batch, device=self._device)
 
-    def _id_langs(self, batch_tensor):
+    def _id_langs(self, batch_tensor, lengths=None):
         """
         Identify languages for each sequence in a batch tensor
         """
-        predictions = self._model.prediction_scores(batch_tensor)
+        predictions = self._model.prediction_scores(batch_tensor, lengths)
         prediction_labels = [self._model.idx_to_tag[prediction] for prediction in predictions]
 
         return prediction_labels
@@ -93,19 +109,37 @@ class LangIDProcessor(UDProcessor):
         if isinstance(docs[0], str):
             docs = [Document([], text) for text in docs]
 
-        docs_by_length = {}
-        for doc in docs:
-            text = LangIDProcessor.clean_text(doc.text) if self._clean_text else doc.text
-            doc_length = len(text)
-            if doc_length not in docs_by_length:
-                docs_by_length[doc_length] = []
-            docs_by_length[doc_length].append((doc, text))
-
-        for doc_length in docs_by_length:
-            inputs = [doc[1] for doc in docs_by_length[doc_length]]
-            predictions = self._id_langs(self._text_to_tensor(inputs))
-            for doc, lang in zip(docs_by_length[doc_length], predictions):
-                doc[0].lang = lang
+        texts = [LangIDProcessor.clean_text(doc.text) if self._clean_text else doc.text for doc in docs]
+        if self._max_seqlen:
+            texts = [text[:self._max_seqlen] for text in texts]
+
+        # texts of the same length can be batched without padding, which
+        # is the fastest way to run the LSTM.  groups too small to make a
+        # decent batch on their own are instead sorted by length and
+        # batched together, with padding & packing
+        docs_by_length = defaultdict(list)
+        for idx, text in enumerate(texts):
+            docs_by_length[len(text)].append(idx)
+        batches = []
+        leftovers = []
+        for doc_length in sorted(docs_by_length):
+            group = docs_by_length[doc_length]
+            for start in range(0, len(group), self._batch_size):
+                batch = group[start:start+self._batch_size]
+                if len(batch) >= LangIDProcessor.MIN_UNPADDED_BATCH:
+                    batches.append(batch)
+                else:
+                    leftovers.extend(batch)
+        batches.extend(leftovers[start:start+self._batch_size] for start in range(0, len(leftovers), self._batch_size))
+
+        for batch in batches:
+            inputs = [texts[idx] for idx in batch]
+            lengths = torch.tensor([len(text) for text in inputs])
+            if lengths[0] > 0 and bool((lengths == lengths[0]).all()):
+                lengths = None
+            predictions = self._id_langs(self._text_to_tensor(inputs), lengths)
+            for idx, lang in zip(batch, predictions):
+                docs[idx].lang = lang
 
         return docs
 
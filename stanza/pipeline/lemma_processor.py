@@ -2,12 +2,17 @@
 Processor for performing lemmatization
 """
 
+import logging
+
 from stanza.models.common import doc
+from stanza.models.common.lru_cache import LRUCache
 from stanza.models.lemma.data import DataLoader
 from stanza.models.lemma.trainer import Trainer
 from stanza.pipeline._constants import *
 from stanza.pipeline.processor import UDProcessor, register_processor
 
+logger = logging.getLogger('stanza')
+
 @register_processor(name=LEMMA)
 class LemmaProcessor(UDProcessor):
 
@@ -18,11 +23,14 @@ class LemmaProcessor(UDProcessor):
     REQUIRES_DEFAULT = set([TOKENIZE])
     # default batch size
     DEFAULT_BATCH_SIZE = 5000
+    # default number of (text, upos) lemmas remembered from the seq2seq model
+    DEFAULT_CACHE_SIZE = 50000
 
     def __init__(self, config, pipeline, use_gpu):
         # run lemmatizer in identity mode
         self._use_identity = None
         self._pretagged = None
+        self._cache = None
         super().__init__(config, pipeline, use_gpu)
 
     @property
@@ -37,6 +45,16 @@ class LemmaProcessor(UDProcessor):
         else:
             self._use_identity = False
             self._trainer = Trainer(model_file=config['model_path'], use_cuda=use_gpu)
+            self._cache = LRUCache(int(config.get('cache_size', LemmaProcessor.DEFAULT_CACHE_SIZE)))
+
+    @property
+    def cache(self):
+        """
+        The LRUCache of seq2seq lemmas, keyed by (text, upos)
+
+        None for the identity lemmatizer, which has no model to cache
+        """
+        return self._cache
 
     def _set_up_requires(self):
         self._pretagged = self._config.get('pretagged', None)
@@ -48,47 +66,64 @@ class LemmaProcessor(UDProcessor):
             self._requires = LemmaProcessor.REQUIRES_DEFAULT
 
     def process(self, document):
-        if not self.use_identity:
-            batch = DataLoader(document, self.config['batch_size'], self.config, vocab=self.vocab, evaluation=True)
-        else:
-            batch = DataLoader(document, self.config['batch_size'], self.config, evaluation=True, conll_only=True)
+        # only the doc is needed here.  the words which go through the
+        # seq2seq model get their own DataLoader in _predict_seq2seq
+        batch = DataLoader(document, self.config['batch_size'], self.config, evaluation=True, conll_only=True)
         if self.use_identity:
             preds = [word.text for sent in batch.doc.sentences for word in sent.words]
         elif self.config.get('dict_only', False):
             preds = self.trainer.predict_dict(batch.doc.get([doc.TEXT, doc.UPOS]))
         else:
+            pairs = [tuple(x) for x in batch.doc.get([doc.TEXT, doc.UPOS])]
             if self.config.get('ensemble_dict', False):
                 # skip the seq2seq model when we can
-                skip = self.trainer.skip_seq2seq(batch.doc.get([doc.TEXT, doc.UPOS]))
-                seq2seq_batch = DataLoader(document, self.config['batch_size'], self.config, vocab=self.vocab,
-                                           evaluation=True, skip=skip)
+                skip = self.trainer.skip_seq2seq(pairs)
             else:
-                seq2seq_batch = batch
-
-            preds = []
-            edits = []
-            for i, b in enumerate(seq2seq_batch):
-                ps, es = self.trainer.predict(b, self.config['beam_size'])
-                preds += ps
-                if es is not None:
-                    edits += es
+                skip = [False] * len(pairs)
+            lemmas = self._predict_seq2seq(document, pairs, skip)
 
             if self.config.get('ensemble_dict', False):
-                preds = self.trainer.postprocess([x for x, y in zip(batch.doc.get([doc.TEXT]), skip) if not y], preds, edits=edits)
-                # expand seq2seq predictions to the same size as all words
-                i = 0
-                preds1 = []
-                for s in skip:
-                    if s:
-                        preds1.append('')
-                    else:
-                        preds1.append(preds[i])
-                        i += 1
-                preds = self.trainer.ensemble(batch.doc.get([doc.TEXT, doc.UPOS]), preds1)
+                preds = self.trainer.ensemble(pairs, [lemmas[p] if not s else '' for p, s in zip(pairs, skip)])
             else:
-                preds = self.trainer.postprocess(batch.doc.get([doc.TEXT]), preds, edits=edits)
+                preds = [lemmas[p] for p in pairs]
 
         # map empty string lemmas to '_'
         preds = [max([(len(x), x), (0, '_')])[1] for x in preds]
         batch.doc.set([doc.LEMMA], preds)
         return batch.doc
+
+    def _predict_seq2seq(self, document, pairs, skip):
+        """
+        Lemmatize the (text, upos) pairs which are not skipped with the seq2seq model
+
+        Each distinct pair is only run through the model once, and pairs
+        found in the cache are not run at all.  Returns a dict from pair
+        to lemma
+        """
+        lemmas = {}
+        run_model = []
+        for pair, skip_pair in zip(pairs, skip):
+            if skip_pair or pair in lemmas:
+                run_model.append(False)
+                continue
+            lemma = self._cache.get(pair)
+            lemmas[pair] = lemma
+            run_model.append(lemma is None)
+
+        if any(run_model):
+            seq2seq_batch = DataLoader(document, self.config['batch_size'], self.config, vocab=self.vocab,
+                                       evaluation=True, skip=[not x for x in run_model])
+            preds = []
+            edits = []
+            for i, b in enumerate(seq2seq_batch):
+                ps, es = self.trainer.predict(b, self.config['beam_size'])
+                preds += ps
+                if es is not None:
+                    edits += es
+            model_pairs = [pair for pair, x in zip(pairs, run_model) if x]
+            preds = self.trainer.postprocess([text for text, _ in model_pairs], preds, edits=edits)
+            for pair, lemma in zip(model_pairs, preds):
+                lemmas[pair] = lemma
+                self._cache.put(pair, lemma)
+        logger.debug("Lemma cache: %s", self._cache.stats())
+        return lemmas
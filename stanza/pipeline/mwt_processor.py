@@ -3,12 +3,16 @@ Processor for performing multi-word-token expansion
 """
 
 import io
+import logging
 
+from stanza.models.common.lru_cache import LRUCache
 from stanza.models.mwt.data import DataLoader
 from stanza.models.mwt.trainer import Trainer
 from stanza.pipeline._constants import *
 from stanza.pipeline.processor import UDProcessor, register_processor
 
+logger = logging.getLogger('stanza')
+
 @register_processor(MWT)
 class MWTProcessor(UDProcessor):
 
@@ -17,29 +21,69 @@ class MWTProcessor(UDProcessor):
     # set of processor requirements for this processor
     REQUIRES_DEFAULT = set([TOKENIZE])
 
+    # default number of token expansions remembered from the seq2seq model
+    DEFAULT_CACHE_SIZE = 10000
+
     def _set_up_model(self, config, pipeline, use_gpu):
         self._trainer = Trainer(model_file=config['model_path'], use_cuda=use_gpu)
+        self._cache = LRUCache(int(config.get('cache_size', MWTProcessor.DEFAULT_CACHE_SIZE)))
+
+    @property
+    def cache(self):
+        """
+        The LRUCache of seq2seq expansions, keyed by the text of the token
+        """
+        return self._cache
 
     def process(self, document):
-        batch = DataLoader(document, self.config['batch_size'], self.config, vocab=self.vocab, evaluation=True)
-        if len(batch) > 0:
-            dict_preds = self.trainer.predict_dict(batch.doc.get_mwt_expansions(evaluation=True))
+        words = document.get_mwt_expansions(evaluation=True)
+        if len(words) > 0:
             # decide trainer type and run eval
             if self.config['dict_only']:
-                preds = dict_preds
+                preds = self.trainer.predict_dict(words)
+            elif self.config.get('ensemble_dict', False):
+                # skip the seq2seq model for the words the dict knows
+                skip = self.trainer.skip_seq2seq(words)
+                expansions = self._predict_seq2seq(words, skip)
+                preds = self.trainer.ensemble(words, [expansions[w] if not s else '' for w, s in zip(words, skip)])
             else:
-                preds = []
-                for i, b in enumerate(batch):
-                    preds += self.trainer.predict(b)
-
-                if self.config.get('ensemble_dict', False):
-                    preds = self.trainer.ensemble(batch.doc.get_mwt_expansions(evaluation=True), preds)
+                expansions = self._predict_seq2seq(words, [False] * len(words))
+                preds = [expansions[w] for w in words]
         else:
             # skip eval if dev data does not exist
             preds = []
 
-        batch.doc.set_mwt_expansions(preds)
-        return batch.doc
+        document.set_mwt_expansions(preds)
+        return document
+
+    def _predict_seq2seq(self, words, skip):
+        """
+        Expand the words which are not skipped with the seq2seq model
+
+        Each distinct word is only run through the model once, and words
+        found in the cache are not run at all.  Returns a dict from word
+        to expansion
+        """
+        expansions = {}
+        run_model = []
+        for word, skip_word in zip(words, skip):
+            if skip_word or word in expansions:
+                continue
+            expansion = self._cache.get(word)
+            expansions[word] = expansion
+            if expansion is None:
+                run_model.append(word)
+
+        if run_model:
+            batch = DataLoader(run_model, self.config['batch_size'], self.config, vocab=self.vocab, evaluation=True)
+            preds = []
+            for i, b in enumerate(batch):
+                preds += self.trainer.predict(b)
+            for word, expansion in zip(run_model, preds):
+                expansions[word] = expansion
+                self._cache.put(word, expansion)
+        logger.debug("MWT cache: %s", self._cache.stats())
+        return expansions
 
     def bulk_process(self, docs):
         """
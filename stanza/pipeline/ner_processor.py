@@ -1,8 +1,11 @@
 """
 Processor for performing named entity tagging.
 """
+from collections import defaultdict
 import logging
 
+import torch
+
 from stanza.models.common import doc
 from stanza.models.common.utils import unsort
 from stanza.models.ner.data import DataLoader
@@ -51,6 +54,28 @@ class NERProcessor(UDProcessor):
 
         self._trainer = self.trainers[0]
         self.model_paths = model_paths
+        self._tie_word_embeddings()
+
+    def _tie_word_embeddings(self):
+        """
+        Let models which did not finetune the same pretrain use a single word embedding
+
+        Besides saving memory, this lets process() look up the
+        embeddings of each batch once for all of those models
+        """
+        for idx, trainer in enumerate(self.trainers):
+            model = trainer.model
+            if 'word_emb' not in model.unsaved_modules:
+                continue
+            for other_idx, other in enumerate(self.trainers[:idx]):
+                other = other.model
+                if ('word_emb' in other.unsaved_modules and
+                    other.args.get('lowercase', True) == model.args.get('lowercase', True) and
+                    other.vocab['word'].state_dict() == model.vocab['word'].state_dict() and
+                    torch.equal(other.word_emb.weight, model.word_emb.weight)):
+                    logger.debug("Sharing word embedding of %s with %s", self.model_paths[idx], self.model_paths[other_idx])
+                    model.word_emb = other.word_emb
+                    break
 
     def _set_up_final_config(self, config):
         """ Finalize the configurations for this processor, based off of values from a UD model. """
@@ -76,14 +101,24 @@ class NERProcessor(UDProcessor):
         self.trainers = None
 
     def process(self, document):
-        all_preds = []
+        loaders = []
         for trainer, config in zip(self.trainers, self.configs):
             # set up a eval-only data loader and skip tag preprocessing
             batch = DataLoader(document, config['batch_size'], config, vocab=trainer.vocab, evaluation=True, preprocess_tags=False, bert_tokenizer=trainer.bert_tokenizer)
-            preds = []
-            for i, b in enumerate(batch):
-                preds += trainer.predict(b)
-            all_preds.append(preds)
+            loaders.append(batch)
+
+        # models with the same batch size see the same sentences in each
+        # batch, so the charlm, transformer and word embedding outputs
+        # they have in common are computed once per batch
+        groups = defaultdict(list)
+        for idx, (loader, config) in enumerate(zip(loaders, self.configs)):
+            groups[(config['batch_size'], config.get('bert_model', None))].append(idx)
+        all_preds = [[] for _ in self.trainers]
+        for group in groups.values():
+            for batches in zip(*[loaders[idx] for idx in group]):
+                cache = {}
+                for idx, b in zip(group, batches):
+                    all_preds[idx] += self.trainers[idx].predict(b, cache=cache)
         # for each sentence, gather a list of predictions
         # merge those predictions into a single list
         # earlier models will have precedence
@@ -0,0 +1,212 @@
+"""
+Runs a Pipeline over several worker processes which share a single copy of the models
+
+The models are loaded once in the parent process and their tensors are
+moved to shared memory.  The workers are then forked from the parent,
+so each worker annotates documents with the same weights instead of
+loading its own copy of the pretrained embeddings, charlms, etc.
+"""
+
+from collections import deque
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+import torch
+from torch import nn
+
+from stanza.pipeline.core import Pipeline
+
+logger = logging.getLogger('stanza')
+
+# the pipeline used by a worker process.  set by the pool initializer
+_worker_pipeline = None
+
+def _init_worker(pipeline, num_threads):
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+    torch.set_num_threads(num_threads)
+
+def _process_batch(batch, processors):
+    return _worker_pipeline.process(batch, processors=processors)
+
+def _find_modules(obj, modules, seen, depth=3):
+    """
+    Collect the nn.Modules reachable from obj through attributes, lists, tuples and dicts
+
+    The search stops at the first Module on each path, as share_memory() on
+    a Module already covers its children.  References back to the
+    Pipeline are not followed.
+    """
+    if depth < 0 or isinstance(obj, (Pipeline, type)):
+        return
+    if isinstance(obj, nn.Module):
+        if id(obj) not in seen:
+            seen.add(id(obj))
+            modules.append(obj)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _find_modules(item, modules, seen, depth)
+    elif isinstance(obj, dict):
+        for item in obj.values():
+            _find_modules(item, modules, seen, depth)
+    elif hasattr(obj, '__dict__'):
+        for item in vars(obj).values():
+            _find_modules(item, modules, seen, depth - 1)
+
+def _pipeline_modules(pipeline):
+    """
+    All of the models used by a Pipeline's processors and its FoundationCache
+    """
+    modules = []
+    seen = set()
+    for processor in pipeline.processors.values():
+        _find_modules(processor, modules, seen)
+    for model, _ in pipeline.foundation_cache.bert.values():
+        _find_modules(model, modules, seen)
+    for charlm in pipeline.foundation_cache.charlms.values():
+        _find_modules(charlm, modules, seen)
+    return modules
+
+def share_pipeline_memory(pipeline):
+    """
+    Move the tensors of a Pipeline's models to shared memory
+
+    Pretrained embeddings are converted first.  Models built with
+    torch.from_numpy on a Pretrain's matrix are then pointed at the
+    shared copy, so the embedding is stored only once no matter how
+    many processors use it.  Memory mapped pretrains are left alone,
+    as the workers already share them through the page cache.
+    """
+    shared = {}
+    mapped = set()
+    for pretrain in pipeline.foundation_cache.pretrains.values():
+        emb = getattr(pretrain, '_emb', None)
+        if isinstance(emb, np.memmap):
+            mapped.add(torch.from_numpy(emb).data_ptr())
+            continue
+        if not isinstance(emb, np.ndarray):
+            continue
+        original = torch.from_numpy(emb)
+        tensor = torch.empty_like(original).share_memory_()
+        tensor.copy_(original)
+        shared[original.data_ptr()] = tensor
+        pretrain._emb = tensor.numpy()
+
+    modules = _pipeline_modules(pipeline)
+    for module in modules:
+        for tensor in list(module.parameters()) + list(module.buffers()):
+            if tensor.data_ptr() in mapped:
+                continue
+            shared_tensor = shared.get(tensor.data_ptr())
+            if shared_tensor is not None and shared_tensor.shape == tensor.shape and shared_tensor.dtype == tensor.dtype:
+                tensor.data = shared_tensor
+            tensor.share_memory_()
+    logger.debug("Moved %d models and %d pretrains to shared memory", len(modules), len(shared))
+
+class PipelinePool:
+    """
+    Annotates documents in parallel with several worker processes
+
+    The pipeline is built once in this process, on the CPU, and the
+    workers are forked from it.  Results are returned in the same order
+    as the input.  Requires the fork start method, so this is not
+    available on Windows.
+
+    Example:
+      with PipelinePool('en', processors='tokenize,pos', num_workers=4) as pool:
+          for doc in pool.stream(texts):
+              ...
+    """
+    def __init__(self, lang='en', num_workers=None, batch_docs=50, max_chars=None, threads_per_worker=1, pipeline=None, **kwargs):
+        """
+        num_workers: number of worker processes.  defaults to the number of CPUs
+        batch_docs, max_chars: how to split the input into batches, as in Pipeline.stream
+        threads_per_worker: torch threads used by each worker
+        pipeline: an already built Pipeline to use instead of building one from lang & kwargs
+        """
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1, got %d" % num_workers)
+        if batch_docs < 1:
+            raise ValueError("batch_docs must be at least 1, got %d" % batch_docs)
+
+        if pipeline is None:
+            if kwargs.get('use_gpu'):
+                logger.warning("PipelinePool only runs on the CPU.  Ignoring use_gpu")
+            kwargs['use_gpu'] = False
+            pipeline = Pipeline(lang, **kwargs)
+        # the workers should share the models rather than each loading its own.
+        # with lazy_load, this also waits for any processors still loading in
+        # the background, so the workers are not forked in the middle of a load
+        pipeline.load_processors()
+        if any(param.is_cuda for module in _pipeline_modules(pipeline) for param in module.parameters()):
+            raise ValueError("PipelinePool requires a pipeline with its models on the CPU")
+
+        share_pipeline_memory(pipeline)
+        self.pipeline = pipeline
+        self.num_workers = num_workers
+        self.batch_docs = batch_docs
+        self.max_chars = max_chars
+
+        context = multiprocessing.get_context('fork')
+        self._pool = context.Pool(num_workers, initializer=_init_worker, initargs=(pipeline, threads_per_worker))
+
+    def stream(self, docs, processors=None, max_pending=None):
+        """
+        Annotate an iterable of str or Document, yielding the results in input order
+
+        At most max_pending batches, by default twice the number of
+        workers, are sent to the workers at once, so the input is read
+        lazily and can be arbitrarily long.
+        """
+        if self._pool is None:
+            raise RuntimeError("PipelinePool has been closed")
+        if max_pending is None:
+            max_pending = 2 * self.num_workers
+        processors = self.pipeline._resolve_processors(processors)
+        pending = deque()
+        for batch in Pipeline._batch_documents(docs, self.batch_docs, self.max_chars):
+            pending.append(self._pool.apply_async(_process_batch, (batch, processors)))
+            while len(pending) >= max_pending:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+    def process(self, docs, processors=None):
+        """
+        Annotate a list of str or Document, returning a list of Document
+        """
+        return list(self.stream(docs, processors=processors))
+
+    def __call__(self, docs, processors=None):
+        return self.process(docs, processors)
+
+    def close(self):
+        """
+        Shut down the worker processes
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def terminate(self):
+        """
+        Stop the worker processes immediately, abandoning any work in progress
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
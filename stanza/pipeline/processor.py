@@ -4,6 +4,7 @@ Base classes for processors
 
 from abc import ABC, abstractmethod
 
+from stanza.models.common.columnar_doc import ColumnarDocument
 from stanza.models.common.doc import Document
 from stanza.pipeline.registry import NAME_TO_PROCESSOR_CLASS, PIPELINE_NAMES, PROCESSOR_VARIANTS
 
@@ -230,7 +231,11 @@ class UDProcessor(Processor):
             return self._variant.bulk_process(docs)
 
         combined_sents = [sent for doc in docs for sent in doc.sentences]
-        combined_doc = Document([])
+        if all(isinstance(doc, ColumnarDocument) for doc in docs):
+            # get, set, and the mwt expansions then still work on the columns of each doc
+            combined_doc = ColumnarDocument([])
+        else:
+            combined_doc = Document([])
         combined_doc.sentences = combined_sents
         combined_doc.num_tokens = sum(doc.num_tokens for doc in docs)
         combined_doc.num_words = sum(doc.num_words for doc in docs)
@@ -259,7 +264,8 @@ def register_processor(name):
             raise ProcessorRegisterException(Cls, Processor)
 
         NAME_TO_PROCESSOR_CLASS[name] = Cls
-        PIPELINE_NAMES.append(name)
+        if name not in PIPELINE_NAMES:
+            PIPELINE_NAMES.append(name)
         return Cls
     return wrapper
 
@@ -1,8 +1,77 @@
 from collections import defaultdict
+from collections.abc import MutableMapping
+import importlib
+
+class LazyRegistry(MutableMapping):
+    """
+    A dict of registered classes which imports a class's module when it is first looked up
+
+    Names added with add_module are known before their module is
+    imported, so checking membership or iterating does not import
+    anything.  The module's register decorator then fills in the class.
+    """
+    def __init__(self, modules=None):
+        self._classes = dict()
+        self._modules = dict(modules) if modules else dict()
+
+    def add_module(self, name, module):
+        self._modules[name] = module
+
+    def __getitem__(self, name):
+        if name not in self._classes and name in self._modules:
+            importlib.import_module(self._modules[name])
+        return self._classes[name]
+
+    def __setitem__(self, name, cls):
+        self._classes[name] = cls
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        self._classes.pop(name, None)
+        self._modules.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._classes or name in self._modules
+
+    def __iter__(self):
+        yield from self._classes
+        yield from (name for name in self._modules if name not in self._classes)
+
+    def __len__(self):
+        return len(self._classes.keys() | self._modules.keys())
+
+    def __repr__(self):
+        return "LazyRegistry(%s)" % list(self)
+
+# the builtin processors, in the order they run in a pipeline
+# register_processor fills in the classes when the modules are imported
+BUILTIN_PROCESSORS = {
+    'langid':       'stanza.pipeline.langid_processor',
+    'tokenize':     'stanza.pipeline.tokenize_processor',
+    'mwt':          'stanza.pipeline.mwt_processor',
+    'pos':          'stanza.pipeline.pos_processor',
+    'lemma':        'stanza.pipeline.lemma_processor',
+    'depparse':     'stanza.pipeline.depparse_processor',
+    'sentiment':    'stanza.pipeline.sentiment_processor',
+    'constituency': 'stanza.pipeline.constituency_processor',
+    'ner':          'stanza.pipeline.ner_processor',
+}
+
+BUILTIN_VARIANTS = {
+    'tokenize': {
+        'jieba':     'stanza.pipeline.external.jieba',
+        'spacy':     'stanza.pipeline.external.spacy',
+        'sudachipy': 'stanza.pipeline.external.sudachipy',
+        'pythainlp': 'stanza.pipeline.external.pythainlp',
+    },
+}
 
 # these two get filled by register_processor
-NAME_TO_PROCESSOR_CLASS = dict()
-PIPELINE_NAMES = []
+NAME_TO_PROCESSOR_CLASS = LazyRegistry(BUILTIN_PROCESSORS)
+PIPELINE_NAMES = list(BUILTIN_PROCESSORS)
 
 # this gets filled by register_processor_variant
-PROCESSOR_VARIANTS = defaultdict(dict)
+PROCESSOR_VARIANTS = defaultdict(LazyRegistry)
+for processor_name, variants in BUILTIN_VARIANTS.items():
+    PROCESSOR_VARIANTS[processor_name] = LazyRegistry(variants)
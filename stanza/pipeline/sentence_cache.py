@@ -0,0 +1,185 @@
+"""
+Reuses the annotations of sentences the pipeline has already seen
+
+Web text repeats a lot of sentences word for word: cookie banners,
+navigation, legal footers.  The processors after tokenization work on
+one sentence at a time, so a sentence with the same tokens and words
+always gets the same POS tags, lemmas, dependencies, NER tags,
+sentiment, and constituency tree.  SentenceCache remembers those
+annotations, keyed by the tokens and words of the sentence and by the
+configuration of the processors, so only sentences which have not been
+seen before are sent to the models.
+
+The cache is turned on with the sentence_cache_size argument of
+Pipeline, and can be saved to and loaded from a file with
+sentence_cache_path:
+
+  nlp = stanza.Pipeline("en", sentence_cache_size=100000, sentence_cache_path="cache.pkl")
+  doc = nlp(text)
+  print(nlp.sentence_cache.stats())
+  nlp.save_sentence_cache()
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+
+from stanza._version import __version__
+from stanza.models.common.columnar_doc import ColumnarDocument
+from stanza.models.common.doc import Document
+from stanza.models.common.lru_cache import LRUCache
+from stanza.pipeline._constants import DEPPARSE, NER
+
+logger = logging.getLogger('stanza')
+
+CACHE_FILE_VERSION = 1
+
+WORD_FIELDS = ('lemma', 'upos', 'xpos', 'feats', 'head', 'deprel', 'deps')
+TOKEN_FIELDS = ('ner', 'multi_ner')
+SENTENCE_FIELDS = ('sentiment', 'constituency')
+
+def sentence_key(sentence):
+    """
+    The tokens of the sentence and the words of each token
+
+    The character offsets are left out, so the same sentence at a
+    different place in a document has the same key
+    """
+    return tuple((token.text, tuple(word.text for word in token.words)) for token in sentence.tokens)
+
+def extract_annotations(sentence):
+    """
+    Return the annotations of the words, tokens, and sentence which the processors set
+    """
+    words = tuple(tuple(getattr(word, field) for field in WORD_FIELDS) for word in sentence.words)
+    tokens = tuple(tuple(getattr(token, field) for field in TOKEN_FIELDS) for token in sentence.tokens)
+    sentence_values = tuple(getattr(sentence, field, None) for field in SENTENCE_FIELDS)
+    return words, tokens, sentence_values
+
+def apply_annotations(sentence, annotations):
+    words, tokens, sentence_values = annotations
+    for word, values in zip(sentence.words, words):
+        for field, value in zip(WORD_FIELDS, values):
+            setattr(word, field, value)
+    for token, values in zip(sentence.tokens, tokens):
+        for field, value in zip(TOKEN_FIELDS, values):
+            setattr(token, field, value)
+    for field, value in zip(SENTENCE_FIELDS, sentence_values):
+        if value is not None:
+            setattr(sentence, field, value)
+
+class SentenceCache:
+    """
+    A bounded cache from sentences to the annotations the processors gave them
+    """
+    def __init__(self, max_size, path=None):
+        """
+        max_size: the most sentences to remember.  The least recently used are dropped first
+        path: a file written by save().  It is loaded here if it exists
+        """
+        self.cache = LRUCache(max_size)
+        self.path = path
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def config_key(pipeline, processor_names):
+        """
+        A hash of the configuration of the processors, so annotations from a different model or setting are not reused
+        """
+        config = {name: pipeline.filter_config(name, pipeline.config) for name in processor_names}
+        config = json.dumps([__version__, pipeline.lang, processor_names, config], sort_keys=True, default=str)
+        return hashlib.sha1(config.encode('utf-8')).hexdigest()
+
+    def process(self, pipeline, docs, processor_names):
+        """
+        Run the processors on the sentences of docs which are not in the cache, and copy the annotations to the rest
+
+        docs have already been tokenized.  A sentence which appears
+        several times in docs is only annotated once.
+        """
+        config_key = self.config_key(pipeline, processor_names)
+        # sentences to annotate, keyed by cache key, and the sentences which copy from them
+        misses = {}
+        copies = []
+        for doc in docs:
+            for sentence in doc.sentences:
+                key = (config_key, sentence_key(sentence))
+                if key in misses:
+                    copies.append((sentence, key))
+                    continue
+                annotations = self.cache.get(key)
+                if annotations is None:
+                    misses[key] = sentence
+                else:
+                    apply_annotations(sentence, annotations)
+
+        if misses:
+            sentences = list(misses.values())
+            if all(isinstance(doc, ColumnarDocument) for doc in docs):
+                combined_doc = ColumnarDocument([])
+            else:
+                combined_doc = Document([])
+            combined_doc.sentences = sentences
+            combined_doc.num_tokens = sum(len(sentence.tokens) for sentence in sentences)
+            combined_doc.num_words = sum(len(sentence.words) for sentence in sentences)
+            for processor_name in processor_names:
+                processor = pipeline.load_processor(processor_name)
+                processor.bulk_process([combined_doc])
+            for key, sentence in misses.items():
+                self.cache.put(key, extract_annotations(sentence))
+            for sentence, key in copies:
+                apply_annotations(sentence, extract_annotations(misses[key]))
+
+        logger.debug("Sentence cache: annotated %d sentences, reused %d", len(misses), sum(len(doc.sentences) for doc in docs) - len(misses))
+
+        # the dependencies and entities are built from the annotations copied above
+        for doc in docs:
+            if DEPPARSE in processor_names:
+                for sentence in doc.sentences:
+                    sentence.build_dependencies()
+            if NER in processor_names:
+                doc.build_ents()
+        return docs
+
+    def stats(self):
+        """
+        Return a dict with the size, hits, misses, and hit rate of the cache
+        """
+        return self.cache.stats()
+
+    def clear(self):
+        self.cache.clear()
+
+    def save(self, path=None):
+        """
+        Write the cached annotations to path, or to the path the cache was created with
+        """
+        path = path if path is not None else self.path
+        if path is None:
+            raise ValueError("No path given to save the sentence cache to")
+        data = {'version': CACHE_FILE_VERSION,
+                'entries': self.cache.items()}
+        # write to a temp file first so an interrupted save does not lose the old cache
+        temp_path = path + ".tmp"
+        with open(temp_path, 'wb') as fout:
+            pickle.dump(data, fout, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        logger.debug("Saved %d sentences to the sentence cache at %s", len(self.cache), path)
+
+    def load(self, path):
+        """
+        Add the annotations saved in path to the cache
+        """
+        with open(path, 'rb') as fin:
+            data = pickle.load(fin)
+        if not isinstance(data, dict) or data.get('version', None) != CACHE_FILE_VERSION:
+            raise ValueError("%s is not a sentence cache file this version of stanza can read" % path)
+        for key, annotations in data['entries']:
+            self.cache.put(key, annotations)
+        logger.debug("Loaded %d sentences into the sentence cache from %s", len(self.cache), path)
+
+    def __len__(self):
+        return len(self.cache)
@@ -5,6 +5,7 @@ Processor for performing tokenization
 import io
 import logging
 
+from stanza.models.common.columnar_doc import ColumnarDocument
 from stanza.models.tokenization.data import TokenizationDataset
 from stanza.models.tokenization.trainer import Trainer
 from stanza.models.tokenization.utils import output_predictions
@@ -13,12 +14,6 @@ from stanza.pipeline.processor import UDProcessor, register_processor
 from stanza.pipeline.registry import PROCESSOR_VARIANTS
 from stanza.models.common import doc
 
-# these imports trigger the "register_variant" decorations
-from stanza.pipeline.external.jieba import JiebaTokenizer
-from stanza.pipeline.external.spacy import SpacyTokenizer
-from stanza.pipeline.external.sudachipy import SudachiPyTokenizer
-from stanza.pipeline.external.pythainlp import PyThaiNLPTokenizer
-
 logger = logging.getLogger('stanza')
 
 # class for running the tokenizer
@@ -58,13 +53,21 @@ class TokenizeProcessor(UDProcessor):
         for sentence in sentences:
             sent = []
             for token_id, token in enumerate(sentence):
-                sent.append({doc.ID: (token_id + 1, ), doc.TEXT: token, doc.MISC: f'start_char={idx}|end_char={idx + len(token)}'})
+                sent.append({doc.ID: (token_id + 1, ), doc.TEXT: token, doc.START_CHAR: idx, doc.END_CHAR: idx + len(token)})
                 idx += len(token) + 1
             document.append(sent)
         raw_text = ' '.join([' '.join(sentence) for sentence in sentences])
         return raw_text, document
 
+    @property
+    def document_class(self):
+        """ Documents are built as ColumnarDocuments if the tokenizer is run with columnar=True """
+        return ColumnarDocument if self.config.get('columnar', False) else doc.Document
+
     def process(self, document):
+        return self._process(document, self.document_class)
+
+    def _process(self, document, document_class):
         assert isinstance(document, str) or isinstance(document, doc.Document) or (self.config.get('pretokenized') or self.config.get('no_ssplit', False)), \
             "If neither 'pretokenized' or 'no_ssplit' option is enabled, the input to the TokenizerProcessor must be a string or a Document object."
 
@@ -75,10 +78,13 @@ class TokenizeProcessor(UDProcessor):
 
         if self.config.get('pretokenized'):
             raw_text, document = self.process_pre_tokenized_text(document)
-            return doc.Document(document, raw_text)
+            return document_class(document, raw_text)
 
         if hasattr(self, '_variant'):
-            return self._variant.process(document)
+            document = self._variant.process(document)
+            if document_class is ColumnarDocument:
+                document = ColumnarDocument.convert(document)
+            return document
 
         raw_text = '\n\n'.join(document) if isinstance(document, list) else document
         # set up batches
@@ -89,7 +95,7 @@ class TokenizeProcessor(UDProcessor):
                                                orig_text=raw_text,
                                                no_ssplit=self.config.get('no_ssplit', False),
                                                num_workers = self.config.get('num_workers', 0))
-        return doc.Document(document, raw_text)
+        return document_class(document, raw_text)
 
     def bulk_process(self, docs):
         """
@@ -98,17 +104,20 @@ class TokenizeProcessor(UDProcessor):
         then splits the result into the original Documents and recovers the original character offsets.
         """
         if hasattr(self, '_variant'):
-            return self._variant.bulk_process(docs)
+            docs = self._variant.bulk_process(docs)
+            if self.document_class is ColumnarDocument:
+                docs = [ColumnarDocument.convert(thisdoc) for thisdoc in docs]
+            return docs
 
         if self.config.get('pretokenized'):
             res = []
             for document in docs:
                 raw_text, document = self.process_pre_tokenized_text(document.text)
-                res.append(doc.Document(document, raw_text))
+                res.append(self.document_class(document, raw_text))
             return res
 
         combined_text = '\n\n'.join([thisdoc.text for thisdoc in docs])
-        processed_combined = self.process(doc.Document([], text=combined_text))
+        processed_combined = self._process(doc.Document([], text=combined_text), doc.Document)
 
         # postprocess sentences and tokens to reset back pointers and char offsets
         charoffset = 0
@@ -138,4 +147,8 @@ class TokenizeProcessor(UDProcessor):
 
             charoffset += len(thisdoc.text) + 2
 
+        if self.document_class is ColumnarDocument:
+            # the sentences are moved between documents above, so the conversion happens afterwards.
+            # the documents are converted in place so the caller's documents get the later annotations
+            docs = [ColumnarDocument.convert(thisdoc) for thisdoc in docs]
         return docs
@@ -0,0 +1,26 @@
+"""
+Test the biaffine scorers used by the dependency parser
+"""
+
+import pytest
+import torch
+
+from stanza.models.common.biaffine import DeepBiaffineScorer
+
+pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
+
+def test_forward_pairs():
+    """
+    Scoring only the selected pairs gives the same scores as gathering them from the full forward
+    """
+    torch.manual_seed(1234)
+    scorer = DeepBiaffineScorer(8, 8, 12, 5, pairwise=True)
+    scorer.eval()
+    inputs = torch.randn(3, 7, 8)
+    index = torch.randint(0, 7, (3, 7))
+    with torch.no_grad():
+        full = scorer(inputs, inputs)
+        pairs = scorer.forward_pairs(inputs, inputs, index)
+    assert pairs.shape == (3, 7, 5)
+    expected = torch.gather(full, 2, index.unsqueeze(2).unsqueeze(3).expand(-1, -1, -1, 5)).squeeze(2)
+    assert torch.allclose(pairs, expected, atol=1e-5)
@@ -0,0 +1,142 @@
+"""
+Test the binary serialization of documents and the document files
+"""
+
+import pytest
+
+from stanza.models.common.doc import Document, ID, TEXT, LEMMA, UPOS, HEAD, DEPREL, MISC, NER
+from stanza.models.common.binary_doc import document_to_bytes, document_from_bytes, DocumentWriter, DocumentReader
+from stanza.models.common.columnar_doc import ColumnarDocument
+from stanza.utils.conll import CoNLL
+
+pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
+
+TEXT_DOC = "Je vais au marché. Il pleut."
+
+def build_doc(index=0):
+    sentences = [[{ID: 1, TEXT: "Je", LEMMA: "je", UPOS: "PRON", HEAD: 2, DEPREL: "nsubj", NER: "O", MISC: "start_char=0|end_char=2"},
+                  {ID: 2, TEXT: "vais", LEMMA: "aller", UPOS: "VERB", HEAD: 0, DEPREL: "root", NER: "O", MISC: "start_char=3|end_char=7"},
+                  {ID: (3, 4), TEXT: "au", NER: "O", MISC: "start_char=8|end_char=10"},
+                  {ID: 3, TEXT: "à", LEMMA: "à", UPOS: "ADP", HEAD: 5, DEPREL: "case"},
+                  {ID: 4, TEXT: "le", LEMMA: "le", UPOS: "DET", HEAD: 5, DEPREL: "det"},
+                  {ID: 5, TEXT: "marché", LEMMA: "marché", UPOS: "NOUN", HEAD: 2, DEPREL: "obl", NER: "S-LOC", MISC: "start_char=11|end_char=17|SpaceAfter=No"},
+                  {ID: 6, TEXT: ".", LEMMA: ".", UPOS: "PUNCT", HEAD: 2, DEPREL: "punct", NER: "O", MISC: "start_char=17|end_char=18"}],
+                 [{ID: 1, TEXT: "Il", LEMMA: "il", UPOS: "PRON", HEAD: 2, DEPREL: "expl", MISC: "start_char=19|end_char=21"},
+                  {ID: 2, TEXT: "pleut", LEMMA: "pleuvoir", UPOS: "VERB", HEAD: 0, DEPREL: "root", MISC: "start_char=22|end_char=27"},
+                  {ID: 3, TEXT: ".", LEMMA: ".", UPOS: "PUNCT", HEAD: 2, DEPREL: "punct", MISC: "start_char=27|end_char=28"}]]
+    doc = Document(sentences, text=TEXT_DOC, comments=[["# sent_id = %d" % index], []])
+    doc.lang = "fr"
+    return doc
+
+def check_same(loaded, doc):
+    assert isinstance(loaded, ColumnarDocument)
+    assert loaded.to_dict() == doc.to_dict()
+    assert CoNLL.doc2conll_text(loaded) == CoNLL.doc2conll_text(doc)
+    assert loaded.text == doc.text
+    assert loaded.lang == doc.lang
+    assert [sentence.text for sentence in loaded.sentences] == [sentence.text for sentence in doc.sentences]
+    assert [sentence.comments for sentence in loaded.sentences] == [sentence.comments for sentence in doc.sentences]
+
+def test_round_trip():
+    """
+    A document comes back with the same annotations, from either kind of Document
+    """
+    doc = build_doc()
+    data = document_to_bytes(doc)
+    loaded = document_from_bytes(data)
+    check_same(loaded, doc)
+    assert [ent.text for ent in loaded.ents] == ["marché"]
+    assert loaded.sentences[0].words[3].head == 5
+    assert loaded.sentences[1].dependencies[0][1] == "expl"
+
+    # writing the columns directly gives the same bytes as converting the Document
+    assert document_to_bytes(loaded) == data
+    assert document_to_bytes(ColumnarDocument.from_document(doc)) == data
+
+def test_no_offsets():
+    """
+    Documents without character offsets or annotations round trip as well
+    """
+    doc = Document([[{ID: 1, TEXT: "unban"}, {ID: 2, TEXT: "mox"}], [{ID: 1, TEXT: "opal"}]])
+    loaded = document_from_bytes(document_to_bytes(doc))
+    check_same(loaded, doc)
+    assert loaded.sentences[0].tokens[0].start_char is None
+
+    empty = document_from_bytes(document_to_bytes(Document([])))
+    assert len(empty.sentences) == 0
+
+def test_loaded_doc_can_be_changed():
+    doc = document_from_bytes(document_to_bytes(build_doc()))
+    doc.set([UPOS], ["X"] * doc.num_words)
+    assert doc.sentences[1].words[0].upos == "X"
+
+def test_bad_data():
+    with pytest.raises(ValueError):
+        document_from_bytes(b"not a document")
+    data = document_to_bytes(build_doc())
+    with pytest.raises(ValueError):
+        document_from_bytes(data[:-10])
+
+def test_document_file(tmp_path):
+    """
+    Documents can be appended to a file, then read in order or by index
+    """
+    filename = tmp_path / "docs.bin"
+    with DocumentWriter(filename) as writer:
+        for index in range(3):
+            writer.write(build_doc(index))
+    # opening the file again adds to the end
+    with DocumentWriter(filename) as writer:
+        writer.write(build_doc(3))
+
+    with DocumentReader(filename) as reader:
+        assert reader[2].sentences[0].sent_id == "2"
+        assert len(reader) == 4
+        assert reader[-1].sentences[0].sent_id == "3"
+        assert [doc.sentences[0].sent_id for doc in reader] == ["0", "1", "2", "3"]
+        with pytest.raises(IndexError):
+            reader[4]
+        check_same(reader[0], build_doc(0))
+
+def test_partial_document(tmp_path):
+    """
+    A document which was only partly written is skipped
+    """
+    filename = tmp_path / "docs.bin"
+    with DocumentWriter(filename) as writer:
+        writer.write(build_doc(0))
+        writer.write(build_doc(1))
+    with open(filename, "r+b") as fout:
+        fout.truncate(filename.stat().st_size - 5)
+
+    with DocumentReader(filename) as reader:
+        assert [doc.sentences[0].sent_id for doc in reader] == ["0"]
+        assert len(reader) == 1
+
+def test_not_a_document_file(tmp_path):
+    filename = tmp_path / "docs.bin"
+    filename.write_bytes(b"something else")
+    with pytest.raises(ValueError):
+        DocumentReader(filename)
+    with pytest.raises(ValueError):
+        DocumentWriter(filename)
+
+def test_append_after_partial_document(tmp_path):
+    """
+    Appending to a file which ends with a partly written document cuts off that document first
+    """
+    filename = tmp_path / "docs.bin"
+    with DocumentWriter(filename) as writer:
+        writer.write(build_doc(0))
+        writer.write(build_doc(1))
+    with open(filename, "r+b") as fout:
+        fout.truncate(filename.stat().st_size - 10)
+
+    with DocumentWriter(filename) as writer:
+        writer.write(build_doc(2))
+        writer.write(build_doc(3))
+
+    with DocumentReader(filename) as reader:
+        assert len(reader) == 3
+        for doc, index in zip(reader, [0, 2, 3]):
+            check_same(doc, build_doc(index))
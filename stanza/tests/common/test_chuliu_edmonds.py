@@ -0,0 +1,97 @@
+"""
+Test the MST and projective decoders used by the dependency parser
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from stanza.models.common.chuliu_edmonds import chuliu_edmonds_one_root, chuliu_edmonds_one_root_batch
+from stanza.models.common.eisner import eisner, eisner_batch
+
+pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
+
+def is_tree(tree):
+    """
+    Check that every word reaches the root and exactly one word is attached to it
+    """
+    if sum(1 for head in tree[1:] if head == 0) != 1:
+        return False
+    for word in range(1, len(tree)):
+        seen = set()
+        while word != 0:
+            if word in seen:
+                return False
+            seen.add(word)
+            word = tree[word]
+    return True
+
+def is_projective(tree):
+    for word in range(1, len(tree)):
+        left, right = sorted((word, tree[word]))
+        for inside in range(left + 1, right):
+            # everything between a word and its head must be a descendant of the head
+            while inside != 0 and inside != tree[word]:
+                inside = tree[inside]
+            if inside != tree[word]:
+                return False
+    return True
+
+def tree_score(scores, tree):
+    return sum(scores[word, head] for word, head in enumerate(tree) if word > 0)
+
+def test_best_trees():
+    """
+    Compare the decoders with the best trees found by trying every possible tree
+    """
+    rng = np.random.default_rng(1234)
+    for _ in range(50):
+        length = rng.integers(2, 7)
+        scores = rng.normal(size=(length, length))
+        trees = [(0,) + heads for heads in itertools.product(range(length), repeat=length-1)]
+        trees = [tree for tree in trees if is_tree(tree)]
+        best = max(tree_score(scores, tree) for tree in trees)
+        best_projective = max(tree_score(scores, tree) for tree in trees if is_projective(tree))
+
+        tree = chuliu_edmonds_one_root(scores)
+        assert is_tree(tree)
+        assert tree_score(scores, tree) == pytest.approx(best)
+
+        tree = eisner(scores)
+        assert is_tree(tree)
+        assert is_projective(tree)
+        assert tree_score(scores, tree) == pytest.approx(best_projective)
+
+def test_batch():
+    """
+    Decoding a padded batch gives the same trees as decoding each sentence
+    """
+    rng = np.random.default_rng(1234)
+    lengths = np.array([20, 2, 15, 7, 20, 11])
+    scores = rng.normal(size=(len(lengths), 20, 20)).astype(np.float32)
+    # make some of the sentences a tree already, which takes the fast path
+    for idx in (1, 3, 4):
+        scores[idx, np.arange(2, lengths[idx]), np.arange(1, lengths[idx] - 1)] += 10
+        scores[idx, 1, 0] += 10
+
+    trees = chuliu_edmonds_one_root_batch(scores, lengths)
+    projective_trees = eisner_batch(scores, lengths)
+    assert len(trees) == len(lengths)
+    for idx, length in enumerate(lengths):
+        assert np.array_equal(trees[idx], chuliu_edmonds_one_root(scores[idx, :length, :length]))
+        assert np.array_equal(projective_trees[idx], eisner(scores[idx, :length, :length]))
+
+def test_long_cycle():
+    """
+    A cycle longer than the python stack limit used to crash the recursive cycle search
+    """
+    length = 3000
+    scores = np.zeros((length, length))
+    # each word prefers the next word as its head, and the last word prefers the first
+    scores[np.arange(1, length - 1), np.arange(2, length)] = 2
+    scores[length - 1, 1] = 2
+    scores[1:, 0] = 1
+    tree = chuliu_edmonds_one_root(scores)
+    assert is_tree(tree)
+    assert tree_score(scores, tree) == 2 * (length - 2) + 1
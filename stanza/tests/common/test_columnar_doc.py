@@ -0,0 +1,144 @@
+"""
+Test that ColumnarDocument behaves the same as Document
+"""
+
+import pytest
+
+from stanza.models.common.doc import Document, ID, TEXT, LEMMA, UPOS, HEAD, DEPREL, MISC, NER, START_CHAR, END_CHAR
+from stanza.models.common.columnar_doc import ColumnarDocument, ColumnarSentence
+from stanza.utils.conll import CoNLL
+
+pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
+
+TEXT_DOC = "Je vais au marché. Il pleut."
+
+def sentences_dict():
+    return [[{ID: 1, TEXT: "Je", START_CHAR: 0, END_CHAR: 2},
+             {ID: 2, TEXT: "vais", START_CHAR: 3, END_CHAR: 7},
+             {ID: (3, 4), TEXT: "au", START_CHAR: 8, END_CHAR: 10},
+             {ID: 5, TEXT: "marché", START_CHAR: 11, END_CHAR: 17},
+             {ID: 6, TEXT: ".", START_CHAR: 17, END_CHAR: 18}],
+            [{ID: 1, TEXT: "Il", START_CHAR: 19, END_CHAR: 21},
+             {ID: 2, TEXT: "pleut", START_CHAR: 22, END_CHAR: 27},
+             {ID: 3, TEXT: ".", START_CHAR: 27, END_CHAR: 28}]]
+
+def tokenized_dict():
+    """ The same document before the MWT is expanded """
+    return [[{ID: 1, TEXT: "Je", MISC: "start_char=0|end_char=2"},
+             {ID: 2, TEXT: "vais", MISC: "start_char=3|end_char=7"},
+             {ID: 3, TEXT: "au", MISC: "start_char=8|end_char=10|MWT=Yes"},
+             {ID: 4, TEXT: "marché", MISC: "start_char=11|end_char=17"},
+             {ID: 5, TEXT: ".", MISC: "start_char=17|end_char=18"}],
+            [{ID: 1, TEXT: "Il", MISC: "start_char=19|end_char=21"},
+             {ID: 2, TEXT: "pleut", MISC: "start_char=22|end_char=27"},
+             {ID: 3, TEXT: ".", MISC: "start_char=27|end_char=28"}]]
+
+def expanded_dict():
+    sentences = sentences_dict()
+    sentences[0].insert(3, {ID: 3, TEXT: "à"})
+    sentences[0].insert(4, {ID: 4, TEXT: "le"})
+    return sentences
+
+@pytest.fixture
+def doc():
+    return Document(expanded_dict(), text=TEXT_DOC)
+
+@pytest.fixture
+def columnar_doc():
+    return ColumnarDocument(expanded_dict(), text=TEXT_DOC)
+
+def test_same_annotations(doc, columnar_doc):
+    """
+    A ColumnarDocument has the same sentences, tokens, and words as a Document
+    """
+    assert columnar_doc.num_tokens == doc.num_tokens
+    assert columnar_doc.num_words == doc.num_words
+    assert columnar_doc.to_dict() == doc.to_dict()
+    assert [sentence.text for sentence in columnar_doc.sentences] == [sentence.text for sentence in doc.sentences]
+    assert all(isinstance(sentence, ColumnarSentence) for sentence in columnar_doc.sentences)
+    assert CoNLL.doc2conll_text(columnar_doc) == CoNLL.doc2conll_text(doc)
+
+def test_get_set(doc, columnar_doc):
+    """
+    get and set on the columns give the same results as on a Document
+    """
+    upos = ["PRON", "VERB", "ADP", "DET", "NOUN", "PUNCT", "PRON", "VERB", "PUNCT"]
+    heads = [2, 0, 5, 5, 2, 2, 2, 0, 2]
+    for document in (doc, columnar_doc):
+        document.set([UPOS], upos)
+        document.set([HEAD, DEPREL], [(head, "dep") for head in heads])
+        document.set([LEMMA], ["_"] * 9)
+        document.set([NER], ["O"] * 8, to_token=True)
+        for sentence in document.sentences:
+            sentence.build_dependencies()
+
+    assert columnar_doc.get([UPOS]) == doc.get([UPOS])
+    assert columnar_doc.get([TEXT, HEAD, DEPREL], as_sentences=True) == doc.get([TEXT, HEAD, DEPREL], as_sentences=True)
+    assert columnar_doc.get([TEXT, NER], from_token=True) == doc.get([TEXT, NER], from_token=True)
+    assert columnar_doc.get(START_CHAR, from_token=True) == doc.get(START_CHAR, from_token=True)
+    assert columnar_doc.to_dict() == doc.to_dict()
+
+    # the views see the values written to the columns, and writes to the views reach the columns
+    word = columnar_doc.sentences[0].words[4]
+    assert word.upos == "NOUN"
+    assert word.head == 2
+    word.upos = "PROPN"
+    assert columnar_doc.get([UPOS])[4] == "PROPN"
+
+def test_mwt_expansion():
+    """
+    Expanding the MWTs of the tokenized document gives the same words as a Document
+    """
+    doc = Document(tokenized_dict(), text=TEXT_DOC)
+    columnar_doc = ColumnarDocument(tokenized_dict(), text=TEXT_DOC)
+    assert columnar_doc.get_mwt_expansions() == doc.get_mwt_expansions()
+
+    doc.set_mwt_expansions(["à le"])
+    columnar_doc.set_mwt_expansions(["à le"])
+    assert columnar_doc.num_words == doc.num_words == 9
+    assert columnar_doc.to_dict() == doc.to_dict()
+    assert columnar_doc.get_mwt_expansions() == doc.get_mwt_expansions()
+
+    token = columnar_doc.sentences[0].tokens[2]
+    assert [word.text for word in token.words] == ["à", "le"]
+    assert all(word.parent is token for word in token.words)
+
+def test_views_keep_identity(columnar_doc):
+    """
+    Tokens and words are views which keep attributes set on them
+    """
+    sentence = columnar_doc.sentences[0]
+    word = sentence.words[0]
+    assert sentence.words[0] is word
+    assert sentence.tokens[0].words[0] is word
+    word.some_extra = 5
+    assert sentence.words[0].some_extra == 5
+
+def test_from_document(doc):
+    """
+    Converting a Document keeps the annotations and the sentence attributes
+    """
+    doc.sentences[1].sentiment = "2"
+    doc.sentences[0].add_comment("# hello")
+    columnar_doc = ColumnarDocument.from_document(doc)
+    assert columnar_doc.to_dict() == doc.to_dict()
+    assert columnar_doc.sentences[1].sentiment == "2"
+    assert columnar_doc.sentences[0].comments == doc.sentences[0].comments
+    assert columnar_doc.text == doc.text
+
+def test_convert(doc):
+    """
+    Converting in place keeps the same object, so later annotations reach whoever holds it
+    """
+    expected = doc.to_dict()
+    sentence_text = [sentence.text for sentence in doc.sentences]
+    converted = ColumnarDocument.convert(doc)
+    assert converted is doc
+    assert isinstance(doc, ColumnarDocument)
+    assert all(isinstance(sentence, ColumnarSentence) and sentence.doc is doc for sentence in doc.sentences)
+    assert doc.to_dict() == expected
+    assert [sentence.text for sentence in doc.sentences] == sentence_text
+
+    doc.set([UPOS], ["NOUN"] * doc.num_words)
+    assert all(word.upos == "NOUN" for sentence in doc.sentences for word in sentence.words)
+    assert ColumnarDocument.convert(doc) is doc
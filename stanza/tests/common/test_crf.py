@@ -0,0 +1,24 @@
+"""
+Test the batched viterbi decoder against the single sentence version
+"""
+
+import pytest
+import torch
+
+from stanza.models.common.crf import viterbi_decode, viterbi_decode_batch
+
+pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
+
+def test_viterbi_decode_batch():
+    torch.manual_seed(1234)
+    num_tags = 7
+    lengths = [12, 9, 9, 4, 1]
+    scores = torch.randn(len(lengths), max(lengths), num_tags)
+    transitions = torch.randn(num_tags, num_tags)
+
+    tags, tag_scores = viterbi_decode_batch(scores, lengths, transitions)
+    assert len(tags) == len(lengths)
+    for sentence_scores, length, sentence_tags, sentence_score in zip(scores, lengths, tags, tag_scores):
+        expected_tags, expected_score = viterbi_decode(sentence_scores[:length].numpy(), transitions.numpy())
+        assert sentence_tags == [int(x) for x in expected_tags]
+        assert sentence_score == pytest.approx(float(expected_score))
@@ -169,6 +169,85 @@ def test_zip_file():
         doc = CoNLL.conll2doc(input_file=filename, zip_file=zip_file)
         check_russian_doc(doc)
 
+def test_iter_docs():
+    """
+    Test reading a file a few sentences at a time
+    """
+    full_doc = CoNLL.conll2doc(input_str=RUSSIAN_SAMPLE)
+    docs = list(CoNLL.iter_docs(input_str=RUSSIAN_SAMPLE, sentences_per_doc=1))
+    assert len(docs) == 2
+    assert [doc.to_dict() for doc in docs] == [[sentence] for sentence in full_doc.to_dict()]
+    assert [sentence.comments for doc in docs for sentence in doc.sentences] == [sentence.comments for sentence in full_doc.sentences]
+
+    docs = list(CoNLL.iter_docs(input_str=RUSSIAN_SAMPLE))
+    assert len(docs) == 1
+    check_russian_doc(docs[0])
+
+    sentences = list(CoNLL.iter_sentences(input_str=RUSSIAN_SAMPLE, sentences_per_doc=1))
+    assert [sentence.to_dict() for sentence in sentences] == full_doc.to_dict()
+
+def test_iter_docs_zip_file():
+    """
+    Test reading a zip file a few sentences at a time
+    """
+    with tempfile.TemporaryDirectory() as tempdir:
+        zip_file = os.path.join(tempdir, "russian.zip")
+        filename = "russian.conll"
+        with ZipFile(zip_file, "w") as zout:
+            with zout.open(filename, "w") as fout:
+                fout.write(RUSSIAN_SAMPLE.encode())
+
+        docs = list(CoNLL.iter_docs(input_file=filename, zip_file=zip_file))
+        assert len(docs) == 1
+        check_russian_doc(docs[0])
+
+def test_write_docs():
+    """
+    Test that writing docs one at a time gives the same file as writing the whole doc
+    """
+    full_doc = CoNLL.conll2doc(input_str=RUSSIAN_SAMPLE)
+    with tempfile.TemporaryDirectory() as tempdir:
+        full_filename = os.path.join(tempdir, "full.conllu")
+        CoNLL.write_doc2conll(full_doc, full_filename)
+        stream_filename = os.path.join(tempdir, "stream.conllu")
+        CoNLL.write_docs(CoNLL.iter_docs(input_str=RUSSIAN_SAMPLE, sentences_per_doc=1), stream_filename)
+        with open(full_filename, encoding="utf-8") as fin:
+            expected = fin.read()
+        with open(stream_filename, encoding="utf-8") as fin:
+            assert fin.read() == expected
+
+NO_SENT_ID = """
+1	Unban	_	_	_	_	0	_	_	_
+2	mox	_	_	_	_	1	_	_	_
+
+1	opal	_	_	_	_	0	_	_	_
+
+1	Hello	_	_	_	_	0	_	_	_
+2	world	_	_	_	_	1	_	_	_
+""".strip()
+
+def test_iter_docs_sent_ids():
+    """
+    Sentences without a sent_id are numbered across the Documents, as they are for the whole file
+    """
+    full_doc = CoNLL.conll2doc(input_str=NO_SENT_ID)
+    docs = list(CoNLL.iter_docs(input_str=NO_SENT_ID, sentences_per_doc=2))
+    assert len(docs) == 2
+    sentences = [sentence for doc in docs for sentence in doc.sentences]
+    assert [sentence.sent_id for sentence in sentences] == ["0", "1", "2"]
+    assert [sentence.index for sentence in sentences] == [0, 1, 2]
+    assert [sentence.comments for sentence in sentences] == [sentence.comments for sentence in full_doc.sentences]
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        full_filename = os.path.join(tempdir, "full.conllu")
+        CoNLL.write_doc2conll(full_doc, full_filename)
+        stream_filename = os.path.join(tempdir, "stream.conllu")
+        CoNLL.write_docs(CoNLL.iter_docs(input_str=NO_SENT_ID, sentences_per_doc=2), stream_filename)
+        with open(full_filename, encoding="utf-8") as fin:
+            expected = fin.read()
+        with open(stream_filename, encoding="utf-8") as fin:
+            assert fin.read() == expected
+
 SIMPLE_NER = """
 # text = Teferi's best friend is Karn
 # sent_id = 0
@@ -2,7 +2,8 @@ import pytest
 
 import stanza
 from stanza.tests import *
-from stanza.models.common.doc import Document, ID, TEXT, NER
+from stanza.models.common.doc import Document, ID, TEXT, NER, MISC, START_CHAR, END_CHAR
+from stanza.utils.conll import CoNLL
 
 pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
 
@@ -55,3 +56,18 @@ def test_set_tokens(doc):
     assert result == ner_contents
 
 
+
+def test_offsets_as_fields():
+    """
+    Character offsets can be given as fields instead of in the misc column
+    """
+    from_misc = Document([[{ID: 1, TEXT: "unban", MISC: "start_char=0|end_char=5"},
+                           {ID: 2, TEXT: "mox", MISC: "start_char=6|end_char=9|SpaceAfter=No"}]], text="unban mox")
+    from_fields = Document([[{ID: 1, TEXT: "unban", START_CHAR: 0, END_CHAR: 5},
+                             {ID: 2, TEXT: "mox", START_CHAR: 6, END_CHAR: 9, MISC: "SpaceAfter=No"}]], text="unban mox")
+    for doc in (from_misc, from_fields):
+        assert [(token.start_char, token.end_char) for token in doc.sentences[0].tokens] == [(0, 5), (6, 9)]
+        assert doc.sentences[0].tokens[1].misc == "SpaceAfter=No"
+        assert doc.sentences[0].text == "unban mox"
+    assert from_fields.sentences[0].tokens[0].misc is None
+    assert CoNLL.doc2conll_text(from_fields) == CoNLL.doc2conll_text(from_misc)
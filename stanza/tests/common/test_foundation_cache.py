@@ -4,9 +4,10 @@ import shutil
 import tempfile
 
 import pytest
+import torch
 
 import stanza
-from stanza.models.common.foundation_cache import FoundationCache, load_charlm
+from stanza.models.common.foundation_cache import ActivationCache, FoundationCache, load_charlm
 from stanza.tests import TEST_MODELS_DIR
 
 pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
@@ -34,3 +35,45 @@ def test_charlm_cache():
 
     # it should remember the cached version
     model = cache.load_charlm(temp_file)
+
+def test_charlm_activation_cache():
+    """
+    A charlm loaded with an activation cache returns the same values, computing each sentence once
+    """
+    models = glob.glob(os.path.join(TEST_MODELS_DIR, "en", "forward_charlm", "*"))
+    assert len(models) >= 1
+    sentences = [["Unban", "mox", "opal"], ["Hello", "world"], ["Unban", "mox", "opal"]]
+
+    expected = load_charlm(models[0]).build_char_representation(sentences)
+    cache = FoundationCache(activation_cache_mb=10)
+    charlm = cache.load_charlm(models[0])
+    for _ in range(2):
+        result = charlm.build_char_representation(sentences)
+        assert len(result) == len(expected)
+        for x, y in zip(result, expected):
+            assert torch.allclose(x, y)
+
+    stats = cache.activations.stats()
+    assert stats['size'] == 2
+    assert stats['hits'] == 3
+
+def test_activation_cache_limit():
+    """
+    The least recently used sentences are dropped when the outputs go over the memory limit
+    """
+    cache = ActivationCache(1000)
+    computed = []
+    def compute(sentences):
+        computed.extend(sentences)
+        # 4 bytes per float, so each sentence takes 400 bytes
+        return [torch.zeros(len(sentence), 100) for sentence in sentences]
+
+    cache.compute("model", [["a"], ["b"]], compute)
+    cache.compute("model", [["c"]], compute)
+    assert cache.stats()['total_size'] == 800
+    cache.compute("model", [["b"], ["c"], ["a"]], compute)
+    assert computed == [["a"], ["b"], ["c"], ["a"]]
+
+    # a different model does not reuse the outputs
+    cache.compute("other", [["c"]], compute)
+    assert computed[-1] == ["c"]
@@ -0,0 +1,68 @@
+"""
+Test the LRUCache used by the lemma and mwt processors
+"""
+
+import pytest
+
+from stanza.models.common.lru_cache import LRUCache
+
+pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
+
+def test_eviction():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    # using 'a' makes 'b' the least recently used entry
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+def test_stats():
+    cache = LRUCache(10)
+    assert cache.get('a') is None
+    assert cache.get('a', 5) == 5
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['size'] == 1
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()['hits'] == 0
+
+def test_empty_cache():
+    cache = LRUCache(0)
+    cache.put('a', 1)
+    assert len(cache) == 0
+    assert cache.get('a') is None
+
+    with pytest.raises(ValueError):
+        LRUCache(-1)
+
+def test_items():
+    cache = LRUCache(3)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    assert cache.items() == [('b', 2), ('a', 1)]
+
+def test_sizeof():
+    cache = LRUCache(10, sizeof=len)
+    cache.put('a', 'xxxx')
+    cache.put('b', 'xxxx')
+    cache.put('c', 'xxxx')
+    assert 'a' not in cache
+    assert cache.stats()['total_size'] == 8
+    # replacing a value updates the total
+    cache.put('b', 'x')
+    assert cache.stats()['total_size'] == 5
+    # values larger than the whole cache are not kept
+    cache.put('d', 'x' * 11)
+    assert 'd' not in cache
+    assert len(cache) == 2
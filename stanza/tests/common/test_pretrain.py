@@ -137,3 +137,47 @@ def test_no_header():
             fout.write(UNK_PRETRAIN)
         pt = pretrain.Pretrain(vec_filename=filename, save_to_file=False)
         check_embedding(pt.emb, unk=True)
+
+def test_mmap_pretrain():
+    """
+    Test saving a pretrain as a memory mapped directory and loading it back
+    """
+    pt = pretrain.Pretrain(vec_filename=f'{TEST_WORKING_DIR}/in/tiny_emb.txt', save_to_file=False)
+    with tempfile.TemporaryDirectory(dir=f'{TEST_WORKING_DIR}/out') as tmpdir:
+        directory = os.path.join(tmpdir, "tiny.mmap")
+        pt.save_mmap(directory)
+
+        pt2 = pretrain.Pretrain(directory)
+        check_pretrain(pt2)
+        assert isinstance(pt2.emb, np.memmap)
+        assert pt2.vocab.state_dict() == pt.vocab.state_dict()
+
+        # the embedding module reads straight from the mapped file
+        embedding = torch.nn.Embedding.from_pretrained(torch.from_numpy(pt2.emb), freeze=True)
+        assert embedding.weight.data_ptr() == torch.from_numpy(pt2.emb).data_ptr()
+        np.testing.assert_allclose(embedding(torch.tensor([4, 6])).numpy(), pt.emb[[4, 6]])
+        del embedding, pt2
+
+MIXED_PRETRAIN="""
+unban 1 2 3 4
+mox opal 5 6 7 8
+<unk> -1 -1 -1 -1
+foo\t9\t10\t11\t12
+bar  1e2 -0.5 .25 1_0
+""".strip()
+
+@pytest.mark.parametrize("text", [SPACE_PRETRAIN, NO_HEADER_PRETRAIN, UNK_PRETRAIN, MIXED_PRETRAIN, "unban 1 2\nmox opal 3 4\nfoo 5\n"])
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_read_by_chunk(text, num_workers):
+    """
+    Reading a vector file in chunks gives the same result as reading it one line at a time
+    """
+    with tempfile.TemporaryDirectory(dir=TEST_WORKING_DIR) as tmpdir:
+        filename = os.path.join(tmpdir, "tiny.txt")
+        with open(filename, "w", encoding="utf-8") as fout:
+            fout.write(text)
+        expected_words, expected_emb, expected_failed = pretrain.Pretrain.read_from_file_by_line(filename)
+        words, emb, failed = pretrain.Pretrain.read_from_file(filename, num_workers=num_workers)
+        assert words == expected_words
+        assert failed == expected_failed
+        np.testing.assert_array_equal(emb, expected_emb)
@@ -0,0 +1,70 @@
+"""
+Test the decoding of the seq2seq model used by the lemmatizer and the MWT expander
+"""
+
+import pytest
+import torch
+
+import stanza.models.common.seq2seq_constant as constant
+from stanza.models.common.seq2seq_model import Seq2SeqModel
+
+pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
+
+def build_model(copy):
+    args = {'vocab_size': 30, 'emb_dim': 16, 'hidden_dim': 32, 'num_layers': 1, 'dropout': 0.0,
+            'max_dec_len': 20, 'attn_type': 'soft', 'edit': True, 'num_edit': 3, 'copy': copy}
+    model = Seq2SeqModel(args)
+    # sharpen the random output layer so the sentences stop at different lengths
+    with torch.no_grad():
+        model.dec2vocab.weight.mul_(6)
+        model.dec2vocab.bias[constant.EOS_ID] += 1.5 if copy else 0.4
+    model.eval()
+    return model
+
+def random_batch(batch_size, max_len):
+    lens = sorted(torch.randint(1, max_len + 1, (batch_size,)).tolist(), reverse=True)
+    src = torch.zeros(batch_size, lens[0], dtype=torch.long)
+    for idx, length in enumerate(lens):
+        src[idx, :length] = torch.randint(len(constant.VOCAB_PREFIX), 30, (length,))
+    return src, src.eq(constant.PAD_ID)
+
+@pytest.mark.parametrize("copy", [False, True])
+def test_predict_greedy(copy):
+    """
+    Decoding a batch gives the same sequences as decoding each item on its own
+    """
+    torch.manual_seed(1234)
+    model = build_model(copy)
+    src, src_mask = random_batch(40, 10)
+    with torch.no_grad():
+        preds, edit_logits = model.predict_greedy(src, src_mask)
+        assert len(preds) == 40
+        assert edit_logits.shape == (40, 3)
+        for idx, pred in enumerate(preds):
+            assert constant.EOS_ID not in pred
+            assert len(pred) <= 20
+            length = int((~src_mask[idx]).sum())
+            expected, _ = model.predict_greedy(src[idx:idx+1, :length], src_mask[idx:idx+1, :length])
+            assert pred == expected[0]
+    # the batch should include both finished and unfinished sequences
+    assert len(set(len(pred) for pred in preds)) > 1
+
+@pytest.mark.parametrize("copy", [False, True])
+def test_predict_beam(copy):
+    """
+    Beam search over a batch gives the same sequences as searching each item on its own
+    """
+    torch.manual_seed(1234)
+    model = build_model(copy)
+    src, src_mask = random_batch(40, 10)
+    with torch.no_grad():
+        preds, edit_logits = model.predict(src, src_mask, beam_size=4)
+        assert len(preds) == 40
+        assert edit_logits.shape == (40, 3)
+        for idx, pred in enumerate(preds):
+            assert constant.EOS_ID not in pred
+            assert len(pred) <= 20
+            length = int((~src_mask[idx]).sum())
+            expected, _ = model.predict(src[idx:idx+1, :length], src_mask[idx:idx+1, :length], beam_size=4)
+            assert pred == expected[0]
+    assert len(set(len(pred) for pred in preds)) > 1
@@ -604,3 +604,29 @@ def test_lang_subset_unlikely_language(en_multilingual):
     predictions = model(text_tensor)
     assert predictions[0, en_idx] < 0, "If this test fails, then regardless of how unlikely it was, the model is predicting the input string is possibly English.  Update the test by picking a different combination of languages & input"
 
+
+def test_langid_mixed_lengths(basic_multilingual):
+    """
+    Texts of different lengths are padded into the same batch, which should not change the predictions
+    """
+    texts = ["This is an English sentence.",
+             "C'est une phrase française.",
+             "Das ist ein deutscher Satz, der etwas länger ist.",
+             "Esta es una frase en español."]
+    docs = [Document([], text=text) for text in texts]
+    basic_multilingual(docs)
+
+    for text, doc in zip(texts, docs):
+        single = Document([], text=text)
+        basic_multilingual([single])
+        assert single.lang == doc.lang
+    assert [doc.lang for doc in docs[:2]] == ["en", "fr"]
+
+def test_langid_max_seqlen():
+    """
+    Test that only the start of the text is used when max_seqlen is set
+    """
+    nlp = Pipeline(dir=TEST_MODELS_DIR, lang="multilingual", processors="langid", langid_max_seqlen=28)
+    docs = [Document([], text="This is an English sentence." + " C'est une phrase française." * 10)]
+    nlp(docs)
+    assert docs[0].lang == "en"
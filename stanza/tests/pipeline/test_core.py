@@ -7,7 +7,9 @@ import stanza
 from stanza.tests import *
 
 from stanza.pipeline import core
+from stanza.pipeline.processor import Processor
 from stanza.resources.common import get_md5
+from stanza.utils.conll import CoNLL
 
 pytestmark = pytest.mark.pipeline
 
@@ -196,3 +198,71 @@ def test_limited_pipeline():
     with pytest.raises(ValueError):
         # this should fail
         doc = pipe("John Bauer works at Stanford", processors="tokenize,depparse")
+
+def test_lazy_pipeline():
+    """
+    Test that a lazy_load pipeline only loads the processors it uses, and gives the same results
+    """
+    pipe = stanza.Pipeline(processors="tokenize,pos,lemma,depparse,ner", dir=TEST_MODELS_DIR, download_method=None, lazy_load=True)
+    assert not any(isinstance(processor, Processor) for processor in pipe.processors.values())
+
+    doc = pipe("John Bauer works at Stanford", processors="tokenize")
+    assert isinstance(pipe.processors["tokenize"], Processor)
+    assert not isinstance(pipe.processors["depparse"], Processor)
+    assert not any(word.upos is not None for sentence in doc.sentences for word in sentence.words)
+
+    eager_pipe = stanza.Pipeline(processors="tokenize,pos,lemma,depparse,ner", dir=TEST_MODELS_DIR, download_method=None)
+    assert CoNLL.doc2conll_text(pipe("John Bauer works at Stanford")) == CoNLL.doc2conll_text(eager_pipe("John Bauer works at Stanford"))
+    assert all(isinstance(processor, Processor) for processor in pipe.processors.values())
+
+def test_sentence_cache(tmp_path):
+    """
+    Test that repeated sentences reuse their annotations, and that the cache can be saved and loaded
+    """
+    text = "John Bauer works at Stanford.\n\nAccept all cookies.\n\nAccept all cookies.\n\nChris Manning teaches at Stanford."
+    pipe = stanza.Pipeline(processors="tokenize,pos,lemma,depparse,ner", dir=TEST_MODELS_DIR, download_method=None)
+    expected = CoNLL.doc2conll_text(pipe(text))
+
+    cache_path = str(tmp_path / "sentence_cache.pkl")
+    cached_pipe = stanza.Pipeline(processors="tokenize,pos,lemma,depparse,ner", dir=TEST_MODELS_DIR, download_method=None,
+                                  sentence_cache_size=100, sentence_cache_path=cache_path)
+    doc = cached_pipe(text)
+    assert CoNLL.doc2conll_text(doc) == expected
+    assert [ent.text for ent in doc.ents] == [ent.text for ent in pipe(text).ents]
+    # the repeated sentence is only annotated once
+    num_sentences = len(doc.sentences)
+    unique_sentences = len({tuple(token.text for token in sentence.tokens) for sentence in doc.sentences})
+    assert unique_sentences < num_sentences
+    assert len(cached_pipe.sentence_cache) == unique_sentences
+
+    doc = cached_pipe(text)
+    assert CoNLL.doc2conll_text(doc) == expected
+    assert cached_pipe.sentence_cache.stats()['hits'] == num_sentences
+    cached_pipe.save_sentence_cache()
+
+    reloaded_pipe = stanza.Pipeline(processors="tokenize,pos,lemma,depparse,ner", dir=TEST_MODELS_DIR, download_method=None,
+                                    sentence_cache_size=100, sentence_cache_path=cache_path)
+    assert len(reloaded_pipe.sentence_cache) == unique_sentences
+    assert CoNLL.doc2conll_text(reloaded_pipe(text)) == expected
+    assert reloaded_pipe.sentence_cache.stats()['misses'] == 0
+
+    # a different set of processors does not reuse the annotations
+    doc = reloaded_pipe(text, processors="tokenize,pos")
+    assert not any(word.deprel is not None for sentence in doc.sentences for word in sentence.words)
+
+def test_sentence_cache_pipelined_stream():
+    """
+    Test that stream(pipelined=True) also reuses the annotations of repeated sentences
+    """
+    texts = ["John Bauer works at Stanford.", "Accept all cookies.", "Accept all cookies.", "Chris Manning teaches at Stanford."]
+    pipe = stanza.Pipeline(processors="tokenize,pos,lemma,depparse", dir=TEST_MODELS_DIR, download_method=None)
+    expected = [CoNLL.doc2conll_text(doc) for doc in pipe.stream(texts, batch_docs=2)]
+
+    cached_pipe = stanza.Pipeline(processors="tokenize,pos,lemma,depparse", dir=TEST_MODELS_DIR, download_method=None,
+                                  sentence_cache_size=100)
+    docs = list(cached_pipe.stream(texts, batch_docs=2, pipelined=True))
+    assert [CoNLL.doc2conll_text(doc) for doc in docs] == expected
+    num_sentences = sum(len(doc.sentences) for doc in docs)
+    unique_sentences = len({tuple(token.text for token in sentence.tokens) for doc in docs for sentence in doc.sentences})
+    assert len(cached_pipe.sentence_cache) == unique_sentences
+    assert cached_pipe.sentence_cache.stats()['hits'] == num_sentences - unique_sentences
@@ -6,6 +6,7 @@ import pytest
 import stanza
 from stanza.utils.conll import CoNLL
 from stanza.models.common.doc import Document
+from stanza.pipeline.processor import Processor
 
 from stanza.tests import *
 
@@ -207,6 +208,43 @@ class TestEnglishPipeline:
                EN_DOC_DEPENDENCY_PARSES_GOLD
 
 
+    def test_stream(self, pipeline):
+        """ stream should produce the same annotations as a list of Documents, in the same order """
+        docs = list(pipeline.stream(iter(EN_DOCS), batch_docs=2))
+        assert len(docs) == len(EN_DOCS)
+        assert [doc.text for doc in docs] == EN_DOCS
+        assert "\n\n".join([sent.tokens_string() for processed_doc in docs for sent in processed_doc.sentences]) == EN_DOC_TOKENS_GOLD
+
+    def test_stream_max_chars(self, pipeline):
+        """ a small max_chars puts each document in its own batch """
+        docs = list(pipeline.stream(EN_DOCS, max_chars=10))
+        assert [doc.text for doc in docs] == EN_DOCS
+        assert "\n\n".join([sent.dependencies_string() for processed_doc in docs for sent in processed_doc.sentences]) == \
+               EN_DOC_DEPENDENCY_PARSES_GOLD
+
+    def test_stream_pipelined(self, pipeline):
+        """ running the processors in separate threads should not change the results or the order """
+        docs = list(pipeline.stream(EN_DOCS * 3, batch_docs=2, pipelined=True))
+        assert [doc.text for doc in docs] == EN_DOCS * 3
+        assert "\n\n".join([sent.dependencies_string() for processed_doc in docs[:3] for sent in processed_doc.sentences]) == \
+               EN_DOC_DEPENDENCY_PARSES_GOLD
+
+    def test_pipeline_pool(self, pipeline):
+        """ the worker processes should return the same annotations as the pipeline, in the same order """
+        with stanza.PipelinePool(pipeline=pipeline, num_workers=2, batch_docs=1) as pool:
+            docs = pool.process(EN_DOCS * 3)
+        assert [doc.text for doc in docs] == EN_DOCS * 3
+        assert "\n\n".join([sent.dependencies_string() for processed_doc in docs[:3] for sent in processed_doc.sentences]) == \
+               EN_DOC_DEPENDENCY_PARSES_GOLD
+
+    def test_pipeline_pool_lazy_load(self):
+        """ a lazy_load pipeline is fully loaded before the workers are forked, so they share its models """
+        with stanza.PipelinePool(dir=TEST_MODELS_DIR, num_workers=2, batch_docs=1, lazy_load=True, load_in_background=True) as pool:
+            assert all(isinstance(processor, Processor) for processor in pool.pipeline.processors.values())
+            docs = pool.process(EN_DOCS)
+        assert "\n\n".join([sent.dependencies_string() for processed_doc in docs for sent in processed_doc.sentences]) == \
+               EN_DOC_DEPENDENCY_PARSES_GOLD
+
     @pytest.fixture(scope="class")
     def processed_multidoc_variant(self):
         """ Document created by running full English pipeline on a few sentences """
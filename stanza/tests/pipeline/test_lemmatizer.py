@@ -40,6 +40,7 @@ def test_identity_lemmatizer():
     for w in doc.iter_words():
         word_lemma_pairs += [f"{w.text} {w.lemma}"]
     assert EN_DOC_IDENTITY_GOLD == "\n".join(word_lemma_pairs)
+    assert nlp.processors['lemma'].cache is None
 
 def test_full_lemmatizer():
     nlp = stanza.Pipeline(**{'processors': 'tokenize,pos,lemma', 'dir': TEST_MODELS_DIR, 'lang': 'en'})
@@ -49,3 +50,22 @@ def test_full_lemmatizer():
         word_lemma_pairs += [f"{w.text} {w.lemma}"]
     assert EN_DOC_LEMMATIZER_MODEL_GOLD == "\n".join(word_lemma_pairs)
 
+
+def test_lemma_cache():
+    """
+    The second document is lemmatized from the cache, with the same results as without it
+    """
+    nlp = stanza.Pipeline(**{'processors': 'tokenize,pos,lemma', 'dir': TEST_MODELS_DIR, 'lang': 'en', 'lemma_ensemble_dict': False})
+    cache = nlp.processors['lemma'].cache
+    first = nlp(EN_DOC)
+    misses = cache.stats()['misses']
+    assert misses > 0
+    second = nlp(EN_DOC)
+    assert cache.stats()['misses'] == misses
+    assert cache.stats()['hits'] > 0
+    assert [w.lemma for w in first.iter_words()] == [w.lemma for w in second.iter_words()]
+
+    nlp = stanza.Pipeline(**{'processors': 'tokenize,pos,lemma', 'dir': TEST_MODELS_DIR, 'lang': 'en', 'lemma_ensemble_dict': False, 'lemma_cache_size': 0})
+    uncached = nlp(EN_DOC)
+    assert len(nlp.processors['lemma'].cache) == 0
+    assert [w.lemma for w in first.iter_words()] == [w.lemma for w in uncached.iter_words()]
@@ -82,3 +82,18 @@ def test_mwt():
          for sent in doc.sentences for word in sent.words]).strip()
     assert token_to_words == FR_MWT_TOKEN_TO_WORDS_GOLD
     assert word_to_token == FR_MWT_WORD_TO_TOKEN_GOLD
+
+def test_mwt_cache():
+    """
+    Each distinct token is expanded by the model once, and the second document is expanded from the cache
+    """
+    pipeline = stanza.Pipeline(processors='tokenize,mwt', dir=TEST_MODELS_DIR, lang='fr', mwt_ensemble_dict=False)
+    cache = pipeline.processors['mwt'].cache
+    first = pipeline(FR_MWT_SENTENCE)
+    # "du" appears twice but is only looked up once
+    mwt_tokens = [token.text for sent in first.sentences for token in sent.tokens if len(token.words) > 1]
+    assert cache.stats()['misses'] == len(set(mwt_tokens)) < len(mwt_tokens)
+
+    second = pipeline(FR_MWT_SENTENCE)
+    assert cache.stats()['hits'] == len(set(mwt_tokens))
+    assert [[w.text for w in t.words] for t in first.iter_tokens()] == [[w.text for w in t.words] for t in second.iter_tokens()]
@@ -3,6 +3,7 @@ import pytest
 import stanza
 from stanza.utils.conll import CoNLL
 from stanza.models.common.doc import Document
+from stanza.models.ner.data import DataLoader
 
 from stanza.tests import *
 
@@ -145,3 +146,16 @@ class TestMultiNERProcessor:
     def test_known_tags(self, pipeline):
         assert pipeline.processors["ner"].get_known_tags() == ["DISEASE"]
         assert len(pipeline.processors["ner"].get_known_tags(1)) == 18
+
+    def test_shared_cache(self, pipeline):
+        """
+        Predicting a batch with a cache shared between the models gives the same tags as predicting without it
+        """
+        doc = pipeline("John Bauer works at Stanford and has hip arthritis.  He works for Chris Manning")
+        processor = pipeline.processors["ner"]
+        cache = {}
+        for trainer, config in zip(processor.trainers, processor.configs):
+            batch = DataLoader(doc, config['batch_size'], config, vocab=trainer.vocab, evaluation=True, preprocess_tags=False, bert_tokenizer=trainer.bert_tokenizer)
+            for b in batch:
+                assert trainer.predict(b, cache=cache) == trainer.predict(b)
+        assert len(cache) > 0
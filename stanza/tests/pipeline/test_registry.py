@@ -0,0 +1,50 @@
+"""
+Test that importing stanza is cheap and the processor registry loads processors when they are needed
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from stanza.pipeline.registry import LazyRegistry, NAME_TO_PROCESSOR_CLASS, PIPELINE_NAMES, PROCESSOR_VARIANTS
+
+pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
+
+def test_import_is_lazy():
+    """
+    import stanza should not load torch or the pipeline until they are used
+    """
+    script = ("import sys, stanza\n"
+              "assert 'torch' not in sys.modules\n"
+              "assert 'stanza.pipeline.core' not in sys.modules\n"
+              "from stanza import Pipeline, Document\n"
+              "assert Pipeline is sys.modules['stanza.pipeline.core'].Pipeline\n"
+              "assert 'stanza.pipeline.ner_processor' not in sys.modules\n")
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+def test_builtin_processors():
+    """
+    The builtin processors are known in pipeline order and can be looked up without importing them first
+    """
+    assert PIPELINE_NAMES[:9] == ['langid', 'tokenize', 'mwt', 'pos', 'lemma', 'depparse', 'sentiment', 'constituency', 'ner']
+    assert 'ner' in NAME_TO_PROCESSOR_CLASS
+    assert NAME_TO_PROCESSOR_CLASS['ner'].__name__ == 'NERProcessor'
+    assert 'jieba' in PROCESSOR_VARIANTS['tokenize']
+    assert PROCESSOR_VARIANTS['tokenize']['jieba'].__name__ == 'JiebaTokenizer'
+    assert 'jieba' not in PROCESSOR_VARIANTS['pos']
+
+def test_lazy_registry():
+    registry = LazyRegistry({'lru': 'stanza.models.common.lru_cache'})
+    assert 'lru' in registry
+    assert list(registry) == ['lru']
+    registry['other'] = int
+    assert len(registry) == 2
+    assert registry['other'] is int
+    # the module is imported, but it does not register anything under this name
+    with pytest.raises(KeyError):
+        registry['lru']
+    del registry['lru']
+    assert 'lru' not in registry
+    with pytest.raises(KeyError):
+        registry['missing']
@@ -8,12 +8,14 @@ the data from a temp file, for example
 import pytest
 import tempfile
 import numpy as np
+import torch
 
 import stanza
 
 from stanza import Pipeline
 from stanza.tests import *
-from stanza.models.tokenization.data import DataLoader, NUMERIC_RE
+from stanza.models.tokenization.data import DataLoader, SortedDataset, NUMERIC_RE
+from stanza.models.tokenization.utils import create_dictionary
 
 pytestmark = [pytest.mark.travis, pytest.mark.pipeline]
 
@@ -195,6 +197,55 @@ def test_dictionary_feats(zhtok):
         assert dict_features == expected
 
 
+def test_dictionary_feats_all_positions():
+    """
+    The featurizer for a whole paragraph should match the featurizer for a single position
+    """
+    dictionary = create_dictionary(["蛋白质", "老师", "蛋白", "ab"])
+    args = dict(FAKE_PROPERTIES)
+    args['use_dictionary'] = True
+    args['num_dict_feat'] = 4
+    raw_text = "我想吃蛋白质Ab老师"
+    batches = DataLoader(args, input_text=raw_text, evaluation=True, dictionary=dictionary)
+    para = batches.data[0]
+    dict_feats = batches.extract_dict_feats([unit for unit, _ in para])
+    for i in range(len(para)):
+        assert dict_feats[i].tolist() == batches.extract_dict_feat(para, i)
+
+    # space_before and capitalized come first, then the dictionary features
+    features = batches.sentences[0][0][2]
+    assert features.shape == (len(para), 10)
+    assert np.array_equal(features[:, 2:], dict_feats)
+    assert features[:, 1].tolist() == [1 if x.isupper() else 0 for x in raw_text]
+
+def test_featurize_units_growing_table():
+    """
+    Units added over several calls, past the initial size of the lookup table, keep the right ids and features
+    """
+    data = DataLoader(args=FAKE_PROPERTIES, input_text=NO_MWT_TEXT, evaluation=True)
+    funcs = data.feature_funcs()
+    chunks = [list(NO_MWT_TEXT), [chr(0x4e00 + i) for i in range(100)], list("Ab") + [chr(0x4e00 + i) for i in range(50, 300)]]
+    for units in chunks:
+        unit_ids, feats = data.featurize_units(units)
+        assert unit_ids.tolist() == [data.vocab.unit2id(unit) for unit in units]
+        assert feats.tolist() == [[f(unit) for f in funcs] for unit in units]
+
+def test_advance_old_batch_window():
+    """
+    Cutting a window for some of the rows should give the same result as advancing the whole batch
+    """
+    raw_text = "Sehr gute Beratung\n\nschnelle Behebung der Probleme\n\nDie Kosten sind definitiv auch im Rahmen."
+    data = DataLoader(args=FAKE_PROPERTIES, input_text=raw_text, evaluation=True)
+    sorted_data = SortedDataset(data)
+    batch = sorted_data.collate([sorted_data[i] for i in range(len(sorted_data))])
+
+    full = data.advance_old_batch([3, 5, 30], batch)
+    window = data.advance_old_batch([5, 30], batch, max_len=6, rows=[1, 2])
+    assert window[0].shape == (2, 6)
+    for full_tensor, window_tensor in zip(full[:3], window[:3]):
+        assert torch.equal(full_tensor[1:, :6], window_tensor)
+    assert [x[:6] for x in full[3][1:]] == window[3]
+
 def test_numeric_re():
     """
     Test the "is numeric" function
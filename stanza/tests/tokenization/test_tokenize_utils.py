@@ -67,6 +67,22 @@ def test_match_tokens_with_text():
     with pytest.raises(ValueError):
         doc = utils.match_tokens_with_text([["This", "iz", "a", "test"]], "Thisisatest")
 
+def test_decode_predictions_skip_newline():
+    """
+    With skip_newline, the newlines are not in the units, so a token can span a newline in the text
+    """
+    orig_text = "unban mox\nopal  !"
+    raw = list("unban moxopal !")
+    preds = [0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 2]
+    _, _, document = utils.decode_predictions(None, None, orig_text, [raw], [preds], False, True, False)
+    document = doc.Document(document, orig_text)
+    check_offsets(document, [[(0, 5), (6, 14), (16, 17)]])
+    assert [token.text for token in document.sentences[0].tokens] == ["unban", " moxopal", " !"]
+
+    # without skip_newline, the units have to line up with the text apart from collapsed whitespace
+    with pytest.raises(ValueError):
+        utils.decode_predictions(None, None, orig_text, [raw], [preds], False, False, False)
+
 def test_long_paragraph():
     """
     Test the tokenizer's capacity to break text up into smaller chunks
@@ -0,0 +1,44 @@
+"""
+Time how long `import stanza` takes in a fresh interpreter
+
+  python -m stanza.utils.benchmark_import --runs 10
+
+Each run starts a new python process, so the time includes reading
+the modules from disk but not the interpreter startup.  Also reports
+which of the heavy dependencies were loaded by the import.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ['torch', 'numpy', 'requests', 'tqdm', 'emoji', 'stanza.pipeline.core']
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'time': elapsed, 'loaded': [x for x in {heavy} if x in sys.modules]}}))
+"""
+
+def time_import(module):
+    script = IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, check=True, text=True)
+    return json.loads(result.stdout.strip().split("\n")[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10, help='Number of fresh interpreters to time')
+    parser.add_argument('--module', default='stanza', help='Module to import')
+    args = parser.parse_args()
+
+    results = [time_import(args.module) for _ in range(args.runs)]
+    times = [x['time'] for x in results]
+    print("import %s: median %.4fs  min %.4fs  max %.4fs over %d runs" % (args.module, statistics.median(times), min(times), max(times), len(times)))
+    print("heavy modules loaded: %s" % (", ".join(results[-1]['loaded']) or "none"))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Time the dependency tree decoders on random batches of parser scores
+
+  python -m stanza.utils.benchmark_mst --num_sentences 2000 --max_len 60
+
+Compares decoding each sentence with chuliu_edmonds_one_root, which
+is what the parser used to do, with the batched decoders.  The scores
+are log probabilities peaked around a random tree, similar to the
+output of a trained parser.  --noise makes more of the greedy heads
+wrong, which sends more sentences down the slow path of the MST.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from stanza.models.common.chuliu_edmonds import chuliu_edmonds_one_root, chuliu_edmonds_one_root_batch
+from stanza.models.common.eisner import eisner_batch
+
+def random_scores(rng, batch_size, max_len, noise):
+    """
+    Build a batch of log probabilities which mostly prefer a random gold tree
+    """
+    lengths = rng.integers(2, max_len + 1, size=batch_size)
+    lengths[0] = max_len
+    scores = rng.normal(scale=noise, size=(batch_size, max_len, max_len))
+    for idx, length in enumerate(lengths):
+        # word 1 is attached to the root, every other word to an earlier word
+        heads = [0] + [rng.integers(1, word) for word in range(2, length)]
+        scores[idx, np.arange(1, length), heads] += 4.0
+    scores = scores - np.log(np.exp(scores).sum(axis=2, keepdims=True))
+    return scores.astype(np.float32), lengths
+
+def time_decoder(name, decode, batches):
+    start = time.perf_counter()
+    trees = [tree for scores, lengths in batches for tree in decode(scores, lengths)]
+    elapsed = time.perf_counter() - start
+    print("%-12s %8.3fs  %8.1f sentences/s" % (name, elapsed, len(trees) / elapsed))
+    return trees
+
+def decode_each(scores, lengths):
+    return [chuliu_edmonds_one_root(adj[:length, :length]) for adj, length in zip(scores, lengths)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_sentences', type=int, default=2000, help='Number of sentences to decode')
+    parser.add_argument('--batch_size', type=int, default=32, help='Sentences per batch')
+    parser.add_argument('--max_len', type=int, default=60, help='Longest sentence, not counting the root')
+    parser.add_argument('--noise', type=float, default=1.0, help='Scale of the noise added to the scores')
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    batches = [random_scores(rng, min(args.batch_size, args.num_sentences - start), args.max_len + 1, args.noise)
+               for start in range(0, args.num_sentences, args.batch_size)]
+
+    single = time_decoder("mst", decode_each, batches)
+    batched = time_decoder("mst batch", chuliu_edmonds_one_root_batch, batches)
+    time_decoder("eisner batch", eisner_batch, batches)
+    assert all((x == y).all() for x, y in zip(single, batched))
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,8 @@ Utility functions for the loading and conversion of CoNLL-format files.
 """
 import os
 import io
+from contextlib import contextmanager
+from itertools import islice
 from zipfile import ZipFile
 
 FIELD_NUM = 10
@@ -15,24 +17,20 @@ FIELD_TO_IDX = {ID: 0, TEXT: 1, LEMMA: 2, UPOS: 3, XPOS: 4, FEATS: 5, HEAD: 6, D
 class CoNLL:
 
     @staticmethod
-    def load_conll(f, ignore_gapping=True):
-        """ Load the file or string into the CoNLL-U format data.
+    def iter_conll(f, ignore_gapping=True):
+        """ Read the file or string one sentence at a time.
         Input: file or string reader, where the data is in CoNLL-U format.
-        Output: a tuple whose first element is a list of list of list for each token in each sentence in the data,
-        where the innermost list represents all fields of a token; and whose second element is a list of lists for each
-        comment in each sentence in the data.
+        Output: yields a tuple for each sentence, whose first element is a list of list for each token in the sentence,
+        where the innermost list represents all fields of a token; and whose second element is a list of the comments of the sentence.
         """
         # f is open() or io.StringIO()
-        doc, sent = [], []
-        doc_comments, sent_comments = [], []
+        sent, sent_comments = [], []
         for line_idx, line in enumerate(f):
             line = line.strip()
             if len(line) == 0:
                 if len(sent) > 0:
-                    doc.append(sent)
-                    sent = []
-                    doc_comments.append(sent_comments)
-                    sent_comments = []
+                    yield sent, sent_comments
+                    sent, sent_comments = [], []
             else:
                 if line.startswith('#'): # read comment line
                     sent_comments.append(line)
@@ -44,6 +42,18 @@ class CoNLL:
                     raise ValueError(f"Cannot parse CoNLL line {line_idx+1}: expecting {FIELD_NUM} fields, {len(array)} found at line {line_idx}\n  {array}")
                 sent += [array]
         if len(sent) > 0:
+            yield sent, sent_comments
+
+    @staticmethod
+    def load_conll(f, ignore_gapping=True):
+        """ Load the file or string into the CoNLL-U format data.
+        Input: file or string reader, where the data is in CoNLL-U format.
+        Output: a tuple whose first element is a list of list of list for each token in each sentence in the data,
+        where the innermost list represents all fields of a token; and whose second element is a list of lists for each
+        comment in each sentence in the data.
+        """
+        doc, doc_comments = [], []
+        for sent, sent_comments in CoNLL.iter_conll(f, ignore_gapping):
             doc.append(sent)
             doc_comments.append(sent_comments)
         return doc, doc_comments
@@ -54,17 +64,34 @@ class CoNLL:
         Input: list of token fields loaded from the CoNLL-U format data, where the outmost list represents a list of sentences, and the inside list represents all fields of a token.
         Output: a list of list of dictionaries for each token in each sentence in the document.
         """
-        doc_dict = []
-        for sent_idx, sent_conll in enumerate(doc_conll):
-            sent_dict = []
-            for token_idx, token_conll in enumerate(sent_conll):
-                try:
-                    token_dict = CoNLL.convert_conll_token(token_conll)
-                except ValueError as e:
-                    raise ValueError("Could not process sentence %d token %d: %s" % (sent_idx, token_idx, str(e))) from e
-                sent_dict.append(token_dict)
-            doc_dict.append(sent_dict)
-        return doc_dict
+        return [CoNLL.convert_conll_sentence(sent_conll, sent_idx) for sent_idx, sent_conll in enumerate(doc_conll)]
+
+    @staticmethod
+    def convert_conll_iter(sentences, doc_comments, sent_offset=0):
+        """ Convert the (sentence, comments) pairs of iter_conll to lists of dictionaries one sentence at a time.
+        The comments of each sentence are appended to doc_comments as it is converted.
+        Sentences are numbered from sent_offset, and a sentence without a sent_id
+        comment is given one with its number, as Document would for the whole file.
+        """
+        for sent_idx, (sent_conll, sent_comments) in enumerate(sentences, start=sent_offset):
+            if not any(comment.startswith("# sent_id") for comment in sent_comments):
+                sent_comments = sent_comments + ["# sent_id = %d" % sent_idx]
+            doc_comments.append(sent_comments)
+            yield CoNLL.convert_conll_sentence(sent_conll, sent_idx)
+
+    @staticmethod
+    def convert_conll_sentence(sent_conll, sent_idx=0):
+        """ Convert the CoNLL-U format input sentence to a list of dictionaries, one for each token.
+        sent_idx is only used for the error message if a token cannot be converted.
+        """
+        sent_dict = []
+        for token_idx, token_conll in enumerate(sent_conll):
+            try:
+                token_dict = CoNLL.convert_conll_token(token_conll)
+            except ValueError as e:
+                raise ValueError("Could not process sentence %d token %d: %s" % (sent_idx, token_idx, str(e))) from e
+            sent_dict.append(token_dict)
+        return sent_dict
 
     @staticmethod
     def convert_conll_token(token_conll):
@@ -95,24 +122,72 @@ class CoNLL:
         assert any([input_file, input_str]) and not all([input_file, input_str]), 'either use input file or input string'
         if zip_file: assert input_file, 'must provide input_file if zip_file is set'
 
+        with CoNLL.open_conll(input_file, input_str, zip_file) as fin:
+            doc_conll, doc_comments = CoNLL.load_conll(fin, ignore_gapping)
+
+        doc_dict = CoNLL.convert_conll(doc_conll)
+        return doc_dict, doc_comments
+
+    @staticmethod
+    @contextmanager
+    def open_conll(input_file=None, input_str=None, zip_file=None):
+        """ Open the CoNLL-U data in a file, a file in a zip file, or a string as a text reader.
+        """
         if input_str:
-            infile = io.StringIO(input_str)
-            doc_conll, doc_comments = CoNLL.load_conll(infile, ignore_gapping)
+            yield io.StringIO(input_str)
         elif zip_file:
             with ZipFile(zip_file) as zin:
                 with zin.open(input_file) as fin:
-                    doc_conll, doc_comments = CoNLL.load_conll(io.TextIOWrapper(fin, encoding="utf-8"), ignore_gapping)
+                    yield io.TextIOWrapper(fin, encoding="utf-8")
         else:
             with open(input_file, encoding='utf-8') as fin:
-                doc_conll, doc_comments = CoNLL.load_conll(fin, ignore_gapping)
-
-        doc_dict = CoNLL.convert_conll(doc_conll)
-        return doc_dict, doc_comments
+                yield fin
 
     @staticmethod
     def conll2doc(input_file=None, input_str=None, ignore_gapping=True, zip_file=None):
         doc_dict, doc_comments = CoNLL.conll2dict(input_file, input_str, ignore_gapping, zip_file=zip_file)
         return Document(doc_dict, text=None, comments=doc_comments)
+
+    @staticmethod
+    def iter_docs(input_file=None, input_str=None, ignore_gapping=True, zip_file=None, sentences_per_doc=1000):
+        """ Read the CoNLL-U data from file or string as a series of Documents of up to sentences_per_doc sentences each.
+
+        The data is read in one pass, and each sentence is converted as
+        it is read, so only one Document is kept in memory at a time no
+        matter how large the file is.  The sentences have the same
+        annotations and comments as from conll2doc on the whole file,
+        and their index counts across the Documents.
+        """
+        assert any([input_file, input_str]) and not all([input_file, input_str]), 'either use input file or input string'
+        if zip_file: assert input_file, 'must provide input_file if zip_file is set'
+        assert sentences_per_doc > 0, 'sentences_per_doc must be positive'
+
+        with CoNLL.open_conll(input_file, input_str, zip_file) as fin:
+            sentences = CoNLL.iter_conll(fin, ignore_gapping)
+            sent_offset = 0
+            while True:
+                # Document reads the sentences one at a time, which fills
+                # in doc_comments before it looks at the comments
+                doc_comments = []
+                doc_dict = CoNLL.convert_conll_iter(islice(sentences, sentences_per_doc), doc_comments, sent_offset)
+                doc = Document(doc_dict, text=None, comments=doc_comments)
+                if len(doc.sentences) == 0:
+                    return
+                for sentence in doc.sentences:
+                    sentence.index += sent_offset
+                sent_offset += len(doc.sentences)
+                yield doc
+
+    @staticmethod
+    def iter_sentences(input_file=None, input_str=None, ignore_gapping=True, zip_file=None, sentences_per_doc=1000):
+        """ Read the CoNLL-U data from file or string one Sentence at a time.
+
+        The sentences belong to the Documents made by iter_docs, so
+        sentence.doc refers to a Document of up to sentences_per_doc
+        sentences rather than to the whole file.
+        """
+        for doc in CoNLL.iter_docs(input_file, input_str, ignore_gapping, zip_file, sentences_per_doc):
+            yield from doc.sentences
     
     @staticmethod
     def convert_dict(doc_dict):
@@ -191,15 +266,17 @@ class CoNLL:
 
         Each sentence is represented by a list of strings: first the comments, then the converted tokens
         """
-        doc_conll = []
-        for sentence in doc.sentences:
-            sent_conll = list(sentence.comments)
-            for token_dict in sentence.to_dict():
-                token_conll = CoNLL.convert_token_dict(token_dict)
-                sent_conll.append("\t".join(token_conll))
-            doc_conll.append(sent_conll)
+        return [CoNLL.sentence2conll(sentence) for sentence in doc.sentences]
 
-        return doc_conll
+    @staticmethod
+    def sentence2conll(sentence):
+        """ Convert a Sentence to a list of strings: first the comments, then the converted tokens
+        """
+        sent_conll = list(sentence.comments)
+        for token_dict in sentence.to_dict():
+            token_conll = CoNLL.convert_token_dict(token_dict)
+            sent_conll.append("\t".join(token_conll))
+        return sent_conll
 
     @staticmethod
     def doc2conll_text(doc):
@@ -215,3 +292,25 @@ class CoNLL:
         """
         with open(filename, 'w', encoding='utf-8') as outfile:
             outfile.write(CoNLL.doc2conll_text(doc))
+
+    @staticmethod
+    def write_doc(doc, fout):
+        """ Writes the doc to an open file handle one sentence at a time
+
+        The text is the same as doc2conll_text for a doc with sentences,
+        but the text of the whole doc is never built in memory
+        """
+        for sentence in doc.sentences:
+            fout.write("\n".join(CoNLL.sentence2conll(sentence)))
+            fout.write("\n\n")
+
+    @staticmethod
+    def write_docs(docs, filename):
+        """ Writes an iterable of docs to the given filename as one conll file
+
+        Each doc is written as soon as it is produced, so docs can be a
+        generator such as iter_docs or a pipeline over a large corpus
+        """
+        with open(filename, 'w', encoding='utf-8') as outfile:
+            for doc in docs:
+                CoNLL.write_doc(doc, outfile)